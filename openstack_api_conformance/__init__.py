@@ -11,14 +11,18 @@ class AttributeDict(dict):
         return dict.get(self, key)
 
     def __getattr__(self, attr):
+        # keep special method lookups (pickle, copy) working
+        if attr.startswith('__'):
+            raise AttributeError(attr)
         return self.get(attr)
 
     def __setattr__(self, attr, value):
         self[attr] = value
 
 
-def get_configuration():
-    config_filename = os.environ.get('TEST_CONFIG') or ".testconfig"
+def get_configuration(filename=None):
+    config_filename = filename or os.environ.get('TEST_CONFIG') or \
+        ".testconfig"
 
     with open(config_filename, 'r') as config_file:
         return json.load(config_file, object_hook=AttributeDict)
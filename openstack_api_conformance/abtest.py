@@ -0,0 +1,229 @@
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import openstack_api_conformance
+from openstack_api_conformance import loadgen
+from openstack_api_conformance import operations
+from openstack_api_conformance import performance
+from openstack_api_conformance import results
+
+# A/B comparison: runs the same "load" profile against two targets, each a
+# complete .testconfig (a file name, or the configuration itself), and
+# compares latency distributions and throughput per operation.
+#
+#     "ab": {
+#         "targets": {
+#             "grizzly": "grizzly.testconfig",
+#             "icehouse": "icehouse.testconfig"
+#         },
+#         "mode": "interleaved",
+#         "rounds": 6,
+#         "duration": 20
+#     }
+#
+# interleaved:  the targets take turns, in ABBA order so slow drift of the
+#               client or the network cancels out.
+# simultaneous: both targets are loaded at the same time.
+#
+# Every round runs `duration` seconds per target. Latencies are compared with
+# the Mann-Whitney U test over all samples, throughput over the per round
+# throughputs. B being significantly slower is a regression.
+#
+#     python -m openstack_api_conformance.abtest grizzly icehouse
+
+DEFAULTS = {
+    'targets': {},
+    'mode': 'interleaved',
+    'rounds': 6,
+    'duration': 20,
+}
+
+
+def load_target(target, base=None):
+    """A target's configuration, file names relative to the base config."""
+    if isinstance(target, dict):
+        return openstack_api_conformance.AttributeDict(target)
+
+    if base and not os.path.isabs(target):
+        target = os.path.join(os.path.dirname(base), target)
+    return openstack_api_conformance.get_configuration(target)
+
+
+class Target(object):
+    """One side of the comparison, collecting its rounds."""
+
+    def __init__(self, name, config):
+        self.name = name
+        self.config = config
+        self.recorder = performance.Recorder()
+        # per operation throughput of every round
+        self.throughputs = {}
+        self.fixture = None
+
+    def setUp(self, load):
+        self.fixture = operations.setup_fixture(self.config['swift'],
+                                                int(load['object_size']))
+
+    def run_round(self, load):
+        recorder = loadgen.run(load, self.config, self.fixture)
+        for operation, row in recorder.summary().items():
+            self.throughputs.setdefault(operation, []).append(
+                row['throughput'])
+            # time spent on this target only, not on the other one
+            self.recorder.durations[operation] = \
+                self.recorder.durations.get(operation, 0) + \
+                recorder.finished - recorder.started
+        self.recorder.merge(recorder)
+        return recorder
+
+    def tearDown(self):
+        if self.fixture:
+            operations.cleanup_fixture(self.fixture)
+
+
+def round_order(targets, rounds):
+    """ABBA ABBA ..."""
+    for i in range(rounds):
+        yield targets if i % 2 == 0 else targets[::-1]
+
+
+def run(a, b, load, mode='interleaved', rounds=6):
+    for target in (a, b):
+        target.setUp(load)
+
+    try:
+        for order in round_order([a, b], rounds):
+            if mode == 'simultaneous':
+                threads = [threading.Thread(target=t.run_round, args=(load,))
+                           for t in order]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            else:
+                for target in order:
+                    target.run_round(load)
+    finally:
+        for target in (a, b):
+            target.tearDown()
+
+
+def compare(a, b, alpha=0.05):
+    """
+    Returns rows of (operation, summary a, summary b, latency p-value,
+    throughput p-value, regression) for the operations both ran.
+    """
+    summary_a = a.recorder.summary()
+    summary_b = b.recorder.summary()
+
+    rows = []
+    for operation in sorted(set(a.recorder.samples) &
+                            set(b.recorder.samples)):
+        latency_p = results.mann_whitney(a.recorder.samples[operation],
+                                         b.recorder.samples[operation])
+        throughput_p = results.mann_whitney(
+            a.throughputs.get(operation, []),
+            b.throughputs.get(operation, []))
+        row_a, row_b = summary_a[operation], summary_b[operation]
+
+        regression = (latency_p < alpha and row_b['p50'] > row_a['p50']) or \
+            (throughput_p < alpha and
+             mean(b.throughputs[operation]) < mean(a.throughputs[operation]))
+        rows.append((operation, row_a, row_b, latency_p, throughput_p,
+                     regression))
+
+    return rows
+
+
+def mean(values):
+    return sum(values) / float(len(values)) if values else 0.0
+
+
+def format_comparison(a, b, rows):
+    """Both targets per operation, and the change from a to b."""
+    lines = ["%-18s %-8s %8s %7s %9s %9s %9s %9s %8s %8s" % (
+        'operation', 'target', 'count', 'errors', 'req/s', 'p50 ms',
+        'p90 ms', 'p99 ms', 'p(lat)', 'p(req/s)')]
+
+    def ms(value):
+        return "%9.1f" % (value * 1000) if value is not None else "%9s" % '-'
+
+    def change(before, after):
+        if not before or after is None:
+            return "%9s" % '-'
+        return "%+8.1f%%" % ((after - before) / before * 100)
+
+    for operation, row_a, row_b, latency_p, throughput_p, regression in rows:
+        throughput_a = mean(a.throughputs[operation])
+        throughput_b = mean(b.throughputs[operation])
+        for name, row, throughput in ((a.name, row_a, throughput_a),
+                                      (b.name, row_b, throughput_b)):
+            lines.append("%-18s %-8s %8i %7i %9.1f %s %s %s" % (
+                operation, name[:8], row['count'], row['errors'],
+                throughput, ms(row['p50']), ms(row['p90']), ms(row['p99'])))
+
+        lines.append("%-18s %-8s %8s %7s %s %s %s %s %8.4f %8.4f%s" % (
+            operation, 'change', '', '', change(throughput_a, throughput_b),
+            change(row_a['p50'], row_b['p50']),
+            change(row_a['p90'], row_b['p90']),
+            change(row_a['p99'], row_b['p99']), latency_p, throughput_p,
+            '  REGRESSION' if regression else ''))
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare two clusters or releases under the same load.")
+    parser.add_argument('a', help="target name")
+    parser.add_argument('b', help="target name")
+    parser.add_argument('--mode', choices=('interleaved', 'simultaneous'))
+    parser.add_argument('--rounds', type=int)
+    parser.add_argument('--duration', type=float,
+                        help="seconds per round and target")
+    parser.add_argument('--alpha', type=float, default=0.05)
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args(argv)
+
+    config = openstack_api_conformance.get_configuration()
+    settings = dict(DEFAULTS)
+    settings.update(config.ab or {})
+    for key in ('mode', 'rounds', 'duration'):
+        if getattr(args, key):
+            settings[key] = getattr(args, key)
+
+    base = os.environ.get('TEST_CONFIG') or ".testconfig"
+    targets = []
+    for name in (args.a, args.b):
+        if name not in settings['targets']:
+            parser.error("unknown target %s" % name)
+        targets.append(Target(name, load_target(settings['targets'][name],
+                                                base)))
+    a, b = targets
+
+    load = loadgen.get_load_config(config,
+                                   duration=float(settings['duration']))
+    run(a, b, load, settings['mode'], int(settings['rounds']))
+
+    rows = compare(a, b, args.alpha)
+    print(format_comparison(a, b, rows))
+
+    if not args.no_save:
+        for target in targets:
+            # stored with the release of the target, in this database
+            target.recorder.finished = time.time()
+            results.save(target.recorder,
+                         openstack_api_conformance.AttributeDict(
+                             target.config, results=config.results),
+                         kind='ab-%s' % settings['mode'])
+
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
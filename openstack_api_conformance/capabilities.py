@@ -0,0 +1,132 @@
+import unittest
+
+import requests
+import unittest2
+
+import openstack_api_conformance
+from openstack_api_conformance import swift
+
+# Capability discovery: the swift /info document and the keystone version
+# document, fetched once per run, so test classes can declare the middleware,
+# limits and API versions they need and are skipped before any fixture
+# traffic:
+#
+#     @capabilities.requires('tempurl', limits={'swift.max_file_size': 1024})
+#     class Test(unittest2.TestCase):
+#         ...
+#
+#     @capabilities.requires(keystone='v2.0')
+#
+# Limits are minimums, by "section.key" of /info. Without "endpoint" in the
+# swift config (the storage URL up to /v1, e.g. "https://objects.example.com")
+# /info is found through the storage URL of one authentication per run. A
+# cluster without /info (before havana) or a keystone without a version
+# document is assumed to support everything, as is one whose /info can't be
+# found or reached, so missing configuration never skips a test.
+
+_storage_urls = {}
+_keystone_versions = {}
+
+
+_bases = (unittest.SkipTest,)
+if unittest2.SkipTest is not unittest.SkipTest:
+    # unittest2 has a SkipTest of its own on Python 2
+    _bases += (unittest2.SkipTest,)
+
+Unsupported = type('Unsupported', _bases, {
+    '__doc__': "Skips a test or class on the unittest and unittest2 runners."
+})
+
+
+def swift_info(config):
+    """The /info of the cluster of the swift config; {} if not available."""
+    endpoint = config.endpoint
+    if not endpoint:
+        key = (config.auth_url, config.username, config.tenantId)
+        if key not in _storage_urls:
+            try:
+                _storage_urls[key] = swift.authenticate(config)[1]
+            except (requests.RequestException, ValueError, KeyError,
+                    IndexError):
+                # keystone is down or has no object-store; the class itself
+                # will fail on that, not be skipped
+                return {}
+        endpoint = _storage_urls[key]
+    return swift.info(endpoint)
+
+
+def keystone_versions(config):
+    """
+    The ids of the API versions the keystone of config (a keystone config,
+    or a swift config's auth_url) publishes, None if it doesn't.
+    """
+    url = config.url or config.auth_url
+    if url not in _keystone_versions:
+        versions = None
+        try:
+            response = requests.get(url)
+            document = response.json().get('versions')
+            # {"versions": {"values": [...]}} since folsom, a list before
+            if isinstance(document, dict):
+                document = document.get('values')
+            versions = set(version['id'] for version in document or ())
+        except (requests.RequestException, ValueError, AttributeError,
+                KeyError, TypeError):
+            pass
+        _keystone_versions[url] = versions or None
+    return _keystone_versions[url]
+
+
+def require(config, *middleware, **needs):
+    """
+    Raises Unsupported unless the swift cluster of the whole config has the
+    middleware and needs['limits'], and its keystone needs['keystone'].
+    """
+    limits = needs.get('limits') or {}
+    if middleware or limits:
+        if not config.swift:
+            raise Unsupported("Swift not configured")
+
+        info = swift_info(config.swift)
+        if info:
+            missing = [name for name in middleware if name not in info]
+            if missing:
+                raise Unsupported("not supported by the cluster: %s" %
+                                  ", ".join(missing))
+
+            for name, minimum in sorted(limits.items()):
+                section, key = name.split('.', 1)
+                value = info.get(section, {}).get(key)
+                if value is not None and value < minimum:
+                    raise Unsupported("%s is %s, need %s" % (
+                        name, value, minimum))
+
+    version = needs.get('keystone')
+    if version:
+        keystone = config.keystone or config.swift
+        if not keystone:
+            raise Unsupported("Keystone not configured")
+
+        versions = keystone_versions(keystone)
+        if versions is not None and not any(
+                found.startswith(version) for found in versions):
+            raise Unsupported("keystone %s not available, only %s" % (
+                version, ", ".join(sorted(versions))))
+
+
+def requires(*middleware, **needs):
+    """Class decorator, calling require() before setUpClass."""
+    def decorate(cls):
+        setup = cls.__dict__.get('setUpClass')
+
+        def setUpClass(klass):
+            require(openstack_api_conformance.get_configuration(),
+                    *middleware, **needs)
+            if setup is not None:
+                setup.__get__(None, klass)()
+            else:
+                super(cls, klass).setUpClass()
+
+        cls.setUpClass = classmethod(setUpClass)
+        return cls
+    return decorate
@@ -0,0 +1,220 @@
+from __future__ import print_function
+
+import argparse
+import sys
+import time
+
+import openstack_api_conformance
+from openstack_api_conformance import loadgen
+from openstack_api_conformance import operations
+from openstack_api_conformance import performance
+from openstack_api_conformance import results
+
+# Capacity discovery: runs one operation of operations.py at a time in closed
+# loop, raising the concurrency step by step until a latency limit or the
+# error rate limit is crossed. Reports every step and the knee of the
+# throughput/latency curve, the step with the highest throughput per second
+# of median latency (the "power"), as the sustainable capacity.
+#
+#     "capacity": {
+#         "operations": ["object_put", "container_get", "token_issue"],
+#         "object_size": 4096,
+#         "start": 1,
+#         "factor": 2,
+#         "max_concurrency": 512,
+#         "duration": 20,
+#         "limits": {"p99": 1000},
+#         "error_rate": 0.01
+#     }
+#
+# Latency limits are in milliseconds per percentile, as the budgets in
+# performance.py. The concurrency is the total over all --processes; steps
+# that round to the concurrency of the previous one are skipped.
+#
+#     python -m openstack_api_conformance.capacity object_put \
+#         --object-size 65536
+
+DEFAULTS = {
+    'operations': ['object_put', 'container_get', 'token_issue'],
+    'object_size': 4096,
+    'start': 1,
+    'factor': 2,
+    'max_concurrency': 512,
+    'duration': 20,
+    'limits': {'p99': 1000},
+    'error_rate': 0.01,
+}
+
+
+def concurrency_steps(start, factor, maximum):
+    concurrency = start
+    while concurrency <= maximum:
+        yield concurrency
+        concurrency = max(int(concurrency * factor), concurrency + 1)
+
+
+def check_step(summary, limits, error_rate):
+    """Returns the limits a step crossed, as descriptions."""
+    crossed = []
+    attempts = summary['count'] + summary['errors']
+    if attempts and summary['errors'] > error_rate * attempts:
+        crossed.append("error rate %.1f%%" % (
+            100.0 * summary['errors'] / attempts))
+
+    for name, limit in sorted(limits.items()):
+        value = summary.get(name)
+        if value is not None and value * 1000 > limit:
+            crossed.append("%s %.1f ms > %s ms" % (name, value * 1000, limit))
+    return crossed
+
+
+def knee(steps):
+    """The step within limits with the highest throughput / median latency."""
+    best = None
+    for step in steps:
+        concurrency, summary, crossed = step
+        if crossed or not summary['p50']:
+            continue
+        power = summary['throughput'] / summary['p50']
+        if best is None or power > best[0]:
+            best = (power, step)
+    return best[1] if best else None
+
+
+def discover(name, settings, config, processes=1, report=None):
+    """
+    Steps up the concurrency of one operation until a limit is crossed.
+    Returns a list of (concurrency, summary, crossed limits) per step.
+    """
+    load = loadgen.get_load_config(
+        config, mode='closed', processes=processes,
+        duration=float(settings['duration']), mix={name: 1},
+        object_size=int(settings['object_size']))
+    fixture = operations.setup_fixture(config['swift'], load['object_size'])
+
+    steps = []
+    try:
+        for concurrency in concurrency_steps(
+                int(settings['start']), float(settings['factor']),
+                int(settings['max_concurrency'])):
+            # spread over the processes, at least one thread each
+            per_process = max(concurrency // processes, 1)
+            if steps and per_process * processes == steps[-1][0]:
+                # rounds to the last step's concurrency; measured already
+                continue
+            recorder = loadgen.run(dict(load, concurrency=per_process),
+                                   config, fixture)
+            summary = recorder.summary().get(name) or dict(
+                count=0, errors=0, throughput=0.0,
+                **dict((p, None) for p in performance.PERCENTILES))
+            crossed = check_step(summary, settings['limits'],
+                                 float(settings['error_rate']))
+
+            step = (per_process * processes, summary, crossed)
+            steps.append(step)
+            if report:
+                report(name, recorder, step)
+            if crossed:
+                break
+    finally:
+        operations.cleanup_fixture(fixture)
+
+    return steps
+
+
+def format_step(name, step):
+    concurrency, row, crossed = step
+
+    def ms(value):
+        return "%9.1f" % (value * 1000) if value is not None else "%9s" % '-'
+
+    return "%-16s %5i %9.1f %7i %s %s %s  %s" % (
+        name, concurrency, row['throughput'], row['errors'], ms(row['p50']),
+        ms(row['p90']), ms(row['p99']), ", ".join(crossed))
+
+
+def format_report(report):
+    """The knee per operation, next to the peak throughput within limits."""
+    lines = ["%-16s %5s %9s %9s %9s %5s %9s %9s" % (
+        'operation', 'knee', 'req/s', 'p50 ms', 'p99 ms', 'peak', 'req/s',
+        'limit at')]
+    for name, steps in report:
+        best = knee(steps)
+        within = [step for step in steps if not step[2]]
+        peak = max(within, key=lambda step: step[1]['throughput']) \
+            if within else None
+        limited = [concurrency for concurrency, _, crossed in steps
+                   if crossed]
+
+        line = "%-16s" % name
+        if best is None:
+            line += " %5s %9s %9s %9s" % ('-', '-', '-', '-')
+        else:
+            concurrency, row, _ = best
+            line += " %5i %9.1f %9.1f %9.1f" % (
+                concurrency, row['throughput'], row['p50'] * 1000,
+                (row['p99'] or 0) * 1000)
+        if peak is None:
+            line += " %5s %9s" % ('-', '-')
+        else:
+            line += " %5i %9.1f" % (peak[0], peak[1]['throughput'])
+        line += " %9i" % limited[0] if limited else " %9s" % '-'
+        lines.append(line)
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Find the sustainable capacity per operation.")
+    parser.add_argument('operations', nargs='*',
+                        help="default: the configured operations")
+    parser.add_argument('--object-size', type=int, help="bytes")
+    parser.add_argument('--start', type=int)
+    parser.add_argument('--factor', type=float)
+    parser.add_argument('--max-concurrency', type=int)
+    parser.add_argument('--duration', type=float, help="seconds per step")
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args(argv)
+
+    unknown = set(args.operations) - set(operations.OPERATIONS)
+    if unknown:
+        parser.error("unknown operations: %s" % ", ".join(sorted(unknown)))
+
+    config = openstack_api_conformance.get_configuration()
+    settings = dict(DEFAULTS)
+    settings.update(config.capacity or {})
+    for key in ('operations', 'object_size', 'start', 'factor',
+                'max_concurrency', 'duration'):
+        if getattr(args, key):
+            settings[key] = getattr(args, key)
+
+    stored = performance.Recorder()
+
+    def record(name, recorder, step):
+        print(format_step(name, step))
+        op = '%s@c%i' % (name, step[0])
+        stored.samples[op] = recorder.samples[name]
+        stored.errors[op] = recorder.errors[name]
+        stored.durations[op] = recorder.finished - recorder.started
+
+    print("%-16s %5s %9s %7s %9s %9s %9s  %s" % (
+        'operation', 'conc', 'req/s', 'errors', 'p50 ms', 'p90 ms', 'p99 ms',
+        'limits crossed'))
+    report = [(name, discover(name, settings, config, args.processes,
+                              record))
+              for name in settings['operations']]
+
+    print()
+    print(format_report(report))
+
+    if not args.no_save:
+        stored.finished = time.time()
+        results.save(stored, config, kind='capacity')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
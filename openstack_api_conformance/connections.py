@@ -0,0 +1,311 @@
+from __future__ import print_function
+
+import argparse
+import socket
+import ssl
+import sys
+import time
+
+try:
+    import httplib
+except ImportError:
+    import http.client as httplib
+
+try:
+    from urlparse import urlsplit
+except ImportError:
+    from urllib.parse import urlsplit
+
+import openstack_api_conformance
+from openstack_api_conformance import performance
+from openstack_api_conformance import results
+from openstack_api_conformance import swift
+
+# Connection reuse: plain httplib connections, one socket each, so it is
+# known which requests went over which connection, how long the TCP connect
+# and TLS handshake took and whether the TLS session was resumed. The tests
+# check that keystone and swift keep connections open across many requests,
+# after error responses and while idle; a load balancer idle timeout shorter
+# than the client's has disabled reuse unnoticed before. The benchmark
+# compares the latency of a request on a new connection, on a reused one and
+# on a new connection resuming the TLS session:
+#
+#     "connections": {
+#         "samples": 50,
+#         "requests": 100,
+#         "idle": 5
+#     }
+#
+# `requests` is how many requests a connection must survive, `idle` how many
+# seconds it must stay open unused. TLS sessions are resumed on Python 3.6
+# and later.
+#
+#     python -m openstack_api_conformance.connections --samples 200
+
+DEFAULTS = {
+    'samples': 50,
+    'requests': 100,
+    'idle': 5,
+}
+
+# what the next request on a connection the server closed raises
+CLOSED = (httplib.BadStatusLine, httplib.NotConnected,
+          httplib.CannotSendRequest, socket.error)
+
+KINDS = ('new', 'reused', 'resumed', 'connect', 'handshake',
+         'resumed_handshake')
+
+_context = []
+
+
+def get_connections_config(config=None, **overrides):
+    if config is None:
+        config = openstack_api_conformance.get_configuration()
+
+    settings = dict(DEFAULTS)
+    settings.update(config.connections or {})
+    settings.update((k, v) for k, v in overrides.items() if v is not None)
+    return settings
+
+
+def tls_context():
+    """One context for the run, as sessions only resume within a context."""
+    if not _context:
+        _context.append(ssl.create_default_context())
+    return _context[0]
+
+
+def path_of(url):
+    parts = urlsplit(url)
+    return (parts.path or '/') + ('?' + parts.query if parts.query else '')
+
+
+class Connection(object):
+    """
+    One connection to the host of url. Requests raise one of CLOSED once the
+    server closed it; it is never reopened.
+    """
+
+    def __init__(self, url, tls_session=None, timeout=30):
+        parts = urlsplit(url)
+        self.netloc = parts.netloc
+        https = parts.scheme == 'https'
+        port = parts.port or (443 if https else 80)
+
+        start = time.time()
+        sock = socket.create_connection((parts.hostname, port), timeout)
+        self.connect_seconds = time.time() - start
+        # as urllib3 does, so requests see what the clients see
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        self.handshake_seconds = None
+        self.resumed = False
+        if https:
+            kwargs = {}
+            if tls_session is not None:
+                kwargs['session'] = tls_session
+            start = time.time()
+            sock = tls_context().wrap_socket(
+                sock, server_hostname=parts.hostname, **kwargs)
+            self.handshake_seconds = time.time() - start
+            self.resumed = getattr(sock, 'session_reused', False)
+
+        self.sock = sock
+        self.http = httplib.HTTPConnection(parts.hostname, port,
+                                           timeout=timeout)
+        self.http.sock = sock
+        self.http.auto_open = 0
+        self.closed = False
+
+    @property
+    def setup_seconds(self):
+        return self.connect_seconds + (self.handshake_seconds or 0.0)
+
+    @property
+    def tls_session(self):
+        """The TLS session to resume, once a response has been read."""
+        return getattr(self.sock, 'session', None)
+
+    def request(self, method, url, headers=None, body=None):
+        """
+        Returns the response, read, and the seconds it took. `closed` is set
+        when the server said it would close the connection.
+        """
+        headers = dict({'Host': self.netloc}, **(headers or {}))
+        start = time.time()
+        self.http.request(method, path_of(url), body, headers)
+        response = self.http.getresponse()
+        response.read()
+        seconds = time.time() - start
+
+        if response.will_close or response.version != 11:
+            self.closed = True
+        return response, seconds
+
+    def close(self):
+        self.http.close()
+
+
+def keep_alive(url, headers=None, requests=100, method='GET'):
+    """How many of `requests` requests one connection served."""
+    connection = Connection(url)
+    try:
+        for i in range(requests):
+            try:
+                connection.request(method, url, headers)
+            except CLOSED:
+                return i
+            if connection.closed:
+                return i + 1
+        return requests
+    finally:
+        connection.close()
+
+
+def error_closes(url, error_url, headers=None, method='GET', body=None):
+    """
+    (status, closed) of the request for error_url, closed telling whether
+    the connection was unusable for a request for url afterwards.
+    """
+    connection = Connection(url)
+    try:
+        response, _ = connection.request(method, error_url, headers, body)
+        if connection.closed:
+            return response.status, True
+        try:
+            connection.request('GET', url, headers)
+        except CLOSED:
+            return response.status, True
+        return response.status, False
+    finally:
+        connection.close()
+
+
+def idle_survives(url, idle, headers=None, method='GET'):
+    """Whether a connection still serves requests after `idle` seconds."""
+    connection = Connection(url)
+    try:
+        connection.request(method, url, headers)
+        if connection.closed:
+            return False
+        time.sleep(idle)
+        try:
+            connection.request(method, url, headers)
+        except CLOSED:
+            return False
+        return True
+    finally:
+        connection.close()
+
+
+def measure(recorder, name, url, headers=None, method='GET', samples=50):
+    """
+    Records the latency of requests on new, reused and TLS-resumed
+    connections, and of setting those up, as name_<kind>; a connection the
+    server closed unannounced counts as a failed reuse. Returns the number
+    of TLS sessions resumed, and of attempts to.
+    """
+    resumed = attempts = 0
+    for _ in range(samples):
+        connection = Connection(url)
+        try:
+            response, seconds = connection.request(method, url, headers)
+            recorder.add(name + '_connect', connection.connect_seconds)
+            recorder.add(name + '_new', connection.setup_seconds + seconds,
+                         response.status < 400)
+            if connection.handshake_seconds is not None:
+                recorder.add(name + '_handshake',
+                             connection.handshake_seconds)
+
+            if not connection.closed:
+                try:
+                    response, seconds = connection.request(method, url,
+                                                           headers)
+                    recorder.add(name + '_reused', seconds,
+                                 response.status < 400)
+                except CLOSED:
+                    # closed without saying so; a failed reuse
+                    recorder.add(name + '_reused', 0.0, False)
+            tls_session = connection.tls_session
+        finally:
+            connection.close()
+
+        if tls_session is None:
+            continue
+        attempts += 1
+        connection = Connection(url, tls_session)
+        try:
+            response, seconds = connection.request(method, url, headers)
+            resumed += connection.resumed
+            recorder.add(name + '_resumed_handshake',
+                         connection.handshake_seconds)
+            recorder.add(name + '_resumed',
+                         connection.setup_seconds + seconds,
+                         response.status < 400 and connection.resumed)
+        finally:
+            connection.close()
+
+    return resumed, attempts
+
+
+def format_report(recorder, names):
+    summary = recorder.summary()
+    lines = ["%-10s %-18s %6s %6s %9s %9s %9s" % (
+        'service', 'kind', 'count', 'errors', 'p50 ms', 'p90 ms', 'p99 ms')]
+
+    def ms(value):
+        return "%9.1f" % (value * 1000) if value is not None else "%9s" % '-'
+
+    for name in names:
+        for kind in KINDS:
+            row = summary.get(name + '_' + kind)
+            if not row:
+                continue
+            lines.append("%-10s %-18s %6i %6i %s %s %s" % (
+                name, kind, row['count'], row['errors'], ms(row['p50']),
+                ms(row['p90']), ms(row['p99'])))
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure request latency on new, reused and "
+                    "TLS-resumed connections.")
+    parser.add_argument('--samples', type=int)
+    parser.add_argument('--requests', type=int,
+                        help="requests to try on one connection")
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args(argv)
+
+    config = openstack_api_conformance.get_configuration()
+    settings = get_connections_config(config, samples=args.samples,
+                                      requests=args.requests)
+
+    targets = []
+    if config.keystone:
+        targets.append(('keystone', config.keystone.url, {}))
+    if config.swift:
+        token_id, url = swift.authenticate(config['swift'])
+        targets.append(('swift', url, {'X-Auth-Token': token_id}))
+
+    recorder = performance.Recorder()
+    for name, url, headers in targets:
+        served = keep_alive(url, headers, int(settings['requests']))
+        resumed, attempts = measure(recorder, name, url, headers,
+                                    samples=int(settings['samples']))
+        print("%s: %i of %i requests on one connection, %i of %i TLS "
+              "sessions resumed" % (name, served, int(settings['requests']),
+                                    resumed, attempts))
+
+    print(format_report(recorder, [name for name, _, _ in targets]))
+
+    if not args.no_save:
+        recorder.finished = time.time()
+        results.save(recorder, config, kind='connections')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
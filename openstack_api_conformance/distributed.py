@@ -0,0 +1,478 @@
+from __future__ import print_function
+
+import argparse
+import collections
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+import unittest2
+
+import openstack_api_conformance
+from openstack_api_conformance import loadgen
+from openstack_api_conformance import operations
+from openstack_api_conformance import performance
+from openstack_api_conformance import results
+from openstack_api_conformance import underload
+
+# Distributed runner: a coordinator hands jobs to workers on other machines
+# over plain TCP, the workers stream their measurements back and the
+# coordinator merges them.
+#
+#     python -m openstack_api_conformance.distributed worker \
+#         --connect coordinator.example.com:7700
+#
+#     python -m openstack_api_conformance.distributed coordinator \
+#         --workers 8 load --duration 300
+#     python -m openstack_api_conformance.distributed coordinator \
+#         --local 4 tests
+#
+# A load job runs the "load" profile of the coordinator's .testconfig in one
+# process on every worker (start more workers per machine to use more
+# cores), the workers sharing the rate of open mode. Latencies travel as
+# performance.Histogram every `interval` seconds. A tests job splits the
+# tests by module over the workers, which report every outcome as it
+# happens. Every worker uses the credentials in its own .testconfig; as the
+# tests use fixed container names, shards running at the same time need
+# separate accounts.
+#
+# With --local N the coordinator starts N workers on this machine itself.
+#
+# Messages are JSON objects, one per line.
+
+DEFAULT_PORT = 7700
+
+
+def send(sock, message):
+    sock.sendall((json.dumps(message) + '\n').encode('utf-8'))
+
+
+def receive(rfile):
+    """The next message, None once the connection is closed."""
+    line = rfile.readline()
+    if not line:
+        return None
+    return json.loads(line.decode('utf-8'))
+
+
+def parse_address(address, default_host=''):
+    host, _, port = address.rpartition(':')
+    return host or default_host, int(port or DEFAULT_PORT)
+
+
+def encode_recorder(recorder):
+    return {
+        'histograms': dict(
+            (name, performance.Histogram.from_samples(samples).to_dict())
+            for name, samples in recorder.samples.items() if samples),
+        'errors': dict((name, count)
+                       for name, count in recorder.errors.items() if count),
+        'mismatches': dict((name, dict(reasons))
+                           for name, reasons in recorder.mismatches.items()
+                           if reasons),
+        'validated': dict(recorder.validated),
+    }
+
+
+class Merged(object):
+    """Measurements merged from every worker."""
+
+    def __init__(self):
+        self.histograms = collections.defaultdict(performance.Histogram)
+        self.errors = collections.Counter()
+        self.mismatches = collections.defaultdict(collections.Counter)
+        self.validated = collections.Counter()
+
+    def add(self, data):
+        for name, counts in data['histograms'].items():
+            self.histograms[name].merge(
+                performance.Histogram.from_dict(counts))
+        self.errors.update(data['errors'])
+        for name, reasons in data['mismatches'].items():
+            self.mismatches[name].update(reasons)
+        self.validated.update(data['validated'])
+
+    def total(self):
+        return sum(len(h) for h in self.histograms.values())
+
+    def summary(self, elapsed):
+        result = {}
+        for name in set(self.histograms) | set(self.errors):
+            histogram = self.histograms[name]
+            result[name] = dict(
+                count=len(histogram),
+                errors=self.errors[name],
+                throughput=len(histogram) / max(elapsed, 1e-9),
+                **dict((p, histogram.percentile(pct))
+                       for p, pct in performance.PERCENTILES.items())
+            )
+        return result
+
+    def recorder(self, started, finished):
+        """A Recorder for results.save, samples taken from the buckets."""
+        recorder = performance.Recorder()
+        recorder.started = started
+        recorder.finished = finished
+        for name, histogram in self.histograms.items():
+            recorder.samples[name] = list(histogram.samples())
+        recorder.errors.update(self.errors)
+        for name, reasons in self.mismatches.items():
+            recorder.mismatches[name].update(reasons)
+        recorder.validated.update(self.validated)
+        return recorder
+
+
+def iterate(suite):
+    """The test cases in a (nested) suite."""
+    if isinstance(suite, unittest2.TestSuite):
+        for test in suite:
+            for case in iterate(test):
+                yield case
+    else:
+        yield suite
+
+
+# worker
+
+
+class StreamingResult(underload.OutcomeResult):
+    """Sends every outcome to the coordinator as the test finishes."""
+
+    def __init__(self, sock):
+        super(StreamingResult, self).__init__()
+        self.sock = sock
+        self.sent = set()
+
+    def flush(self):
+        new = dict((test, outcome) for test, outcome in self.outcomes.items()
+                   if test not in self.sent)
+        if new:
+            send(self.sock, {'type': 'outcomes', 'outcomes': new})
+            self.sent.update(new)
+
+    def stopTest(self, test):
+        super(StreamingResult, self).stopTest(test)
+        self.flush()
+
+
+def run_tests(sock, job):
+    result = StreamingResult(sock)
+    if job['modules']:
+        # loaded by module, as unittest2 can't load single tests of
+        # unittest.TestCase classes by name
+        wanted = set(job['tests'])
+        unittest2.TestSuite(
+            case for case in iterate(
+                unittest2.TestLoader().loadTestsFromNames(job['modules']))
+            if case.id() in wanted).run(result)
+    result.flush()
+
+    failures = dict((test.id(), trace)
+                    for test, trace in result.failures + result.errors)
+    send(sock, {'type': 'done', 'failures': failures})
+
+
+def run_load(sock, job):
+    load = job['load']
+    config = openstack_api_conformance.get_configuration()
+    fixture = operations.setup_fixture(config['swift'],
+                                       int(load['object_size']))
+    recorder = performance.Recorder()
+    thread = threading.Thread(target=loadgen.run_process,
+                              args=(fixture, load, job['seed'], None,
+                                    recorder))
+    thread.daemon = True
+    try:
+        thread.start()
+        while thread.is_alive():
+            thread.join(job['interval'])
+            send(sock, dict(encode_recorder(recorder.drain()),
+                            type='progress'))
+    finally:
+        operations.cleanup_fixture(fixture)
+
+    send(sock, {'type': 'done'})
+
+
+JOBS = {
+    'load': run_load,
+    'tests': run_tests,
+}
+
+
+def worker(address):
+    sock = socket.create_connection(parse_address(address, 'localhost'))
+    rfile = sock.makefile('rb')
+    try:
+        send(sock, {'type': 'hello',
+                    'host': '%s:%i' % (socket.gethostname(), os.getpid())})
+        while True:
+            job = receive(rfile)
+            if job is None or job['type'] == 'exit':
+                return 0
+            JOBS[job['type']](sock, job)
+    finally:
+        sock.close()
+
+
+# coordinator
+
+
+class Coordinator(object):
+
+    def __init__(self, address, workers, timeout=60):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(parse_address(address))
+        self.server.listen(workers)
+        self.workers = workers
+        self.timeout = timeout
+        self.connections = []
+        self.messages = queue.Queue()
+
+    @property
+    def port(self):
+        return self.server.getsockname()[1]
+
+    def read(self, index, sock):
+        rfile = sock.makefile('rb')
+        try:
+            while True:
+                message = receive(rfile)
+                self.messages.put((index, message))
+                if message is None:
+                    return
+        except (socket.error, ValueError):
+            self.messages.put((index, None))
+
+    def accept(self):
+        """Waits for all workers; returns their host names."""
+        self.server.settimeout(self.timeout)
+        hosts = []
+        for index in range(self.workers):
+            sock, _ = self.server.accept()
+            sock.settimeout(None)
+            self.connections.append(sock)
+            thread = threading.Thread(target=self.read, args=(index, sock))
+            thread.daemon = True
+            thread.start()
+
+            _, hello = self.messages.get()
+            hosts.append(hello['host'])
+        return hosts
+
+    def run(self, jobs, handle):
+        """
+        Sends every worker its job and passes (worker, message) to handle
+        until all are done. Returns the workers that failed.
+        """
+        for sock, job in zip(self.connections, jobs):
+            send(sock, job)
+
+        running = set(range(len(jobs)))
+        failed = []
+        while running:
+            try:
+                index, message = self.messages.get(timeout=1)
+            except queue.Empty:
+                handle(None, None)
+                continue
+
+            if message is None:
+                failed.append(index)
+                running.discard(index)
+            elif message['type'] == 'done':
+                running.discard(index)
+            handle(index, message)
+        return failed
+
+    def close(self):
+        for sock in self.connections:
+            try:
+                send(sock, {'type': 'exit'})
+                sock.close()
+            except socket.error:
+                pass
+        self.server.close()
+
+
+def coordinate_load(coordinator, load, interval):
+    merged = Merged()
+    window = [Merged(), time.time()]
+    started = time.time()
+
+    def handle(index, message):
+        if message and message['type'] == 'progress':
+            merged.add(message)
+            window[0].add(message)
+
+        now = time.time()
+        if now - window[1] >= interval:
+            current, since = window
+            print("%7.1fs %9.1f req/s %7i errors" % (
+                now - started, current.total() / (now - since),
+                sum(current.errors.values())))
+            window[:] = [Merged(), now]
+
+    # one process per worker, sharing the rate
+    load = dict(load, processes=1,
+                rate=float(load['rate']) / coordinator.workers)
+    jobs = [{'type': 'load', 'load': load, 'seed': i, 'interval': interval}
+            for i in range(coordinator.workers)]
+    failed = coordinator.run(jobs, handle)
+    return merged, started, time.time(), failed
+
+
+def shard(names, workers):
+    """
+    Splits the tests by module, round robin over the workers. Returns a
+    (modules, test ids) pair per worker.
+    """
+    modules = collections.OrderedDict()
+    for case in iterate(underload.load_tests(names)):
+        modules.setdefault(case.__class__.__module__, []).append(case.id())
+
+    shards = [([], []) for _ in range(workers)]
+    for i, (module, tests) in enumerate(modules.items()):
+        shards[i % workers][0].append(module)
+        shards[i % workers][1].extend(tests)
+    return shards
+
+
+def coordinate_tests(coordinator, names, hosts):
+    outcomes = {}
+    failures = {}
+
+    def handle(index, message):
+        if not message:
+            return
+        if message['type'] == 'outcomes':
+            for test, outcome in message['outcomes'].items():
+                outcomes[test] = outcome
+                if outcome != 'pass':
+                    print("%-8s %-16s %s" % (outcome, hosts[index][:16],
+                                             test))
+        elif message['type'] == 'done':
+            failures.update(message['failures'])
+
+    jobs = [{'type': 'tests', 'modules': modules, 'tests': tests}
+            for modules, tests in shard(names, coordinator.workers)]
+    failed = coordinator.run(jobs, handle)
+    return outcomes, failures, failed
+
+
+def start_local(count, port):
+    return [subprocess.Popen([
+        sys.executable, '-m', 'openstack_api_conformance.distributed',
+        'worker', '--connect', 'localhost:%i' % port])
+        for _ in range(count)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run load or tests from several machines.")
+    commands = parser.add_subparsers(dest='command')
+
+    worker_parser = commands.add_parser('worker')
+    worker_parser.add_argument('--connect', required=True,
+                               help="coordinator host:port")
+
+    coordinator_parser = commands.add_parser('coordinator')
+    coordinator_parser.add_argument(
+        '--listen', default=':%i' % DEFAULT_PORT, help="[host]:port")
+    coordinator_parser.add_argument('--workers', type=int,
+                                    help="workers to wait for")
+    coordinator_parser.add_argument(
+        '--local', type=int, default=0,
+        help="start this many workers on this machine")
+    coordinator_parser.add_argument('--timeout', type=float, default=60,
+                                    help="seconds to wait for workers")
+    coordinator_parser.add_argument('--no-save', action='store_true')
+    jobs = coordinator_parser.add_subparsers(dest='job')
+
+    load_parser = jobs.add_parser('load')
+    load_parser.add_argument('--mode', choices=('open', 'closed'))
+    load_parser.add_argument('--rate', type=float,
+                             help="requests per second over all workers "
+                             "(open)")
+    load_parser.add_argument('--concurrency', type=int,
+                             help="threads per worker")
+    load_parser.add_argument('--duration', type=float, help="seconds")
+    load_parser.add_argument('--interval', type=float, default=5,
+                             help="seconds between progress reports")
+
+    tests_parser = jobs.add_parser('tests')
+    tests_parser.add_argument('tests', nargs='*',
+                              help="test names, default: the whole suite")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'worker':
+        return worker(args.connect)
+
+    workers = args.workers or args.local
+    if not workers:
+        parser.error("give --workers or --local")
+
+    config = openstack_api_conformance.get_configuration()
+    if args.local:
+        # workers connect to the port actually bound, so port 0 works too
+        args.listen = args.listen.rsplit(':', 1)[0] + ':0'
+    coordinator = Coordinator(args.listen, workers, args.timeout)
+    local = start_local(args.local, coordinator.port)
+
+    try:
+        hosts = coordinator.accept()
+        print("%i workers: %s" % (len(hosts), ", ".join(sorted(set(
+            host.rsplit(':', 1)[0] for host in hosts)))))
+
+        if args.job == 'load':
+            load = loadgen.get_load_config(
+                config, mode=args.mode, rate=args.rate,
+                concurrency=args.concurrency, duration=args.duration)
+            merged, started, finished, failed = coordinate_load(
+                coordinator, load, args.interval)
+
+            recorder = merged.recorder(started, finished)
+            print(loadgen.format_summary(merged.summary(finished - started)))
+            if any(recorder.mismatches.values()):
+                print()
+                print("schema mismatches")
+                print(loadgen.format_mismatches(recorder))
+
+            if not args.no_save:
+                results.save(recorder, config,
+                             kind='distributed-load-%s' % load['mode'])
+        else:
+            outcomes, failures, failed = coordinate_tests(
+                coordinator, args.tests, hosts)
+            for test in sorted(failures):
+                print("=" * 70)
+                print(test)
+                print(failures[test])
+            counts = collections.Counter(outcomes.values())
+            print("ran %i tests: %s" % (len(outcomes), ", ".join(
+                "%s %i" % item for item in sorted(counts.items()))))
+            failed = failed or [test for test in outcomes
+                                if outcomes[test] in ('fail', 'error')]
+    finally:
+        coordinator.close()
+        for process in local:
+            process.wait()
+
+    if failed:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+import json
+import requests
+
+# token id formats, and the format each release issues by default. Set
+# "token_format" in the keystone config when the deployment uses another
+# provider.
+TOKEN_FORMATS = {
+    'uuid': r"^[a-f0-9]{32}$",
+    # PKI tokens are base64 encoded CMS with '/' replaced by '-'
+    'pki': r"^MII[A-Za-z0-9+=-]+$",
+    'pkiz': r"^PKIZ_[A-Za-z0-9_-]+$",
+    'fernet': r"^[A-Za-z0-9_-]+=*$",
+}
+
+RELEASE_TOKEN_FORMATS = {
+    'folsom': 'uuid',
+    'grizzly': 'uuid',
+    'icehouse': 'uuid',
+}
+
+
+def token_pattern(config):
+    return TOKEN_FORMATS[config.token_format or
+                         RELEASE_TOKEN_FORMATS.get(config.release, 'uuid')]
+
+
+def password_auth(username, password, tenantId=None, tenantName=None):
+    auth = {
+        'auth': {
+            'passwordCredentials': {
+                'username': username,
+                'password': password,
+            }
+        }
+    }
+
+    if tenantId:
+        auth['auth']['tenantId'] = tenantId
+    if tenantName:
+        auth['auth']['tenantName'] = tenantName
+
+    return auth
+
+
+def token_auth(token_id, tenantId=None, tenantName=None):
+    auth = {
+        'auth': {
+            'token': {
+                'id': token_id
+            }
+        }
+    }
+
+    if tenantId:
+        auth['auth']['tenantId'] = tenantId
+    if tenantName:
+        auth['auth']['tenantName'] = tenantName
+
+    return auth
+
+
+def issue_token(url, auth, session=requests):
+    return session.post(url + 'v2.0/tokens',
+                        data=json.dumps(auth),
+                        headers={'content-type': 'application/json'}
+                        )
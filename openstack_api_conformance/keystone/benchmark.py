@@ -0,0 +1,171 @@
+from __future__ import print_function
+
+import argparse
+import itertools
+import sys
+import threading
+import time
+
+import requests
+
+import openstack_api_conformance
+from openstack_api_conformance import keystone
+from openstack_api_conformance import performance
+from openstack_api_conformance import results
+
+# Token issuance benchmark: issues tokens concurrently with each of the auth
+# styles test_authenticate checks, and reports tokens per second and latency
+# per style and concurrency.
+#
+#     "keystone": {
+#         ...
+#         "users": [
+#             {"username": "u1", "password": "p1",
+#              "tenantId": "...", "tenantName": "..."}
+#         ]
+#     },
+#     "token_benchmark": {
+#         "styles": ["unbound", "tenantId", "tenantName",
+#                    "rescope_unbound", "rescope_bound"],
+#         "concurrency": [1, 4, 16],
+#         "duration": 10
+#     }
+#
+# Without "users" the keystone credentials themselves are used.
+#
+#     python -m openstack_api_conformance.keystone.benchmark -c 1 8 32
+
+DEFAULTS = {
+    'styles': ['unbound', 'tenantId', 'tenantName',
+               'rescope_unbound', 'rescope_bound'],
+    'concurrency': [1, 4, 16],
+    'duration': 10,
+}
+
+
+def _password(user, style):
+    return keystone.password_auth(
+        user['username'], user['password'],
+        tenantId=user.get('tenantId') if style == 'tenantId' else None,
+        tenantName=user.get('tenantName') if style == 'tenantName' else None)
+
+
+def _rescope(url, user, bound, session):
+    """A token auth rescoping an (un)bound token of user to its tenant."""
+    response = keystone.issue_token(
+        url,
+        keystone.password_auth(
+            user['username'], user['password'],
+            tenantName=user.get('tenantName') if bound else None),
+        session)
+    response.raise_for_status()
+
+    return keystone.token_auth(response.json()['access']['token']['id'],
+                               tenantName=user.get('tenantName'))
+
+
+def auth_for(style, url, user, session):
+    """Returns the request body for one style; rescoping styles issue the
+    token to rescope up front, so only the rescope itself is measured."""
+    if style == 'rescope_unbound':
+        return _rescope(url, user, False, session)
+    if style == 'rescope_bound':
+        return _rescope(url, user, True, session)
+    return _password(user, style)
+
+
+def get_users(config):
+    return config.users or [config]
+
+
+def run(url, users, style, concurrency, duration):
+    recorder = performance.Recorder()
+    deadline = time.time() + duration
+    user_cycle = itertools.cycle(users)
+    lock = threading.Lock()
+
+    def worker():
+        session = requests.Session()
+        with lock:
+            user = next(user_cycle)
+        auth = auth_for(style, url, user, session)
+
+        while time.time() < deadline:
+            start = time.time()
+            try:
+                ok = keystone.issue_token(url, auth, session).status_code \
+                    == 200
+            except requests.RequestException:
+                ok = False
+            recorder.add(style, time.time() - start, ok)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    recorder.started = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    recorder.finished = time.time()
+
+    return recorder
+
+
+def format_report(report):
+    lines = ["%-16s %5s %8s %7s %9s %9s %9s %9s" % (
+        'style', 'conc', 'tokens', 'errors', 'tokens/s', 'p50 ms', 'p90 ms',
+        'p99 ms')]
+    for style, concurrency, summary in report:
+        row = summary.get(style) or dict(
+            count=0, errors=0, throughput=0.0, p50=None, p90=None, p99=None)
+        lines.append("%-16s %5i %8i %7i %9.1f" % (
+            style, concurrency, row['count'], row['errors'],
+            row['throughput']) +
+            "".join(" %9.1f" % (row[p] * 1000) if row[p] is not None else
+                    " %9s" % '-' for p in ('p50', 'p90', 'p99')))
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark keystone token issuance.")
+    parser.add_argument('--styles', nargs='+', choices=DEFAULTS['styles'])
+    parser.add_argument('-c', '--concurrency', type=int, nargs='+')
+    parser.add_argument('--duration', type=float)
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args(argv)
+
+    config = openstack_api_conformance.get_configuration()
+    settings = dict(DEFAULTS)
+    settings.update(config.token_benchmark or {})
+    for key in ('styles', 'concurrency', 'duration'):
+        if getattr(args, key):
+            settings[key] = getattr(args, key)
+
+    keystone_config = config['keystone']
+    users = get_users(keystone_config)
+
+    stored = performance.Recorder()
+    report = []
+    for style in settings['styles']:
+        for concurrency in settings['concurrency']:
+            recorder = run(keystone_config.url, users, style,
+                           int(concurrency), float(settings['duration']))
+            report.append((style, concurrency, recorder.summary()))
+
+            name = 'token_%s@c%i' % (style, concurrency)
+            stored.samples[name] = recorder.samples[style]
+            stored.errors[name] = recorder.errors[style]
+            stored.durations[name] = recorder.finished - recorder.started
+
+    print(format_report(report))
+
+    if not args.no_save:
+        stored.finished = time.time()
+        results.save(stored, config, kind='token-benchmark')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
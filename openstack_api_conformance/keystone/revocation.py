@@ -0,0 +1,172 @@
+from __future__ import print_function
+
+import argparse
+import collections
+import sys
+import time
+
+import requests
+
+import openstack_api_conformance
+from openstack_api_conformance import keystone
+from openstack_api_conformance import performance
+from openstack_api_conformance import results
+
+# Token revocation propagation: issues a tenant token, uses it against the
+# object-store endpoint from its catalog so the authtoken middleware caches
+# it, revokes it in keystone and polls swift until the token is refused.
+#
+#     "keystone": {
+#         ...
+#         "admin_url": "http://identity.example.com:35357/",
+#         "admin_token": "...",
+#     },
+#     "revocation": {
+#         "iterations": 20,
+#         "warmup": 3,
+#         "confirm": 10,
+#         "timeout": 600,
+#         "poll_interval": 0.05
+#     }
+#
+# Instead of admin_token, admin_username/admin_password/admin_tenantName can
+# be given.
+#
+#     python -m openstack_api_conformance.keystone.revocation --iterations 5
+
+DEFAULTS = {
+    'iterations': 20,
+    'warmup': 3,
+    'confirm': 10,
+    'timeout': 600,
+    'poll_interval': 0.05,
+}
+
+
+def admin_token(config):
+    if config.admin_token:
+        return config.admin_token
+
+    response = keystone.issue_token(
+        config.admin_url or config.url,
+        keystone.password_auth(config.admin_username, config.admin_password,
+                               tenantName=config.admin_tenantName))
+    response.raise_for_status()
+    return response.json()['access']['token']['id']
+
+
+def revoke(config, admin, token_id):
+    requests.delete(
+        (config.admin_url or config.url) + 'v2.0/tokens/' + token_id,
+        headers={'X-Auth-Token': admin}).raise_for_status()
+
+
+def object_store(token):
+    return [
+        service['endpoints'][0]['publicURL']
+        for service in token['access']['serviceCatalog']
+        if service['type'] == 'object-store'
+    ][0]
+
+
+def measure(config, admin, warmup=3, confirm=10, timeout=600,
+            poll_interval=0.05):
+    """
+    Returns the seconds swift kept accepting (2xx) a revoked token, None if
+    it still did at the timeout, and a Counter of the polls neither
+    accepted nor refused, by status or 'connection' for request errors.
+    """
+    response = keystone.issue_token(
+        config.url,
+        keystone.password_auth(config.username, config.password,
+                               tenantId=config.tenantId))
+    response.raise_for_status()
+    token = response.json()
+    token_id = token['access']['token']['id']
+    url = object_store(token)
+
+    session = requests.Session()
+    session.headers.update({'X-Auth-Token': token_id})
+    for _ in range(warmup):
+        session.head(url).raise_for_status()
+
+    revoke(config, admin, token_id)
+    revoked = time.time()
+
+    last_accepted = None
+    refused = 0
+    errors = collections.Counter()
+    while refused < confirm:
+        start = time.time()
+        if start - revoked > timeout:
+            return None, errors
+
+        try:
+            status = session.head(url).status_code
+        except requests.RequestException:
+            status = 'connection'
+
+        if status == 401:
+            refused += 1
+        elif status != 'connection' and 200 <= status < 300:
+            refused = 0
+            last_accepted = start
+        else:
+            errors[status] += 1
+        time.sleep(poll_interval)
+
+    return (last_accepted - revoked if last_accepted else 0.0), errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure how long swift accepts revoked tokens.")
+    parser.add_argument('--iterations', type=int)
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args(argv)
+
+    config = openstack_api_conformance.get_configuration()
+    settings = dict(DEFAULTS)
+    settings.update(config.revocation or {})
+    if args.iterations:
+        settings['iterations'] = args.iterations
+
+    keystone_config = config['keystone']
+    admin = admin_token(keystone_config)
+
+    recorder = performance.Recorder()
+    windows = []
+    errors = collections.Counter()
+    for _ in range(int(settings['iterations'])):
+        window, polls = measure(keystone_config, admin,
+                                int(settings['warmup']),
+                                int(settings['confirm']),
+                                float(settings['timeout']),
+                                float(settings['poll_interval']))
+        windows.append(window)
+        errors.update(polls)
+        recorder.add('revocation_window', window or 0.0, window is not None)
+        for _ in range(sum(polls.values())):
+            recorder.add('revocation_poll', 0.0, False)
+
+    accepted = [w for w in windows if w is not None]
+    print("iterations %i, still accepted at timeout %i" % (
+        len(windows), len(windows) - len(accepted)))
+    for name, pct in (('p50', 50), ('p90', 90), ('p99', 99), ('max', 100)):
+        value = performance.percentile(accepted, pct)
+        print("%-4s %9s s" % (
+            name, '-' if value is None else '%.3f' % value))
+    # neither accepted nor refused, so not part of the windows above
+    print("errors %s" % (", ".join(
+        "%s x%i" % (status, count)
+        for status, count in sorted(errors.items(), key=str)) or 'none'))
+
+    if not args.no_save:
+        recorder.finished = time.time()
+        results.save(recorder, config, kind='revocation')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
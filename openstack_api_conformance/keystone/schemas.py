@@ -0,0 +1,113 @@
+import numbers
+
+from openstack_api_conformance import keystone
+from openstack_api_conformance import schema
+from openstack_api_conformance.schema import AnyOf, Const, Headers, Object, \
+    Recent, Response
+
+# Keystone v2.0 token responses per release, see schema.py. The tests check
+# against validators(config); the load generator checks every token_issue
+# response the same way.
+
+HTTP_DATE = '%a, %d %b %Y %H:%M:%S GMT'
+
+URL = r"^https?://([\d\.]+|[0-9a-z\.-]+\.[a-z\.]{2,6})(:\d+)?" \
+    r"(/[A-Za-z0-9_\./]*)?$"
+
+_validators = {}
+
+
+def definitions(config):
+    """The schemas for the release (and token format) in config."""
+    folsom = config.release == 'folsom'
+
+    if folsom:
+        headers = Headers({
+            'content-type': Const('application/json'),
+            'vary': Const('X-Auth-Token'),
+            'date': Recent(HTTP_DATE, 5),
+            'transfer-encoding': Const('chunked'),
+        }, extra=False)
+    else:
+        headers = Headers({
+            'content-type': Const('application/json'),
+            'vary': Const('X-Auth-Token'),
+            'date': Recent(HTTP_DATE, 5),
+            'content-length': r"^\d+$",
+        }, extra=False)
+
+    token = {
+        'id': keystone.token_pattern(config),
+        # tokens are valid for 24 hours
+        'expires': Recent('%Y-%m-%dT%H:%M:%SZ', 650, 3600 * 24),
+    }
+    if not folsom:
+        token['issued_at'] = None
+    tenant = Object({'id': None}, extra=True)
+
+    user = {
+        'username': None,
+        'roles': [{'name': None}],
+        'roles_links': Const([]),
+        'id': r"^[a-f0-9]{32}$",
+        'name': None,
+    }
+
+    catalog = [{
+        'endpoints_links': Const([]),
+        'endpoints': [{
+            'adminURL': None,
+            'publicURL': URL,
+            'internalURL': URL,
+            'region': None,
+            'id': None,
+        }],
+        'type': None,
+        'name': None,
+    }]
+    # folsom is inconsistent with empty catalogs.
+    empty_catalog = AnyOf(Const([]), Const({}), Const(None)) if folsom \
+        else Const([])
+    if folsom:
+        catalog = AnyOf(empty_catalog, catalog)
+
+    unbound = {
+        'token': token,
+        'user': dict(user, roles=Const([])),
+        'serviceCatalog': empty_catalog,
+    }
+    if config.release in ('grizzly', 'icehouse'):
+        unbound['metadata'] = None
+
+    scoped = {
+        'token': dict(token, tenant=tenant),
+        'user': user,
+        'serviceCatalog': catalog,
+        'metadata': None,
+    }
+
+    return {
+        'headers': headers,
+        'token': Object(token, {'tenant': tenant}),
+        'user': user,
+        'catalog': catalog,
+        'unbound': {'access': unbound},
+        'scoped': {'access': scoped},
+        'token_issue': Response((200,), headers, {'access': scoped}),
+        'error': Response(None, Headers({
+            'content-type': Const('application/json'),
+            'date': Recent(HTTP_DATE, 5),
+        }), {'error': {
+            'message': None,
+            'code': numbers.Integral,
+            'title': None,
+        }}),
+    }
+
+
+def validators(config):
+    """Compiled definitions(config), once per release and token format."""
+    key = (config.release, config.token_format)
+    if key not in _validators:
+        _validators[key] = schema.compile_profile(definitions(config))
+    return _validators[key]
@@ -1,191 +1,65 @@
 import openstack_api_conformance
+from openstack_api_conformance import capabilities
+from openstack_api_conformance import keystone
+from openstack_api_conformance import schema
+from openstack_api_conformance.keystone import schemas
 
-import calendar
-import json
-import requests
-import time
 import unittest2
 
 
+@capabilities.requires(keystone='v2.0')
 class Test(unittest2.TestCase):
 
     @classmethod
     def setUpClass(cls):
         cls.config = openstack_api_conformance.get_configuration()['keystone']
+        cls.validators = schemas.validators(cls.config)
 
     def setUp(self):
-        self.base_auth = {
-            'auth': {
-                'passwordCredentials': {
-                    'username': self.config['username'],
-                    'password': self.config['password'],
-                }
-            }
-        }
+        self.base_auth = keystone.password_auth(
+            self.config['username'], self.config['password'])
 
     def check_headers(self, headers):
-        self.assertDictContainsSubset({
-            #        'transfer-encoding': 'chunked',
-            'content-type': 'application/json',
-            'vary': 'X-Auth-Token',
-        },
-            headers)
-
-        header_names = set(headers.keys()) - \
-            set(("transfer-encoding", "content-length"))
-
-        self.assertItemsEqual(
-            header_names,
-            ['date', 'content-type', 'vary'])
-
-        if self.config.release == 'folsom':
-            self.assertEqual(headers.get("transfer-encoding"), "chunked")
-            self.assertNotIn('content-length', headers)
-        else:
-            self.assertNotIn('transfer-encoding', headers)
-            self.assertRegexpMatches(headers['content-length'], r'^\d+$')
-
-        response_date = time.strptime(
-            headers['date'],
-            '%a, %d %b %Y %H:%M:%S GMT')
-
-        response_time = calendar.timegm(response_date)
-
-        self.assertAlmostEqual(time.time(), response_time, delta=5)
+        schema.assert_valid(self, self.validators['headers'], headers)
 
     def check_token(self, token):
-        # verify the minimal data set.
-        self.assertIn('id', token)
-        self.assertIn('expires', token)
-
-        keys = set(token) - set(['tenant'])
-        if self.config.release == 'folsom':
-            self.assertItemsEqual(keys, ('id', 'expires'))
-        else:
-            self.assertItemsEqual(keys, ('id', 'expires', 'issued_at'))
-
-        # Make sure the token expires 24h in the future.
-        expires = time.strptime(token['expires'], '%Y-%m-%dT%H:%M:%SZ')
-        expires = calendar.timegm(expires)
-
-        # tokens are valid for 24 hours
-        self.assertAlmostEqual(time.time() + 3600 * 24, expires, delta=650)
-
-	self.assertRegexpMatches(
-	    token['id'],
-	    r"^[a-f0-9]{32}$")
+        schema.assert_valid(self, self.validators['token'], token)
 
         if 'tenant' in token:
             self.assertEqual(token['tenant']['id'], self.config.tenantId)
 
     def check_user(self, user):
-        self.assertItemsEqual(
-            user,
-            (u'username', u'roles', u'roles_links', u'id', u'name')
-        )
-
-        self.assertEqual(user['roles_links'], [])
+        schema.assert_valid(self, self.validators['user'], user)
         self.assertEqual(user['username'], self.config.username)
 
-        self.assertRegexpMatches(user['id'], r"^[a-f0-9]{32}$")
-
-        # check the roles (if any)
-        for role in user['roles']:
-            self.assertIsInstance(role, dict)
-            self.assertItemsEqual(role, ['name'])
-
     def check_catalog(self, catalog):
-        if self.config.release == 'folsom' and not catalog:
-            return  # folsom is inconsistent with empty catalogs.
-
-        self.assertIsInstance(catalog, list)
-
-        for service in catalog:
-            self.assertIsInstance(service, dict)
-
-            self.assertItemsEqual(
-                service,
-                [u'endpoints_links', u'endpoints', u'type', u'name']
-            )
-            self.assertEqual(service['endpoints_links'], [])
-            self.assertIsInstance(service['endpoints'], list)
-            for endpoint in service['endpoints']:
-                self.assertItemsEqual(
-                    endpoint,
-                    [u'adminURL', u'publicURL',
-                        u'internalURL', u'region', u'id']
-                )
-
-                for url in u'publicURL', u'internalURL':  # u'adminURL'
-                    self.assertRegexpMatches(
-                        endpoint[url],
-                        r"^https?://([\d\.]+|[0-9a-z\.-]+\.[a-z\.]{2,6})(:\d+)?(/[A-Za-z0-9_\./]*)?$"
-                    )
+        schema.assert_valid(self, self.validators['catalog'], catalog)
 
     def test_unbound(self):
-        response = requests.post(self.config.url + 'v2.0/tokens',
-                                 data=json.dumps(self.base_auth),
-                                 headers={'content-type': 'application/json'}
-                                 )
+        response = keystone.issue_token(self.config.url, self.base_auth)
 
         self.check_headers(response.headers)
 
         token = response.json()
 
         # Check we got exactly the information one would expect from an unbound
-        # token.
-        self.assertItemsEqual(token, [u'access'])
-
-	
-        if self.config.release == 'icehouse':
-            self.assertItemsEqual(
-                token['access'],
-                [u'metadata', u'serviceCatalog', u'token', u'user'])
-        elif self.config.release == 'grizzly':
-            self.assertItemsEqual(
-                token['access'],
-                [u'token', u'user', u'serviceCatalog', u'metadata'])
-        else:
-            self.assertItemsEqual(
-                token['access'],
-                [u'token', u'user', u'serviceCatalog'])
-
-        self.check_token(token['access']['token'])
+        # token: an empty serviceCatalog, no tenant linked to the token and no
+        # roles.
+        schema.assert_valid(self, self.validators['unbound'], token)
         self.check_user(token['access']['user'])
-        self.check_catalog(token['access']['serviceCatalog'])
-
-        # Unbound tokens should have an empty serviceCatalog
-        self.assertFalse(token['access']['serviceCatalog'])
-
-        # Unbound tokens should not have a tenant linked to the token
-        self.assertNotIn('tenant', token['access']['token'])
-
-        # Unbound tokens should not provide any roles
-        self.assertEqual([], token['access']['user']['roles'])
 
     def test_with_tenantId(self):
         self.base_auth['auth']['tenantId'] = self.config.tenantId
-        response = requests.post(self.config.url + 'v2.0/tokens',
-                                 data=json.dumps(self.base_auth),
-                                 headers={'content-type': 'application/json'}
-                                 )
+        response = keystone.issue_token(self.config.url, self.base_auth)
 
         self.check_headers(response.headers)
 
         token = response.json()
 
-        # Check we got exactly the information one would expect from an unbound
+        # Check we got exactly the information one would expect from a scoped
         # token.
-        self.assertItemsEqual(token, [u'access'])
-
-        self.assertItemsEqual(
-            token['access'],
-            [u'token', u'user', u'serviceCatalog', u'metadata']
-        )
-
-        self.check_token(token['access']['token'])
+        schema.assert_valid(self, self.validators['scoped'], token)
         self.check_user(token['access']['user'])
-        self.check_catalog(token['access']['serviceCatalog'])
 
         self.assertEqual(
             token['access']['token']['tenant']['id'],
@@ -193,51 +67,28 @@ class Test(unittest2.TestCase):
 
     def test_with_tenantName(self):
         self.base_auth['auth']['tenantName'] = self.config.tenantName
-        response = requests.post(self.config.url + 'v2.0/tokens',
-                                 data=json.dumps(self.base_auth),
-                                 headers={'content-type': 'application/json'}
-                                 )
+        response = keystone.issue_token(self.config.url, self.base_auth)
 
         self.check_headers(response.headers)
 
         token = response.json()
 
-        # Check we got exactly the information one would expect from an unbound
+        # Check we got exactly the information one would expect from a scoped
         # token.
-        self.assertItemsEqual(token, [u'access'])
-
-        self.assertItemsEqual(
-            token['access'],
-            [u'token', u'user', u'serviceCatalog', u'metadata']
-        )
-
-        self.check_token(token['access']['token'])
+        schema.assert_valid(self, self.validators['scoped'], token)
         self.check_user(token['access']['user'])
-        self.check_catalog(token['access']['serviceCatalog'])
 
         self.assertEqual(
             token['access']['token']['tenant']['id'],
             self.config.tenantId)
 
     def test_with_unboundToken(self):
-        response = requests.post(self.config.url + 'v2.0/tokens',
-                                 data=json.dumps(self.base_auth),
-                                 headers={'content-type': 'application/json'}
-                                 )
+        response = keystone.issue_token(self.config.url, self.base_auth)
         token = response.json()
 
-        auth = {
-            'auth': {
-                'token': {
-                    'id': token['access']['token']['id']
-                }
-            }
-        }
-
-        response = requests.post(self.config.url + 'v2.0/tokens',
-                                 data=json.dumps(auth),
-                                 headers={'content-type': 'application/json'}
-                                 )
+        auth = keystone.token_auth(token['access']['token']['id'])
+
+        response = keystone.issue_token(self.config.url, auth)
         token = response.json()
 
         self.check_token(token['access']['token'])
@@ -248,10 +99,7 @@ class Test(unittest2.TestCase):
 
         auth['auth']['tenantName'] = self.config.tenantName
 
-        response = requests.post(self.config.url + 'v2.0/tokens',
-                                 data=json.dumps(auth),
-                                 headers={'content-type': 'application/json'}
-                                 )
+        response = keystone.issue_token(self.config.url, auth)
         token = response.json()
 
         self.check_token(token['access']['token'])
@@ -264,24 +112,12 @@ class Test(unittest2.TestCase):
 
     def test_with_boundToken(self):
         self.base_auth['auth']['tenantName'] = self.config.tenantName
-        response = requests.post(self.config.url + 'v2.0/tokens',
-                                 data=json.dumps(self.base_auth),
-                                 headers={'content-type': 'application/json'}
-                                 )
+        response = keystone.issue_token(self.config.url, self.base_auth)
         token = response.json()
 
-        auth = {
-            'auth': {
-                'token': {
-                    'id': token['access']['token']['id']
-                }
-            }
-        }
-
-        response = requests.post(self.config.url + 'v2.0/tokens',
-                                 data=json.dumps(auth),
-                                 headers={'content-type': 'application/json'}
-                                 )
+        auth = keystone.token_auth(token['access']['token']['id'])
+
+        response = keystone.issue_token(self.config.url, auth)
         token = response.json()
 
         self.check_token(token['access']['token'])
@@ -292,10 +128,7 @@ class Test(unittest2.TestCase):
 
         auth['auth']['tenantName'] = self.config.tenantName
 
-        response = requests.post(self.config.url + 'v2.0/tokens',
-                                 data=json.dumps(auth),
-                                 headers={'content-type': 'application/json'}
-                                 )
+        response = keystone.issue_token(self.config.url, auth)
         token = response.json()
 
         self.check_token(token['access']['token'])
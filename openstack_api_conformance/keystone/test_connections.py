@@ -0,0 +1,47 @@
+import openstack_api_conformance
+from openstack_api_conformance import connections
+from openstack_api_conformance import keystone
+
+import json
+import unittest2
+
+
+class Test(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        configuration = openstack_api_conformance.get_configuration()
+        cls.config = configuration['keystone']
+        cls.settings = connections.get_connections_config(configuration)
+
+    def setUp(self):
+        if not self.config:
+            self.skipTest("Keystone not configured")
+
+    def test_http11(self):
+        connection = connections.Connection(self.config.url)
+        try:
+            response, _ = connection.request('GET', self.config.url)
+        finally:
+            connection.close()
+
+        self.assertEqual(11, response.version)
+        self.assertFalse(connection.closed)
+
+    def test_keep_alive(self):
+        requests = int(self.settings['requests'])
+        self.assertEqual(requests, connections.keep_alive(self.config.url,
+                                                          requests=requests))
+
+    def test_unauthorized_keeps_connection(self):
+        auth = keystone.password_auth(self.config.username, 'wrong')
+        status, closed = connections.error_closes(
+            self.config.url, self.config.url + 'v2.0/tokens',
+            {'content-type': 'application/json'}, 'POST', json.dumps(auth))
+
+        self.assertEqual(401, status)
+        self.assertFalse(closed)
+
+    def test_idle(self):
+        self.assertTrue(connections.idle_survives(
+            self.config.url, float(self.settings['idle'])))
@@ -0,0 +1,38 @@
+import openstack_api_conformance
+from openstack_api_conformance import keystone
+from openstack_api_conformance import performance
+from openstack_api_conformance import results
+
+import requests
+import unittest2
+
+
+class Test(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        configuration = openstack_api_conformance.get_configuration()
+        cls.config = configuration['keystone']
+        cls.samples = int(
+            performance.get_performance_config(configuration).get('samples')
+            or 20)
+        results.save_on_exit()
+
+    def measure(self, operation, auth):
+        if not performance.get_budget(operation):
+            self.skipTest("no budget for %s" % operation)
+
+        session = requests.Session()
+        samples = []
+        for _ in range(self.samples):
+            with performance.RECORDER.measure(operation):
+                keystone.issue_token(self.config.url, auth, session)\
+                    .raise_for_status()
+            samples.append(performance.RECORDER.samples[operation][-1])
+
+        performance.assert_within_budget(self, operation, samples)
+
+    def test_token_issue(self):
+        self.measure('token_issue', keystone.password_auth(
+            self.config['username'], self.config['password'],
+            tenantId=self.config['tenantId']))
@@ -1,4 +1,5 @@
 import openstack_api_conformance
+from openstack_api_conformance import keystone
 
 import requests
 import unittest2
@@ -34,4 +35,4 @@ class Test(unittest2.TestCase):
 
         self.assertRegexpMatches(
             response.headers['X-Auth-Token'],
-            r"^[a-f0-9]{32}$")
+            keystone.token_pattern(self.config))
@@ -0,0 +1,178 @@
+from __future__ import print_function
+
+import argparse
+import json
+import sys
+import time
+
+import requests
+
+import openstack_api_conformance
+from openstack_api_conformance import keystone
+from openstack_api_conformance import performance
+from openstack_api_conformance import results
+from openstack_api_conformance.keystone import benchmark
+from openstack_api_conformance.keystone import revocation
+
+# Token and catalog size impact: for every configured user (see "users" in
+# keystone/benchmark.py) records the size of the token, the catalog and the
+# auth response, and measures swift HEAD and keystone validation latency with
+# that token. A second series pads the swift request headers to the given
+# sizes to show the cost of larger tokens independent of the provider.
+#
+#     "token_size": {
+#         "samples": 50,
+#         "padding": [0, 1024, 4096, 8192, 16384]
+#     }
+#
+# Validation needs admin_url and admin_token (or admin credentials) in the
+# keystone config, and is skipped without them.
+#
+#     python -m openstack_api_conformance.keystone.token_size
+
+DEFAULTS = {
+    'samples': 50,
+    'padding': [0, 1024, 4096, 8192, 16384],
+}
+
+
+def issue(config, user):
+    # scope by id when given, so both never end up in one request
+    tenantId = user.get('tenantId')
+    response = keystone.issue_token(
+        config.url,
+        keystone.password_auth(
+            user['username'], user['password'], tenantId=tenantId,
+            tenantName=None if tenantId else user.get('tenantName')))
+    response.raise_for_status()
+    return response
+
+
+def sizes(response):
+    token = response.json()
+    catalog = token['access']['serviceCatalog']
+    return {
+        'token_bytes': len(token['access']['token']['id']),
+        'catalog_bytes': len(json.dumps(catalog)),
+        'services': len(catalog),
+        'endpoints': sum(len(service['endpoints']) for service in catalog),
+        'response_bytes': len(response.content),
+    }
+
+
+def timed(samples, request):
+    measured = []
+    for _ in range(samples):
+        start = time.time()
+        request().raise_for_status()
+        measured.append(time.time() - start)
+    return measured
+
+
+def measure_user(config, user, admin, samples):
+    response = issue(config, user)
+    row = sizes(response)
+    token = response.json()
+    token_id = token['access']['token']['id']
+
+    session = requests.Session()
+    session.headers.update({'X-Auth-Token': token_id})
+    url = revocation.object_store(token)
+    row['swift'] = timed(samples, lambda: session.head(url))
+
+    if admin:
+        validate_url = (config.admin_url or config.url) + \
+            'v2.0/tokens/' + token_id
+        admin_session = requests.Session()
+        admin_session.headers.update({'X-Auth-Token': admin})
+        row['validate'] = timed(samples,
+                                lambda: admin_session.get(validate_url))
+
+    return row
+
+
+def measure_padding(config, padding, samples):
+    response = issue(config, config)
+    token = response.json()
+    session = requests.Session()
+    session.headers.update(
+        {'X-Auth-Token': token['access']['token']['id']})
+    url = revocation.object_store(token)
+
+    measured = []
+    for size in padding:
+        headers = {'X-Padding': 'x' * size} if size else {}
+        try:
+            measured.append((size, timed(
+                samples, lambda: session.head(url, headers=headers))))
+        except requests.HTTPError as e:
+            # proxies reject headers over their max_header_size
+            measured.append((size, e.response.status_code))
+    return measured
+
+
+def ms(samples, pct):
+    value = performance.percentile(samples or [], pct)
+    return '%9.1f' % (value * 1000) if value is not None else '%9s' % '-'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure the impact of token and catalog size.")
+    parser.add_argument('--samples', type=int)
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args(argv)
+
+    config = openstack_api_conformance.get_configuration()
+    settings = dict(DEFAULTS)
+    settings.update(config.token_size or {})
+    samples = args.samples or int(settings['samples'])
+
+    keystone_config = config['keystone']
+    admin = None
+    if keystone_config.admin_token or keystone_config.admin_username:
+        admin = revocation.admin_token(keystone_config)
+
+    recorder = performance.Recorder()
+    rows = [(user['username'],
+             measure_user(keystone_config, user, admin, samples))
+            for user in benchmark.get_users(keystone_config)]
+
+    print("%-16s %7s %8s %5s %6s %8s %9s %9s %9s %9s" % (
+        'user', 'token', 'catalog', 'svcs', 'endpts', 'response',
+        'swift p50', 'swift p90', 'valid p50', 'valid p90'))
+    for username, row in sorted(rows, key=lambda r: r[1]['token_bytes']):
+        print("%-16s %7i %8i %5i %6i %8i %s %s %s %s" % (
+            username[:16], row['token_bytes'], row['catalog_bytes'],
+            row['services'], row['endpoints'], row['response_bytes'],
+            ms(row['swift'], 50), ms(row['swift'], 90),
+            ms(row.get('validate'), 50), ms(row.get('validate'), 90)))
+
+        for sample in row['swift']:
+            recorder.add('swift_head@token%i' % row['token_bytes'], sample)
+        for sample in row.get('validate') or []:
+            recorder.add('validate@token%i' % row['token_bytes'], sample)
+
+    print()
+    print("%-16s %9s %9s %9s" % ('header padding', 'p50 ms', 'p90 ms',
+                                 'p99 ms'))
+    for size, measured in measure_padding(
+            keystone_config, settings['padding'], samples):
+        if not isinstance(measured, list):
+            print("%-16i rejected with status %i" % (size, measured))
+            continue
+
+        print("%-16i %s %s %s" % (size, ms(measured, 50), ms(measured, 90),
+                                  ms(measured, 99)))
+        for sample in measured:
+            recorder.add('swift_head@padding%i' % size, sample)
+
+    if not args.no_save:
+        recorder.finished = time.time()
+        results.save(recorder, config, kind='token-size')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
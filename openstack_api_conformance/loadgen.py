@@ -0,0 +1,392 @@
+from __future__ import print_function
+
+import argparse
+import bisect
+import multiprocessing
+import random
+import sys
+import threading
+import time
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+import openstack_api_conformance
+from openstack_api_conformance import operations
+from openstack_api_conformance import performance
+from openstack_api_conformance import results
+from openstack_api_conformance import sampling
+from openstack_api_conformance import schema
+from openstack_api_conformance import swift
+
+# Load generator running a weighted mix of the operations in operations.py.
+#
+#     "load": {
+#         "mode": "closed",
+#         "concurrency": 16,
+#         "rate": 200,
+#         "processes": 4,
+#         "duration": 60,
+#         "object_size": 4096,
+#         "mix": {"object_get": 10, "object_put": 2, "token_issue": 1},
+#         "validate": true
+#     }
+#
+# closed: every process keeps `concurrency` requests in flight.
+# open:   the processes together start `rate` requests per second, whatever
+#         the response times are; latency is measured from the intended
+#         start so a slow server can't hide queueing (coordinated omission).
+#
+# With validate, responses are checked against the schema of the configured
+# release, all of them or a sample (see sampling.py); mismatches count as
+# errors and are listed by reason.
+#
+#     python -m openstack_api_conformance.loadgen --mode open --rate 500
+
+DEFAULTS = {
+    'mode': 'closed',
+    'concurrency': 8,
+    'rate': 50,
+    'processes': 1,
+    'duration': 30,
+    'object_size': 4096,
+    'mix': {'object_get': 1},
+    'validate': True,
+}
+
+
+def get_load_config(config=None, **overrides):
+    if config is None:
+        config = openstack_api_conformance.get_configuration()
+
+    load = dict(DEFAULTS)
+    load.update(config.load or {})
+    load.update((k, v) for k, v in overrides.items() if v is not None)
+
+    unknown = set(load['mix']) - set(operations.OPERATIONS)
+    if unknown:
+        raise ValueError("unknown operations in mix: %s" %
+                         ", ".join(sorted(unknown)))
+
+    return load
+
+
+class Mix(object):
+    """Weighted random choice of operation names."""
+
+    def __init__(self, weights, rng=None):
+        self.names = sorted(weights)
+        self.cumulative = []
+        total = 0.0
+        for name in self.names:
+            total += weights[name]
+            self.cumulative.append(total)
+        self.total = total
+        self.rng = rng or random.Random()
+
+    def choose(self):
+        return self.names[bisect.bisect_right(
+            self.cumulative, self.rng.random() * self.total)]
+
+
+def _execute(ctx, name, sampler, recorder, start):
+    try:
+        response, ok = operations.execute(name, ctx)
+    except Exception:
+        recorder.add(name, time.time() - start, False)
+        return
+
+    seconds = time.time() - start
+    if sampler is not None:
+        try:
+            sampler.check(name, response, ok, seconds)
+        except schema.Invalid as e:
+            recorder.add_mismatch(name, str(e))
+            return
+    recorder.add(name, seconds, ok)
+
+
+def _closed_loop(ctx, mix, sampler, recorder, deadline, stop):
+    while not stop.is_set() and time.time() < deadline:
+        _execute(ctx, mix.choose(), sampler, recorder, time.time())
+
+
+def _open_loop(ctx, mix, sampler, recorder, jobs, stop):
+    while True:
+        intended = jobs.get()
+        if intended is None or stop.is_set():
+            return
+
+        _execute(ctx, mix.choose(), sampler, recorder, intended)
+
+
+def _heartbeat(fixture, done):
+    while not done.wait(swift.HEARTBEAT_INTERVAL):
+        operations.heartbeat(fixture)
+
+
+def run_process(fixture, load, seed, stop=None, recorder=None, config=None):
+    """
+    Runs one process worth of load, returns its Recorder. A recorder can be
+    passed in to watch the run from another thread.
+    """
+    if config is None:
+        config = openstack_api_conformance.get_configuration()
+    recorder = recorder or performance.Recorder()
+    # created here, compiled validators don't pickle
+    sampler = None
+    if load['validate']:
+        validation = sampling.get_validation_config(load)
+        sampler = sampling.Sampler(
+            operations.validators(config), validation['every'],
+            float(validation['slow']), validation['cpu_share'])
+
+    stop = stop or threading.Event()
+    deadline = time.time() + load['duration']
+    concurrency = int(load['concurrency'])
+
+    def context(i):
+        rng = random.Random(seed * 1000 + i)
+        return (operations.Context(config['swift'], fixture, rng),
+                Mix(load['mix'], rng), sampler)
+
+    if load['mode'] == 'open':
+        jobs = queue.Queue()
+        threads = [
+            threading.Thread(target=_open_loop,
+                             args=context(i) + (recorder, jobs, stop))
+            for i in range(concurrency)]
+    else:
+        threads = [
+            threading.Thread(target=_closed_loop,
+                             args=context(i) + (recorder, deadline, stop))
+            for i in range(concurrency)]
+
+    # keeps the sweeper off the fixture of a long run
+    done = threading.Event()
+    beating = threading.Thread(target=_heartbeat, args=(fixture, done))
+    for thread in threads + [beating]:
+        thread.daemon = True
+        thread.start()
+
+    if load['mode'] == 'open':
+        interval = float(load['processes']) / load['rate']
+        intended = time.time()
+        while intended < deadline and not stop.is_set():
+            now = time.time()
+            if intended > now:
+                time.sleep(intended - now)
+            jobs.put(intended)
+            intended += interval
+
+        for thread in threads:
+            jobs.put(None)
+
+    for thread in threads:
+        thread.join()
+    done.set()
+
+    recorder.finished = time.time()
+    if sampler is not None:
+        recorder.validated.update(sampler.validated)
+    return recorder
+
+
+def _run_process(args):
+    return run_process(*args)
+
+
+def merge(recorders):
+    merged = performance.Recorder()
+    for recorder in recorders:
+        merged.merge(recorder)
+    return merged
+
+
+def run(load, config=None, fixture=None):
+    """
+    Sets up the fixture, runs the load and returns the merged Recorder. A
+    fixture passed in is used, and left in place, instead.
+    """
+    if config is None:
+        config = openstack_api_conformance.get_configuration()
+
+    own_fixture = fixture is None
+    if own_fixture:
+        fixture = operations.setup_fixture(config['swift'],
+                                           int(load['object_size']))
+    try:
+        processes = int(load['processes'])
+        if processes == 1:
+            recorders = [run_process(fixture, load, 0, config=config)]
+        else:
+            pool = multiprocessing.Pool(processes)
+            try:
+                recorders = pool.map(
+                    _run_process,
+                    [(fixture, load, i, None, None, config)
+                     for i in range(processes)])
+            finally:
+                pool.close()
+                pool.join()
+    finally:
+        if own_fixture:
+            operations.cleanup_fixture(fixture)
+
+    return merge(recorders)
+
+
+def _background_process(fixture, load, seed, stop, recorders, config):
+    recorders.put(run_process(fixture, load, seed, stop, config=config))
+
+
+class Background(object):
+    """
+    Runs the load in separate processes until stopped, so something else can
+    run against the cluster at the same time.
+    """
+
+    def __init__(self, load, config=None):
+        self.load = dict(load, duration=float('inf'))
+        self.config = config or openstack_api_conformance.get_configuration()
+        self.fixture = None
+        self.processes = []
+
+    def start(self):
+        self.fixture = operations.setup_fixture(
+            self.config['swift'], int(self.load['object_size']))
+        self.stop_event = multiprocessing.Event()
+        self.recorders = multiprocessing.Queue()
+        self.processes = [
+            multiprocessing.Process(
+                target=_background_process,
+                args=(self.fixture, self.load, i, self.stop_event,
+                      self.recorders, self.config))
+            for i in range(int(self.load['processes']))]
+
+        for process in self.processes:
+            process.daemon = True
+            process.start()
+
+    def stop(self):
+        """Stops the load, returns the merged Recorder."""
+        self.stop_event.set()
+        try:
+            recorders = self.collect()
+            for process in self.processes:
+                process.join()
+        finally:
+            operations.cleanup_fixture(self.fixture)
+
+        return merge(recorders)
+
+    def collect(self, poll=1.0):
+        """
+        The recorder of every process; raises RuntimeError when one exits
+        without sending it.
+        """
+        recorders = []
+        while len(recorders) < len(self.processes):
+            try:
+                recorders.append(self.recorders.get(timeout=poll))
+                continue
+            except queue.Empty:
+                pass
+
+            failed = [process for process in self.processes
+                      if process.exitcode not in (None, 0)]
+            if failed:
+                raise RuntimeError("load process %i exited with %i" % (
+                    failed[0].pid, failed[0].exitcode))
+            if not any(process.is_alive() for process in self.processes):
+                # all exited cleanly; what they sent is in the queue by now
+                try:
+                    recorders.append(self.recorders.get(timeout=poll))
+                except queue.Empty:
+                    raise RuntimeError(
+                        "%i of %i load processes sent no results" % (
+                            len(self.processes) - len(recorders),
+                            len(self.processes)))
+        return recorders
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.recorder = self.stop()
+
+
+def format_summary(summary):
+    lines = ["%-18s %8s %7s %9s %9s %9s %9s %9s" % (
+        'operation', 'count', 'errors', 'req/s', 'p50 ms', 'p90 ms',
+        'p99 ms', 'max ms')]
+
+    def ms(value):
+        return value * 1000 if value is not None else float('nan')
+
+    for name in sorted(summary):
+        row = summary[name]
+        lines.append("%-18s %8i %7i %9.1f %9.1f %9.1f %9.1f %9.1f" % (
+            name, row['count'], row['errors'], row['throughput'],
+            ms(row['p50']), ms(row['p90']), ms(row['p99']), ms(row['max'])))
+
+    return "\n".join(lines)
+
+
+def format_mismatches(recorder, top=5):
+    """The most frequent schema mismatches per operation."""
+    lines = []
+    for name in sorted(recorder.mismatches):
+        for reason, count in recorder.mismatches[name].most_common(top):
+            lines.append("%-18s %8i  %s" % (name, count, reason))
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate load from the conformance request definitions.")
+    parser.add_argument('--mode', choices=('open', 'closed'))
+    parser.add_argument('--rate', type=float,
+                        help="requests per second over all processes (open)")
+    parser.add_argument('--concurrency', type=int,
+                        help="threads per process")
+    parser.add_argument('--processes', type=int)
+    parser.add_argument('--duration', type=float, help="seconds")
+    parser.add_argument('--no-validate', action='store_true',
+                        help="don't check responses against their schema")
+    parser.add_argument('--no-save', action='store_true',
+                        help="don't store the results")
+    args = parser.parse_args(argv)
+
+    config = openstack_api_conformance.get_configuration()
+    load = get_load_config(config,
+                           mode=args.mode, rate=args.rate,
+                           concurrency=args.concurrency,
+                           processes=args.processes, duration=args.duration,
+                           validate=False if args.no_validate else None)
+
+    recorder = run(load, config)
+    print(format_summary(recorder.summary()))
+    if load['validate']:
+        print()
+        print("validated %i of %i responses" % (
+            sum(recorder.validated.values()),
+            sum(len(s) for s in recorder.samples.values()) +
+            sum(recorder.errors.values())))
+    if any(recorder.mismatches.values()):
+        print()
+        print("schema mismatches")
+        print(format_mismatches(recorder))
+
+    if not args.no_save:
+        results.save(recorder, config, kind='load-%s' % load['mode'])
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,236 @@
+import random
+import requests
+import time
+import uuid
+
+import openstack_api_conformance
+from openstack_api_conformance import keystone
+from openstack_api_conformance import payload
+from openstack_api_conformance import swift
+from openstack_api_conformance.keystone import schemas as keystone_schemas
+from openstack_api_conformance.swift import schemas as swift_schemas
+
+# Request definitions for load generation, built from the same helpers the
+# conformance tests use. Every operation takes a Context and returns the
+# response; a response with an unexpected status counts as an error. The
+# schemas responses should match are in keystone/schemas.py and
+# swift/schemas.py.
+#
+# The fixture is a single container, set up for every middleware the
+# operations exercise (TempURL, CORS, StaticWeb, public read), holding a seed
+# object and a bounded pool of names object_put writes to.
+
+OPERATIONS = {}
+
+# number of distinct names object_put/object_delete cycle through
+OBJECT_POOL = 100
+
+CORS_ORIGIN = 'http://www.foo.com'
+
+
+def operation(name, *expected):
+    def register(function):
+        OPERATIONS[name] = (function, frozenset(expected))
+        return function
+    return register
+
+
+class Context(object):
+    """Per thread state: an authenticated session and the fixture."""
+
+    def __init__(self, config, fixture, rng=None):
+        self.config = config
+        self.fixture = fixture
+        self.rng = rng or random.Random()
+        self.session = requests.Session()
+        self.session.headers.update({'X-Auth-Token': fixture['token']})
+        self.anonymous = requests.Session()
+        self.payload = payload.Payload(fixture['object_size'],
+                                       fixture['container'])
+
+    @property
+    def url(self):
+        return self.fixture['url']
+
+    @property
+    def c_url(self):
+        return self.fixture['url'] + '/' + self.fixture['container']
+
+    def pool_name(self):
+        return 'put-%i' % self.rng.randrange(OBJECT_POOL)
+
+
+def setup_fixture(config, object_size=4096):
+    """Creates the load container; returns a picklable fixture dict."""
+    token_id, url = swift.authenticate(config)
+    session = requests.Session()
+    session.headers.update({'X-Auth-Token': token_id})
+
+    response = session.get(url + '/')
+    key = response.headers.get('X-Account-Meta-Temp-URL-Key')
+    if not key:
+        key = str(uuid.uuid4())
+        session.post(url + '/',
+                     headers={'X-Account-Meta-Temp-URL-Key': key}
+                     ).raise_for_status()
+
+    container = 'load-' + uuid.uuid4().hex
+    c_url = url + '/' + container
+    session.put(c_url, headers=swift.heartbeat({
+        'X-Container-Read': '.r:*,.rlistings',
+        'X-Container-Meta-Web-Index': 'index.html',
+        'X-Container-Meta-Access-Control-Allow-Origin': CORS_ORIGIN,
+    })).raise_for_status()
+
+    seed = payload.Payload(object_size, container)
+    session.put(c_url + '/seed', data=seed.open(),
+                headers=swift.expiring(config)).raise_for_status()
+    session.put(c_url + '/index.html', data="<!-- meh -->",
+                headers=swift.expiring(config, {"content-type": "text/html"})
+                ).raise_for_status()
+
+    return {
+        'token': token_id,
+        'url': url,
+        'container': container,
+        'key': key,
+        'object_size': object_size,
+    }
+
+
+def heartbeat(fixture):
+    """Refreshes the fixture container's heartbeat, for the sweeper."""
+    session = requests.Session()
+    session.headers.update({'X-Auth-Token': fixture['token']})
+    try:
+        session.post(fixture['url'] + '/' + fixture['container'],
+                     headers=swift.heartbeat())
+    except requests.RequestException:
+        pass
+
+
+def cleanup_fixture(fixture):
+    session = requests.Session()
+    session.headers.update({'X-Auth-Token': fixture['token']})
+    c_url = fixture['url'] + '/' + fixture['container']
+
+    names = ['seed', 'index.html'] + \
+        ['put-%i' % i for i in range(OBJECT_POOL)]
+    response = session.get(c_url, headers={'accept': 'application/json'})
+    if response.ok:
+        names = set(names) | set(obj['name'] for obj in response.json())
+
+    for name in names:
+        session.delete(c_url + '/' + name)
+    session.delete(c_url)
+
+
+@operation('token_issue', 200)
+def token_issue(ctx):
+    return keystone.issue_token(
+        ctx.config.auth_url,
+        keystone.password_auth(ctx.config['username'],
+                               ctx.config['password'],
+                               tenantId=ctx.config['tenantId']),
+        ctx.session)
+
+
+@operation('account_get', 200, 204)
+def account_get(ctx):
+    return ctx.session.get(ctx.url, headers={'accept': 'application/json'})
+
+
+@operation('container_get', 200)
+def container_get(ctx):
+    return ctx.session.get(ctx.c_url, headers={'accept': 'application/json'})
+
+
+@operation('container_head', 204)
+def container_head(ctx):
+    return ctx.session.head(ctx.c_url)
+
+
+@operation('object_put', 201)
+def object_put(ctx):
+    return ctx.session.put(ctx.c_url + '/' + ctx.pool_name(),
+                           data=ctx.payload.open())
+
+
+@operation('object_get', 200)
+def object_get(ctx):
+    return ctx.session.get(ctx.c_url + '/seed')
+
+
+@operation('object_delete', 204, 404)
+def object_delete(ctx):
+    return ctx.session.delete(ctx.c_url + '/' + ctx.pool_name())
+
+
+@operation('tempurl_get', 200)
+def tempurl_get(ctx):
+    o_url = ctx.c_url + '/seed'
+    return ctx.anonymous.get(swift.tempurl(
+        o_url, o_url[len(ctx.url):], ctx.fixture['key'],
+        int(time.time() + 60)))
+
+
+@operation('formpost', 303)
+def formpost(ctx):
+    data = swift.formpost_fields(
+        ctx.fixture['key'], ctx.c_url[len(ctx.url):], 'http://example.net/',
+        104857600, 1, int(time.time() + 600))
+
+    return ctx.anonymous.post(
+        ctx.c_url,
+        files={"file": (ctx.pool_name(), ctx.payload.open())},
+        data=data,
+        allow_redirects=False)
+
+
+@operation('cors_preflight', 200)
+def cors_preflight(ctx):
+    return ctx.anonymous.options(ctx.c_url + '/seed', headers={
+        'Origin': CORS_ORIGIN,
+        'Access-Control-Request-Method': 'GET',
+    })
+
+
+@operation('staticweb_index', 200)
+def staticweb_index(ctx):
+    return ctx.anonymous.get(ctx.c_url + '/')
+
+
+@operation('s3_put', 200)
+def s3_put(ctx):
+    url = ctx.config['s3_base'] + '/%s/%s' % (
+        ctx.fixture['container'], ctx.pool_name())
+    headers = {}
+    swift.sign_headers('PUT', '/' + url.split('/', 3)[-1], headers,
+                       config=ctx.config)
+    return ctx.anonymous.put(url, headers=headers, data=ctx.payload.open())
+
+
+def validators(config):
+    """
+    The compiled response schemas of the operations, as {name: (validator
+    for expected responses, validator for error responses)}.
+    """
+    swift_validators = swift_schemas.for_config(config)
+    keystone_validators = keystone_schemas.validators(
+        config.keystone or openstack_api_conformance.AttributeDict())
+
+    found = {}
+    for name in OPERATIONS:
+        if name == 'token_issue':
+            found[name] = (keystone_validators[name],
+                           keystone_validators['error'])
+        elif name in swift_validators:
+            found[name] = (swift_validators[name], swift_validators['error'])
+    return found
+
+
+def execute(name, ctx):
+    """Runs an operation, returns (response, ok)."""
+    function, expected = OPERATIONS[name]
+    response = function(ctx)
+    return response, response.status_code in expected
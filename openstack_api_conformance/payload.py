@@ -0,0 +1,168 @@
+from __future__ import print_function
+
+import argparse
+import binascii
+import hashlib
+import random
+import sys
+import time
+
+# Seeded pseudo-random payloads of any size, never held in memory as a whole.
+# Block i of a payload is a slice of a random pool shared by all payloads with
+# the same seed, at an offset derived from the seed and i, so any byte range
+# can be regenerated for GET verification without generating what comes
+# before it. Generating costs a slice per block; the MD5 of a whole payload
+# is computed once per (seed, size) and cached.
+#
+#     data = payload.Payload(100 * 1024 * 1024, seed='slo')
+#     session.put(url, data=data.open())
+#     self.assertEqual(data.md5(), response.headers['etag'])
+#     self.assertEqual(data.read_range(1000, 2000), ranged.content)
+#
+#     python -m openstack_api_conformance.payload --size 1073741824
+
+BLOCK = 64 * 1024
+
+# distinct block offsets per seed, the pool is POOL + BLOCK bytes
+POOL = 1024 * 1024
+
+# pools kept in memory, for tests using a seed per object
+MAX_POOLS = 64
+
+_pools = {}
+_md5s = {}
+
+
+def _seed(seed):
+    """The same integer for the same seed, on every Python version."""
+    return int(hashlib.md5(str(seed).encode('utf-8')).hexdigest(), 16)
+
+
+def _pool(seed):
+    if seed not in _pools:
+        if len(_pools) >= MAX_POOLS:
+            _pools.clear()
+        rng = random.Random(_seed(seed))
+        size = POOL + BLOCK
+        _pools[seed] = binascii.unhexlify(
+            '%0*x' % (size * 2, rng.getrandbits(size * 8)))
+    return _pools[seed]
+
+
+class Payload(object):
+    """`size` bytes determined by `seed`; cheap to create and to share."""
+
+    def __init__(self, size, seed=0):
+        self.size = int(size)
+        self.seed = seed
+        self.pool = _pool(seed)
+        self.key = _seed(seed)
+
+    def __len__(self):
+        return self.size
+
+    def __repr__(self):
+        return 'Payload(%i, seed=%r)' % (self.size, self.seed)
+
+    def block(self, index):
+        offset = (self.key + index * 2654435761) % POOL
+        return self.pool[offset:offset + BLOCK]
+
+    def chunks(self, start=0, end=None, chunk=BLOCK):
+        """Yields the bytes of [start, end) in pieces of at most `chunk`."""
+        end = self.size if end is None else min(end, self.size)
+        while start < end:
+            index, offset = divmod(start, BLOCK)
+            stop = min(BLOCK, offset + chunk, end - index * BLOCK)
+            yield self.block(index)[offset:stop]
+            start += stop - offset
+
+    def read_range(self, start, end=None):
+        """The bytes of [start, end), as HTTP Range bytes=start-(end - 1)."""
+        return b''.join(self.chunks(start, end))
+
+    def md5(self, start=0, end=None):
+        """The hex MD5 of [start, end); for the whole payload the ETag."""
+        end = self.size if end is None else min(end, self.size)
+        key = (self.seed, start, end)
+        if key not in _md5s:
+            md5 = hashlib.md5()
+            for chunk in self.chunks(start, end):
+                md5.update(chunk)
+            _md5s[key] = md5.hexdigest()
+        return _md5s[key]
+
+    def mismatch(self, data, start=0):
+        """The offset of the first byte of data differing from the payload
+        at `start`, or None if it matches and is as long."""
+        expected = self.read_range(start, start + len(data))
+        if expected == data:
+            return None
+        for i, (a, b) in enumerate(zip(expected, data)):
+            if a != b:
+                return start + i
+        return start + min(len(expected), len(data))
+
+    def open(self, start=0, end=None):
+        """A file-like Reader for request bodies, one per request."""
+        return Reader(self, start, end)
+
+
+class Reader(object):
+    """
+    Streams a payload range as a request body with a Content-Length; `md5`
+    is updated with every read so the ETag of an upload is known when it is
+    done.
+    """
+
+    def __init__(self, payload, start=0, end=None):
+        self.payload = payload
+        self.start = start
+        self.position = start
+        self.end = payload.size if end is None else min(end, payload.size)
+        self.md5 = hashlib.md5()
+
+    def __len__(self):
+        return self.end - self.position
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.end - self.position
+        end = min(self.position + size, self.end)
+        data = self.payload.read_range(self.position, end)
+        self.position = end
+        self.md5.update(data)
+        return data
+
+    def __iter__(self):
+        for chunk in self.payload.chunks(self.position, self.end):
+            self.position += len(chunk)
+            self.md5.update(chunk)
+            yield chunk
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure payload generation and MD5 throughput.")
+    parser.add_argument('--size', type=int, default=256 * 1024 * 1024,
+                        help="bytes")
+    parser.add_argument('--seed', default='0')
+    args = parser.parse_args(argv)
+
+    data = Payload(args.size, args.seed)
+
+    for name, consume in (
+            ('generate', lambda chunk: None),
+            ('generate+md5', hashlib.md5().update)):
+        start = time.time()
+        for chunk in data.chunks():
+            consume(chunk)
+        seconds = time.time() - start
+        print("%-14s %10.1f MiB/s" % (
+            name, args.size / 1048576.0 / max(seconds, 1e-9)))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
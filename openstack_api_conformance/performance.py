@@ -0,0 +1,263 @@
+import collections
+import contextlib
+import math
+import threading
+import time
+
+# Latency measurement and budget (SLO) checking.
+#
+# Budgets live in the "performance" section of .testconfig, keyed by
+# operation name, with limits in milliseconds per percentile:
+#
+#     "performance": {
+#         "samples": 20,
+#         "budgets": {
+#             "token_issue": {"p99": 300},
+#             "container_get": {"max": 1000, "objects": 10000}
+#         }
+#     }
+
+PERCENTILES = {
+    'p50': 50,
+    'p90': 90,
+    'p95': 95,
+    'p99': 99,
+    'p999': 99.9,
+    'max': 100,
+}
+
+# number of offending samples included in a failure message
+MAX_REPORTED_SAMPLES = 10
+
+
+class Recorder(object):
+
+    def __init__(self):
+        self.samples = collections.defaultdict(list)
+        self.errors = collections.defaultdict(int)
+        self.started = time.time()
+        self.finished = None
+        # per operation wall time, for recorders combining separate runs
+        self.durations = {}
+        # per operation {reason: count} of responses not matching their schema
+        self.mismatches = collections.defaultdict(collections.Counter)
+        # per operation number of responses checked against their schema
+        self.validated = collections.Counter()
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def measure(self, operation):
+        start = time.time()
+        try:
+            yield
+        except Exception:
+            self.errors[operation] += 1
+            raise
+        self.samples[operation].append(time.time() - start)
+
+    def add(self, operation, seconds, ok=True):
+        with self.lock:
+            if ok:
+                self.samples[operation].append(seconds)
+            else:
+                self.errors[operation] += 1
+
+    def add_mismatch(self, operation, reason):
+        """Counts a response that didn't match its schema as an error."""
+        with self.lock:
+            self.errors[operation] += 1
+            self.mismatches[operation][reason] += 1
+
+    def merge(self, other):
+        self.started = min(self.started, other.started)
+        if other.finished:
+            self.finished = max(self.finished or 0, other.finished)
+        for operation, samples in other.samples.items():
+            self.samples[operation].extend(samples)
+        for operation, errors in other.errors.items():
+            self.errors[operation] += errors
+        self.validated.update(other.validated)
+        for operation, reasons in other.mismatches.items():
+            self.mismatches[operation].update(reasons)
+        for operation, duration in other.durations.items():
+            self.durations[operation] = max(
+                self.durations.get(operation, 0), duration)
+
+    def drain(self):
+        """
+        Returns a Recorder with what was recorded since the last drain (or
+        the start) and clears it here, for streaming a running measurement.
+        """
+        drained = Recorder()
+        with self.lock:
+            drained.started = getattr(self, 'drained', self.started)
+            drained.finished = self.drained = time.time()
+            drained.samples, self.samples = \
+                self.samples, collections.defaultdict(list)
+            drained.errors, self.errors = \
+                self.errors, collections.defaultdict(int)
+            drained.mismatches, self.mismatches = \
+                self.mismatches, collections.defaultdict(collections.Counter)
+            drained.validated, self.validated = \
+                self.validated, collections.Counter()
+        return drained
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def summary(self):
+        elapsed = max((self.finished or time.time()) - self.started, 1e-9)
+        result = {}
+        for operation in set(self.samples) | set(self.errors):
+            samples = self.samples[operation]
+            result[operation] = dict(
+                count=len(samples),
+                errors=self.errors[operation],
+                mismatches=sum(self.mismatches.get(operation, {}).values()),
+                throughput=len(samples) / self.durations.get(operation,
+                                                             elapsed),
+                **dict((name, percentile(samples, pct))
+                       for name, pct in PERCENTILES.items())
+            )
+        return result
+
+
+# recorder shared by everything measured during one test run
+RECORDER = Recorder()
+
+
+class Histogram(object):
+    """
+    Latency counts in buckets growing by 1%, so percentiles are within 1% of
+    the exact ones. Unlike samples, histograms stay small and merge cheaply,
+    for combining measurements of many processes or machines.
+    """
+
+    GROWTH = 1.01
+    # smallest distinguished latency, in seconds
+    RESOLUTION = 1e-6
+
+    def __init__(self, counts=None):
+        self.counts = collections.Counter(counts or {})
+
+    @classmethod
+    def from_samples(cls, samples):
+        histogram = cls()
+        for seconds in samples:
+            histogram.add(seconds)
+        return histogram
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(dict((int(index), count)
+                        for index, count in data.items()))
+
+    def to_dict(self):
+        return dict((str(index), count)
+                    for index, count in self.counts.items())
+
+    def add(self, seconds, count=1):
+        index = int(math.log(max(seconds, self.RESOLUTION) / self.RESOLUTION,
+                             self.GROWTH))
+        self.counts[index] += count
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+
+    def value(self, index):
+        """The middle of a bucket."""
+        return self.RESOLUTION * self.GROWTH ** (index + 0.5)
+
+    def __len__(self):
+        return sum(self.counts.values())
+
+    def percentile(self, pct):
+        """Nearest-rank percentile, None if the histogram is empty."""
+        total = len(self)
+        if not total:
+            return None
+
+        rank = min(max(int(-(-total * pct // 100)), 1), total)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return self.value(index)
+
+    def samples(self):
+        """Approximate samples, the middle of their bucket."""
+        for index in sorted(self.counts):
+            for _ in range(self.counts[index]):
+                yield self.value(index)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of samples, None if there are none."""
+    if not samples:
+        return None
+
+    ordered = sorted(samples)
+    rank = int(-(-len(ordered) * pct // 100))  # ceil
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+def get_performance_config(config=None):
+    if config is None:
+        import openstack_api_conformance
+        config = openstack_api_conformance.get_configuration()
+
+    return config.performance or {}
+
+
+def get_budget(operation, config=None):
+    budgets = get_performance_config(config).get('budgets') or {}
+    return budgets.get(operation)
+
+
+def check_budget(samples, budget):
+    """
+    Compares samples (seconds) with a budget (milliseconds per percentile)
+    and returns a list of (percentile, limit, measured, offending samples)
+    for every percentile that is over budget.
+    """
+    violations = []
+    for name, limit in sorted(budget.items()):
+        if name not in PERCENTILES:
+            continue
+
+        measured = percentile(samples, PERCENTILES[name])
+        if measured is None or measured * 1000 <= limit:
+            continue
+
+        offending = sorted(
+            (s for s in samples if s * 1000 > limit), reverse=True)
+        violations.append((name, limit, measured, offending))
+
+    return violations
+
+
+def format_violations(operation, samples, violations):
+    lines = ["%s over budget (%i samples):" % (operation, len(samples))]
+    for name, limit, measured, offending in violations:
+        lines.append("  %s: %.1f ms > %s ms, %i offending samples: %s" % (
+            name, measured * 1000, limit, len(offending),
+            ", ".join("%.1f" % (s * 1000)
+                      for s in offending[:MAX_REPORTED_SAMPLES])))
+
+    return "\n".join(lines)
+
+
+def assert_within_budget(testcase, operation, samples, config=None):
+    budget = get_budget(operation, config)
+    if not budget:
+        return
+
+    violations = check_budget(samples, budget)
+    if violations:
+        testcase.fail(format_violations(operation, samples, violations))
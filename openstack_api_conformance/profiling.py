@@ -0,0 +1,225 @@
+from __future__ import print_function
+
+import argparse
+import collections
+import os
+import sys
+import threading
+import time
+
+import unittest2
+
+# Profiling mode: runs the suite (or the given tests) under a deterministic
+# profiler and attributes the wall time of every test to one of three
+# buckets:
+#
+#  - fixture: anything below setUp/tearDown/setUpClass/tearDownClass
+#  - network: blocked in socket, SSL or DNS calls
+#  - cpu:     everything else, i.e. the client side cost of the suite
+#             (JSON/XML parsing, signing, assertions)
+#
+#     python -m openstack_api_conformance.profiling [--folded out.txt] \
+#         [openstack_api_conformance.keystone.test_authenticate ...]
+#
+# The profiler itself adds overhead to every python call, so the cpu bucket
+# is an upper bound.
+
+FIXTURE_NAMES = frozenset([
+    'setUp', 'tearDown', 'setUpClass', 'tearDownClass',
+    'setUpModule', 'tearDownModule',
+])
+
+NETWORK_MODULES = frozenset(['_socket', 'socket', '_ssl', 'ssl', 'select'])
+
+NETWORK_CALLS = frozenset([
+    'recv', 'recv_into', 'recvfrom', 'recvfrom_into', 'send', 'sendall',
+    'connect', 'connect_ex', 'getaddrinfo', 'gethostbyname', 'do_handshake',
+    'read', 'write', 'select', 'poll',
+])
+
+BUCKETS = ('cpu', 'network', 'fixture')
+
+
+def is_network_call(function):
+    if function.__name__ not in NETWORK_CALLS:
+        return False
+
+    owner = getattr(function, '__self__', None)
+    module = getattr(function, '__module__', None) or \
+        type(owner).__module__
+    return module in NETWORK_MODULES
+
+
+def label(code):
+    return "%s:%s(%s)" % (
+        os.path.basename(code.co_filename), code.co_firstlineno, code.co_name)
+
+
+class BucketProfiler(object):
+
+    def __init__(self, folded=False):
+        self.times = collections.defaultdict(
+            lambda: dict((bucket, 0.0) for bucket in BUCKETS))
+        self.functions = collections.defaultdict(float)
+        self.stacks = collections.defaultdict(float) if folded else None
+        self.test = None
+        self.fixture_key = None
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def _state(self):
+        state = self.local.__dict__
+        if 'last' not in state:
+            state.update(last=time.time(), fixtures=[], network=0,
+                         running='<idle>', stack=[])
+        return state
+
+    def key(self):
+        return self.test or self.fixture_key or '<suite>'
+
+    def __call__(self, frame, event, arg):
+        now = time.time()
+        state = self._state()
+        elapsed = now - state['last']
+
+        if state['fixtures']:
+            bucket = 'fixture'
+        elif state['network']:
+            bucket = 'network'
+        else:
+            bucket = 'cpu'
+
+        with self.lock:
+            self.times[self.key()][bucket] += elapsed
+            if bucket == 'cpu':
+                self.functions[state['running']] += elapsed
+            if self.stacks is not None:
+                self.stacks[';'.join(state['stack'])] += elapsed
+
+        if event == 'call':
+            code = frame.f_code
+            if code.co_name in FIXTURE_NAMES:
+                state['fixtures'].append(frame)
+                if self.test is None:
+                    owner = frame.f_locals.get('cls') or \
+                        type(frame.f_locals.get('self'))
+                    self.fixture_key = "%s.%s (class fixture)" % (
+                        owner.__module__, owner.__name__)
+            state['running'] = label(code)
+            state['stack'].append(state['running'])
+        elif event == 'return':
+            if state['fixtures'] and state['fixtures'][-1] is frame:
+                state['fixtures'].pop()
+            if frame.f_back is not None:
+                state['running'] = label(frame.f_back.f_code)
+            if state['stack']:
+                state['stack'].pop()
+        elif event == 'c_call':
+            if is_network_call(arg):
+                state['network'] += 1
+            state['running'] = '<builtin %s>' % arg.__name__
+            state['stack'].append(state['running'])
+        elif event in ('c_return', 'c_exception'):
+            if is_network_call(arg):
+                state['network'] -= 1
+            state['running'] = label(frame.f_code)
+            if state['stack']:
+                state['stack'].pop()
+
+        state['last'] = time.time()
+
+    def start(self):
+        threading.setprofile(self)
+        sys.setprofile(self)
+
+    def stop(self):
+        sys.setprofile(None)
+        threading.setprofile(None)
+
+
+class ProfilingResult(unittest2.TextTestResult):
+
+    profiler = None
+
+    def startTest(self, test):
+        self.profiler.test = test.id()
+        self.profiler.fixture_key = None
+        super(ProfilingResult, self).startTest(test)
+
+    def stopTest(self, test):
+        super(ProfilingResult, self).stopTest(test)
+        self.profiler.test = None
+
+
+def format_table(times, sort='cpu'):
+    lines = ["%-70s %9s %9s %9s %9s %6s" % (
+        'test', 'total(s)', 'cpu(s)', 'net(s)', 'fixt(s)', 'cpu%')]
+
+    def total(row):
+        return sum(row.values())
+
+    rows = sorted(
+        times.items(),
+        key=lambda item: total(item[1]) if sort == 'total' else item[1][sort],
+        reverse=True)
+
+    for key, row in rows:
+        lines.append("%-70s %9.3f %9.3f %9.3f %9.3f %5.1f%%" % (
+            key[-70:], total(row), row['cpu'], row['network'],
+            row['fixture'], 100 * row['cpu'] / (total(row) or 1)))
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Profile the client side cost of the test suite.")
+    parser.add_argument('tests', nargs='*',
+                        help="test names, default: the whole suite")
+    parser.add_argument('--sort', choices=BUCKETS + ('total',),
+                        default='cpu')
+    parser.add_argument('--top', type=int, default=25,
+                        help="number of client side functions to list")
+    parser.add_argument('--folded', metavar='FILE',
+                        help="write folded stacks for flamegraph.pl")
+    args = parser.parse_args(argv)
+
+    loader = unittest2.TestLoader()
+    if args.tests:
+        suite = loader.loadTestsFromNames(args.tests)
+    else:
+        package = os.path.dirname(os.path.abspath(__file__))
+        suite = loader.discover(package,
+                                top_level_dir=os.path.dirname(package))
+
+    profiler = BucketProfiler(folded=bool(args.folded))
+    ProfilingResult.profiler = profiler
+    runner = unittest2.TextTestRunner(resultclass=ProfilingResult)
+
+    profiler.start()
+    try:
+        result = runner.run(suite)
+    finally:
+        profiler.stop()
+
+    print()
+    print(format_table(profiler.times, args.sort))
+    print()
+    print("%-70s %9s" % ('client side function', 'self(s)'))
+    for function, seconds in sorted(profiler.functions.items(),
+                                    key=lambda item: item[1],
+                                    reverse=True)[:args.top]:
+        print("%-70s %9.3f" % (function[-70:], seconds))
+
+    if args.folded:
+        with open(args.folded, 'w') as folded:
+            for stack, seconds in profiler.stacks.items():
+                # flamegraph.pl expects integer sample counts, use us
+                if stack and int(seconds * 1e6):
+                    folded.write("%s %i\n" % (stack, seconds * 1e6))
+
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,289 @@
+from __future__ import print_function
+
+import argparse
+import atexit
+import math
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+
+try:
+    from urlparse import urlparse
+except ImportError:
+    from urllib.parse import urlparse
+
+import openstack_api_conformance
+from openstack_api_conformance import performance
+
+# Local store of timing results, one row per run and one row per sample, so
+# runs before and after an upgrade can be compared:
+#
+#     "results": {
+#         "database": ".testresults.db",
+#         "cluster": "ams1"
+#     }
+#
+# Compare two runs (by id) or two releases (all runs with that label):
+#
+#     python -m openstack_api_conformance.results compare grizzly icehouse
+
+DEFAULT_DATABASE = '.testresults.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    cluster TEXT,
+    release TEXT,
+    revision TEXT,
+    timestamp REAL,
+    kind TEXT
+);
+CREATE TABLE IF NOT EXISTS operations (
+    run_id INTEGER REFERENCES runs(id),
+    operation TEXT,
+    count INTEGER,
+    errors INTEGER,
+    throughput REAL
+);
+CREATE TABLE IF NOT EXISTS samples (
+    run_id INTEGER REFERENCES runs(id),
+    operation TEXT,
+    seconds REAL
+);
+CREATE INDEX IF NOT EXISTS samples_run ON samples(run_id, operation);
+"""
+
+
+class ResultStore(object):
+
+    def __init__(self, path=DEFAULT_DATABASE):
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def save(self, recorder, cluster, release, revision, kind='suite'):
+        with self.db:
+            cursor = self.db.execute(
+                "INSERT INTO runs (cluster, release, revision, timestamp, kind)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (cluster, release, revision, time.time(), kind))
+            run_id = cursor.lastrowid
+
+            for operation, summary in recorder.summary().items():
+                self.db.execute(
+                    "INSERT INTO operations VALUES (?, ?, ?, ?, ?)",
+                    (run_id, operation, summary['count'], summary['errors'],
+                     summary['throughput']))
+                self.db.executemany(
+                    "INSERT INTO samples VALUES (?, ?, ?)",
+                    ((run_id, operation, s)
+                     for s in recorder.samples[operation]))
+
+        return run_id
+
+    def runs(self):
+        return self.db.execute(
+            "SELECT id, cluster, release, revision, timestamp, kind"
+            " FROM runs ORDER BY id").fetchall()
+
+    def run_ids(self, selector):
+        """A run id selects that run, anything else all runs of a release."""
+        if selector.isdigit():
+            return [int(selector)]
+
+        return [row[0] for row in self.db.execute(
+            "SELECT id FROM runs WHERE release = ?", (selector,))]
+
+    def samples(self, run_ids):
+        result = {}
+        for operation, seconds in self.db.execute(
+                "SELECT operation, seconds FROM samples WHERE run_id IN (%s)"
+                % ",".join("?" * len(run_ids)), run_ids):
+            result.setdefault(operation, []).append(seconds)
+
+        return result
+
+    def throughput(self, run_ids):
+        return dict(self.db.execute(
+            "SELECT operation, AVG(throughput) FROM operations"
+            " WHERE run_id IN (%s) GROUP BY operation"
+            % ",".join("?" * len(run_ids)), run_ids).fetchall())
+
+
+def mann_whitney(a, b):
+    """
+    Two-sided Mann-Whitney U test using the normal approximation with tie
+    correction. Returns the p-value for a and b having the same distribution.
+    """
+    n1, n2 = len(a), len(b)
+    if not n1 or not n2:
+        return 1.0
+
+    ranked = sorted([(value, 0) for value in a] + [(value, 1) for value in b])
+
+    rank_sum = 0.0
+    tie_term = 0.0
+    i = 0
+    while i < len(ranked):
+        j = i
+        while j + 1 < len(ranked) and ranked[j + 1][0] == ranked[i][0]:
+            j += 1
+
+        rank = (i + j) / 2.0 + 1
+        rank_sum += rank * sum(1 for k in range(i, j + 1)
+                               if ranked[k][1] == 0)
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        i = j + 1
+
+    u = rank_sum - n1 * (n1 + 1) / 2.0
+    n = n1 + n2
+    variance = n1 * n2 / 12.0 * ((n + 1) - tie_term / (n * (n - 1) or 1))
+    if variance <= 0:
+        return 1.0
+
+    z = (u - n1 * n2 / 2.0) / math.sqrt(variance)
+    return math.erfc(abs(z) / math.sqrt(2))
+
+
+def compare_samples(before, after, alpha=0.05):
+    """
+    Per operation comparison of two {operation: samples} dictionaries.
+    Returns rows of (operation, n before, n after, median before, median
+    after, relative change, p-value, regression).
+    """
+    rows = []
+    for operation in sorted(set(before) & set(after)):
+        a, b = before[operation], after[operation]
+        median_a = performance.percentile(a, 50)
+        median_b = performance.percentile(b, 50)
+        p_value = mann_whitney(a, b)
+        change = (median_b - median_a) / median_a if median_a else 0.0
+        rows.append((operation, len(a), len(b), median_a, median_b, change,
+                     p_value, p_value < alpha and median_b > median_a))
+
+    return rows
+
+
+def format_comparison(rows):
+    lines = ["%-24s %7s %7s %10s %10s %8s %8s" % (
+        'operation', 'n(a)', 'n(b)', 'p50(a)ms', 'p50(b)ms', 'change',
+        'p-value')]
+    for operation, n1, n2, a, b, change, p_value, regression in rows:
+        lines.append("%-24s %7i %7i %10.1f %10.1f %+7.1f%% %8.4f%s" % (
+            operation, n1, n2, a * 1000, b * 1000, change * 100, p_value,
+            '  REGRESSION' if regression else ''))
+
+    return "\n".join(lines)
+
+
+def get_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=open(os.devnull, 'w')).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_cluster(config):
+    cluster = (config.results or {}).get('cluster')
+    if cluster:
+        return cluster
+
+    url = (config.keystone or {}).get('url') or \
+        (config.swift or {}).get('auth_url')
+    return urlparse(url).hostname if url else None
+
+
+def save(recorder, config=None, kind='suite'):
+    if config is None:
+        config = openstack_api_conformance.get_configuration()
+
+    store = ResultStore(
+        (config.results or {}).get('database') or DEFAULT_DATABASE)
+    return store.save(recorder,
+                      get_cluster(config),
+                      (config.keystone or {}).get('release'),
+                      get_revision(),
+                      kind)
+
+
+_registered = []
+
+
+def save_on_exit(recorder=performance.RECORDER):
+    """Stores the recorder when the test run finishes, once per recorder."""
+    if recorder in _registered:
+        return
+
+    _registered.append(recorder)
+
+    def _save():
+        if recorder.samples:
+            save(recorder)
+
+    atexit.register(_save)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Inspect and compare stored benchmark results.")
+    parser.add_argument('--database', default=None)
+    subparsers = parser.add_subparsers(dest='command')
+
+    subparsers.add_parser('list', help="list stored runs")
+
+    compare = subparsers.add_parser(
+        'compare', help="compare two runs (by id) or releases (by label)")
+    compare.add_argument('before')
+    compare.add_argument('after')
+    compare.add_argument('--alpha', type=float, default=0.05)
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        # subcommands are optional on Python 3
+        parser.error("give a command: list or compare")
+
+    database = args.database
+    if database is None:
+        try:
+            config = openstack_api_conformance.get_configuration()
+            database = (config.results or {}).get('database')
+        except IOError:
+            pass
+
+    store = ResultStore(database or DEFAULT_DATABASE)
+
+    if args.command == 'list':
+        for run_id, cluster, release, revision, timestamp, kind in \
+                store.runs():
+            print("%5i  %-20s %-10s %-12s %s  %s" % (
+                run_id, cluster, release, (revision or '')[:12],
+                time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp)),
+                kind))
+        return 0
+
+    before = store.run_ids(args.before)
+    after = store.run_ids(args.after)
+    if not before or not after:
+        parser.error("no runs found for %s" % (
+            args.before if not before else args.after))
+
+    rows = compare_samples(
+        store.samples(before), store.samples(after), args.alpha)
+    print(format_comparison(rows))
+
+    throughput_a = store.throughput(before)
+    throughput_b = store.throughput(after)
+    for operation in sorted(set(throughput_a) & set(throughput_b)):
+        print("%-24s throughput %.1f/s -> %.1f/s" % (
+            operation, throughput_a[operation], throughput_b[operation]))
+
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
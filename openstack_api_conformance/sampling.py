@@ -0,0 +1,127 @@
+import collections
+import threading
+import time
+
+# Sampled response validation for high rate load runs. Validating every
+# response against its schema costs client CPU the load generator needs at
+# high rates, so the Sampler validates
+#
+#  - 1 in `every` responses per operation (`every` is a number, or a dict of
+#    numbers by operation name),
+#  - every error response, against the error schema,
+#  - every response `slow` times slower than the moving average of its
+#    operation,
+#
+# and, with `cpu_share`, scales `every` up or down so validation takes no more
+# than that share of the process CPU time.
+#
+#     "load": {
+#         ...
+#         "validation": {
+#             "every": 10,
+#             "slow": 4,
+#             "cpu_share": 0.05
+#         }
+#     }
+
+DEFAULTS = {
+    'every': 1,
+    'slow': 4,
+    'cpu_share': None,
+}
+
+# weight of the newest latency in the moving average
+ALPHA = 0.05
+
+# seconds between adjustments of the sampling rate
+INTERVAL = 1.0
+
+# upper bound of the factor `every` is scaled with
+MAX_SCALE = 1024
+
+try:
+    process_time = time.process_time
+except AttributeError:
+    process_time = time.clock
+
+# the CPU time of validating is taken per thread where possible, so other
+# threads running meanwhile aren't counted; either way both sides of the
+# share are CPU time, not wall time
+thread_time = getattr(time, 'thread_time', process_time)
+
+
+def get_validation_config(load):
+    validation = dict(DEFAULTS)
+    validation.update(load.get('validation') or {})
+    return validation
+
+
+class Sampler(object):
+    """
+    Shared by the threads of one process. check() raises schema.Invalid for
+    a picked response that doesn't match its schema.
+    """
+
+    def __init__(self, validators, every=1, slow=4, cpu_share=None):
+        self.validators = validators
+        self.every = every
+        self.slow = slow
+        self.cpu_share = cpu_share
+
+        self.scale = 1
+        self.seen = collections.defaultdict(int)
+        self.validated = collections.defaultdict(int)
+        self.average = {}
+        self.lock = threading.Lock()
+
+        self.spent = 0.0
+        self.window_start = time.time()
+        self.window_cpu = process_time()
+
+    def interval(self, name):
+        every = self.every.get(name, 1) if isinstance(self.every, dict) \
+            else self.every
+        return max(int(every * self.scale), 1)
+
+    def pick(self, name, ok, seconds):
+        with self.lock:
+            self.seen[name] += 1
+            average = self.average.get(name, seconds)
+            self.average[name] = average + ALPHA * (seconds - average)
+
+            if not ok or seconds > self.slow * average:
+                return True
+            return self.seen[name] % self.interval(name) == 0
+
+    def check(self, name, response, ok, seconds):
+        if name not in self.validators or \
+                not self.pick(name, ok, seconds):
+            return
+
+        validate = self.validators[name][0 if ok else 1]
+        start = thread_time()
+        try:
+            validate(response)
+        finally:
+            spent = thread_time() - start
+            with self.lock:
+                self.validated[name] += 1
+                self.spent += spent
+                if self.cpu_share and \
+                        time.time() - self.window_start >= INTERVAL:
+                    self.adjust()
+
+    def adjust(self):
+        """Rescales the sampling rate to the CPU share of the last window."""
+        cpu = process_time()
+        used = cpu - self.window_cpu
+        if used > 0:
+            share = self.spent / used
+            if share > self.cpu_share:
+                self.scale = min(self.scale * 2, MAX_SCALE)
+            elif share < self.cpu_share / 2 and self.scale > 1:
+                self.scale //= 2
+
+        self.spent = 0.0
+        self.window_start = time.time()
+        self.window_cpu = cpu
@@ -0,0 +1,239 @@
+import calendar
+import re
+import time
+
+# Declarative response schemas, compiled once into plain functions so the
+# same checks the conformance tests make can run on every response the load
+# generator sees.
+#
+# A schema is one of:
+#
+#     None                 anything
+#     a type or tuple      isinstance check
+#     a string             regular expression the whole value must match
+#     a dict               object with exactly these keys, values schemas
+#     a list [schema]      list of items matching schema
+#     a node below         Object, Const, AnyOf, Recent, Headers, Response
+#
+# compile() returns a function raising Invalid for the first mismatch, with
+# the path of the offending value.
+
+try:
+    text_types = (str, unicode)
+except NameError:
+    text_types = (str,)
+
+
+class Invalid(ValueError):
+
+    def __init__(self, path, message, value=None):
+        super(Invalid, self).__init__("%s: %s" % (path, message))
+        self.path = path
+        self.message = message
+        self.value = value
+
+
+class Node(object):
+    """
+    A schema element; subclasses implement compile(path), returning a
+    function that raises Invalid for a value not matching it.
+    """
+
+
+class Object(Node):
+    """A dict with required and optional keys; others only if extra."""
+
+    def __init__(self, required, optional=None, extra=False):
+        self.required = required
+        self.optional = optional or {}
+        self.extra = extra
+
+    def compile(self, path):
+        fields = [(key, compile(value, '%s.%s' % (path, key)))
+                  for key, value in self.required.items()]
+        fields += [(key, compile(value, '%s.%s' % (path, key)))
+                   for key, value in self.optional.items()]
+        required = frozenset(self.required)
+        allowed = required | frozenset(self.optional)
+        extra = self.extra
+
+        def validate(value):
+            if not isinstance(value, dict):
+                raise Invalid(path, "not an object", value)
+            keys = frozenset(value)
+            if not required <= keys:
+                raise Invalid(path, "missing %s" % ", ".join(
+                    sorted(required - keys)), value)
+            if not extra and not keys <= allowed:
+                raise Invalid(path, "unexpected %s" % ", ".join(
+                    sorted(keys - allowed)), value)
+            for key, check in fields:
+                if key in value:
+                    check(value[key])
+        return validate
+
+
+class Const(Node):
+
+    def __init__(self, value):
+        self.value = value
+
+    def compile(self, path):
+        expected = self.value
+
+        def validate(value):
+            if value != expected:
+                raise Invalid(path, "not %r" % (expected,), value)
+        return validate
+
+
+class AnyOf(Node):
+
+    def __init__(self, *schemas):
+        self.schemas = schemas
+
+    def compile(self, path):
+        checks = [compile(schema, path) for schema in self.schemas]
+
+        def validate(value):
+            errors = []
+            for check in checks:
+                try:
+                    return check(value)
+                except Invalid as e:
+                    errors.append(e.message)
+            raise Invalid(path, " and ".join(errors), value)
+        return validate
+
+
+class Recent(Node):
+    """A timestamp within delta seconds of now + offset."""
+
+    def __init__(self, format, delta, offset=0):
+        self.format = format
+        self.delta = delta
+        self.offset = offset
+
+    def compile(self, path):
+        format, delta, offset = self.format, self.delta, self.offset
+        # most responses repeat the previous timestamp, strptime is slow
+        last = [(None, None)]
+
+        def validate(value):
+            seen, stamp = last[0]
+            if value != seen:
+                try:
+                    stamp = calendar.timegm(time.strptime(value, format))
+                except (TypeError, ValueError):
+                    raise Invalid(path, "not a %s timestamp" % format, value)
+                last[0] = (value, stamp)
+            if abs(time.time() + offset - stamp) > delta:
+                raise Invalid(path, "more than %gs off" % delta, value)
+        return validate
+
+
+class Headers(Node):
+    """
+    Response headers, matched case insensitively. Without extra, only the
+    required and optional headers may be present; absent lists headers that
+    must not be.
+    """
+
+    def __init__(self, required, optional=None, absent=(), extra=True):
+        self.required = dict((k.lower(), v) for k, v in required.items())
+        self.optional = dict((k.lower(), v)
+                             for k, v in (optional or {}).items())
+        self.absent = frozenset(name.lower() for name in absent)
+        self.extra = extra
+
+    def compile(self, path):
+        check = Object(self.required, self.optional, self.extra).compile(path)
+        absent = self.absent
+
+        def validate(headers):
+            headers = dict((k.lower(), v) for k, v in headers.items())
+            present = absent.intersection(headers)
+            if present:
+                raise Invalid(path, "unexpected %s" % ", ".join(
+                    sorted(present)), headers)
+            check(headers)
+        return validate
+
+
+class Response(Node):
+    """A requests response: status, headers and the JSON body."""
+
+    def __init__(self, status=None, headers=None, json=None):
+        self.status = status
+        self.headers = headers
+        self.json = json
+
+    def compile(self, path):
+        status = frozenset(self.status or ())
+        headers = compile(self.headers, path + '.headers')
+        body = compile(self.json, path + '.json') \
+            if self.json is not None else None
+
+        def validate(response):
+            if status and response.status_code not in status:
+                raise Invalid(path + '.status', "not %s" % ", ".join(
+                    str(s) for s in sorted(status)), response.status_code)
+            headers(response.headers)
+            if body is not None:
+                try:
+                    parsed = response.json()
+                except ValueError:
+                    raise Invalid(path + '.json', "not JSON", response.text)
+                body(parsed)
+        return validate
+
+
+def _anything(value):
+    pass
+
+
+def compile(schema, path='$'):
+    if schema is None:
+        return _anything
+    if isinstance(schema, Node):
+        return schema.compile(path)
+    if isinstance(schema, dict):
+        return Object(schema).compile(path)
+    if isinstance(schema, list):
+        check = compile(schema[0], path + '[]')
+
+        def validate(value):
+            if not isinstance(value, list):
+                raise Invalid(path, "not a list", value)
+            for item in value:
+                check(item)
+        return validate
+    if isinstance(schema, text_types):
+        pattern = schema if schema.endswith('$') else schema + '$'
+        match = re.compile(pattern).match
+
+        def validate(value):
+            if not isinstance(value, text_types) or not match(value):
+                raise Invalid(path, "does not match %s" % schema, value)
+        return validate
+    if isinstance(schema, (type, tuple)):
+        def validate(value):
+            if not isinstance(value, schema):
+                raise Invalid(path, "not %s" % (schema,), value)
+        return validate
+
+    raise TypeError("not a schema: %r" % (schema,))
+
+
+def compile_profile(schemas):
+    """Compiles a {name: schema} profile into {name: validator}."""
+    return dict((name, compile(value, name))
+                for name, value in schemas.items())
+
+
+def assert_valid(testcase, validate, value):
+    """Fails testcase with the path and value of the first mismatch."""
+    try:
+        validate(value)
+    except Invalid as e:
+        testcase.fail("%s, got %r" % (e, e.value))
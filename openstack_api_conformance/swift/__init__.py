@@ -0,0 +1,165 @@
+from openstack_api_conformance import keystone
+
+from hashlib import sha1
+import base64
+import email.utils
+import hmac
+import requests
+import time
+
+
+def authenticate(config, session=requests):
+    """
+    Authenticates with keystone using the swift credentials, returns the
+    token id and the object-store URL from the catalog.
+    """
+    response = keystone.issue_token(
+        config.auth_url,
+        keystone.password_auth(config['username'], config['password'],
+                               tenantId=config['tenantId']),
+        session)
+    response.raise_for_status()
+
+    token = response.json()
+
+    object_stores = [
+        service['endpoints'][0]['publicURL']
+        for service in token['access']['serviceCatalog']
+        if service['type'] == 'object-store'
+    ]
+
+    return token['access']['token']['id'], object_stores[0]
+
+
+# seconds before objects of shared fixtures expire, unless the swift config
+# has a "fixture_expiry" (0 for never)
+FIXTURE_EXPIRY = 24 * 3600
+
+_info = {}
+
+
+def info(url, session=requests):
+    """
+    The capabilities the cluster serving the storage URL publishes on /info,
+    fetched once per cluster; {} when /info isn't available. Connection
+    errors aren't remembered, the next call tries again.
+    """
+    info_url = url.split('/v1/', 1)[0] + '/info'
+    if info_url not in _info:
+        try:
+            response = session.get(info_url)
+        except requests.RequestException:
+            return {}
+        try:
+            _info[info_url] = response.json() \
+                if response.status_code == 200 else {}
+        except ValueError:
+            _info[info_url] = {}
+    return _info[info_url]
+
+
+def expiring(config, headers=None):
+    """
+    headers plus an X-Delete-After for fixture objects, so a run that dies
+    before cleaning up doesn't leave them behind for good.
+    """
+    after = int(config.get('fixture_expiry', FIXTURE_EXPIRY))
+    if not after:
+        return dict(headers or {})
+    return dict(headers or {}, **{'X-Delete-After': str(after)})
+
+
+# container metadata refreshed on the containers a run is using, which the
+# sweeper takes as a sign of life however old the container is; long runs
+# refresh it every HEARTBEAT_INTERVAL seconds
+HEARTBEAT = 'X-Container-Meta-Heartbeat'
+HEARTBEAT_INTERVAL = 300
+
+
+def heartbeat(headers=None):
+    """headers plus a HEARTBEAT of now, for a container PUT or POST."""
+    return dict(headers or {}, **{HEARTBEAT: '%.5f' % time.time()})
+
+
+def tempurl_signature(key, method, expires, path):
+    hmac_body = '%s\n%i\n%s' % (method, expires, path)
+    return hmac.new(key, hmac_body, sha1).hexdigest()
+
+
+def tempurl(url, path, key, expires, method='GET'):
+    return "%s?temp_url_sig=%s&temp_url_expires=%i" % (
+        url, tempurl_signature(key, method, expires, path), expires)
+
+
+def formpost_fields(key, path, redirect, max_file_size, max_file_count,
+                    expires):
+    hmac_body = '%s\n%s\n%s\n%s\n%s' % (path, redirect,
+                                        max_file_size, max_file_count,
+                                        expires)
+    signature = hmac.new(key, hmac_body, sha1).hexdigest()
+
+    return {
+        "redirect": redirect,
+        "max_file_size": str(max_file_size),
+        "max_file_count": str(max_file_count),
+        "expires": str(expires),
+        "signature": signature,
+    }
+
+
+def canonical_string(method, path, headers, expires=None):
+    """
+    Generates the aws canonical string for the given parameters
+    """
+    interesting_headers = {}
+    for key in headers:
+        lk = key.lower()
+        if headers[key] != None and (lk in ['content-md5', 'content-type', 'date'] or
+                                     lk.startswith('x-amz-')):
+            interesting_headers[lk] = str(headers[key]).strip()
+
+    # these keys get empty strings if they don't exist
+    if 'content-type' not in interesting_headers:
+        interesting_headers['content-type'] = ''
+    if 'content-md5' not in interesting_headers:
+        interesting_headers['content-md5'] = ''
+
+    # if you're using expires for query string auth, then it trumps date
+    # (and provider.date_header)
+    if expires:
+        interesting_headers['date'] = str(expires)
+
+    sorted_header_keys = sorted(interesting_headers.keys())
+
+    buf = "%s\n" % method
+    for key in sorted_header_keys:
+        val = interesting_headers[key]
+        if key.startswith('x-amz-'):
+            buf += "%s:%s\n" % (key, val)
+        else:
+            buf += "%s\n" % val
+
+    # don't include anything after the first ? in the resource...
+    # unless it is one of the QSA of interest, defined above
+    t = path.split('?')
+    buf += t[0]
+
+    return buf
+
+
+def sign_headers(method, path, headers, expires=None, config=None):
+
+    if 'Date' not in headers and not expires:
+        headers['date'] = email.utils.formatdate(time.time())
+
+    string_to_sign = canonical_string(method, path, headers, expires)
+
+    if config is None:
+        import openstack_api_conformance
+        config = openstack_api_conformance.get_configuration()['swift']
+
+    signature = base64.b64encode(hmac.new(
+        str(config['s3_secret']),
+        str(string_to_sign), sha1).digest())
+
+    headers['Authorization'] = 'AWS %s:%s' % (config['s3_access'], signature)
@@ -0,0 +1,274 @@
+from __future__ import print_function
+
+import argparse
+import sys
+import tarfile
+import time
+import uuid
+import zlib
+from multiprocessing.pool import ThreadPool
+
+import requests
+
+try:
+    from urllib import quote
+except ImportError:
+    from urllib.parse import quote
+
+import openstack_api_conformance
+from openstack_api_conformance import payload
+from openstack_api_conformance import performance
+from openstack_api_conformance import results
+from openstack_api_conformance import swift
+
+# The bulk middleware: tar archives extracted into objects on upload
+# (?extract-archive), streamed from a generator so nothing but the current
+# block is in memory, and bulk deletes of up to max_deletes_per_request paths
+# per request (?bulk-delete). delete() and delete_container() fall back to
+# one DELETE per path when /info doesn't list bulk_delete, and are what the
+# tests use to clean up their containers.
+#
+# The benchmark compares both with one request per object:
+#
+#     "bulk": {
+#         "objects": [100, 1000, 10000],
+#         "object_size": 1024,
+#         "concurrency": 16
+#     }
+#
+#     python -m openstack_api_conformance.swift.bulk --objects 5000
+
+DEFAULTS = {
+    'objects': [100, 1000, 10000],
+    'object_size': 1024,
+    'concurrency': 16,
+}
+
+MAX_DELETES_PER_REQUEST = 10000
+
+NUL = b'\0'
+
+
+def tar_stream(entries, compression=''):
+    """
+    Yields a tar archive of (name, data) entries, data being bytes or a
+    payload.Payload; gzipped with compression 'gz'.
+    """
+    def archive():
+        for name, data in entries:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            yield info.tobuf(tarfile.GNU_FORMAT)
+
+            # an empty chunk would end a chunked request body
+            if isinstance(data, payload.Payload):
+                for chunk in data.chunks():
+                    yield chunk
+            elif data:
+                yield data
+            if len(data) % tarfile.BLOCKSIZE:
+                yield NUL * (tarfile.BLOCKSIZE -
+                             len(data) % tarfile.BLOCKSIZE)
+        yield NUL * (2 * tarfile.BLOCKSIZE)
+
+    if compression != 'gz':
+        for chunk in archive():
+            yield chunk
+        return
+
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in archive():
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def extract_archive(session, url, entries, path='', compression=''):
+    """
+    PUTs entries as a streamed tar archive, extracted below url + '/' + path:
+    names are "container/object" at the account, "object" in a container.
+    The response JSON holds "Number Files Created" and "Errors".
+    """
+    target = url + ('/' + path if path else '')
+    return session.put(
+        target + '?extract-archive=tar' +
+        ('.' + compression if compression else ''),
+        data=tar_stream(entries, compression),
+        headers={'accept': 'application/json'})
+
+
+def _quote(path):
+    if not isinstance(path, bytes):
+        path = path.encode('utf-8')
+    return quote(path)
+
+
+def bulk_delete(session, url, paths, batch=None):
+    """
+    Deletes paths ("/container" or "/container/object") of the account at
+    url, `batch` per request. Returns the summed "Number Deleted" and
+    "Number Not Found", and all "Errors" as [path, status] pairs.
+    """
+    batch = batch or int(swift.info(url).get('bulk_delete', {}).get(
+        'max_deletes_per_request', MAX_DELETES_PER_REQUEST))
+
+    totals = {'Number Deleted': 0, 'Number Not Found': 0, 'Errors': []}
+    for i in range(0, len(paths), batch):
+        response = session.post(
+            url + '?bulk-delete',
+            data='\n'.join(_quote(path) for path in paths[i:i + batch]),
+            headers={'content-type': 'text/plain',
+                     'accept': 'application/json'})
+        response.raise_for_status()
+
+        result = response.json()
+        for key in ('Number Deleted', 'Number Not Found'):
+            totals[key] += result.get(key, 0)
+        totals['Errors'].extend(result.get('Errors') or [])
+
+    return totals
+
+
+def delete(session, url, paths, concurrency=16):
+    """Deletes paths, in bulk if the cluster supports it."""
+    if 'bulk_delete' in swift.info(url):
+        bulk_delete(session, url, paths)
+        return
+
+    pool = ThreadPool(concurrency)
+    try:
+        pool.map(lambda path: session.delete(url + path), paths)
+    finally:
+        pool.close()
+
+
+def empty_container(session, c_url, concurrency=16):
+    """Deletes everything in a container."""
+    url, container = c_url.rsplit('/', 1)
+    listed = None
+    while True:
+        response = session.get(c_url, headers={'accept': 'application/json'})
+        # stop at an empty listing, or one that deleting didn't change
+        if response.status_code != 200 or response.json() in ([], listed):
+            break
+        listed = response.json()
+        delete(session, url, ['/%s/%s' % (container, obj['name'])
+                              for obj in listed], concurrency)
+
+
+def delete_container(session, c_url, concurrency=16):
+    """Deletes a container and everything in it."""
+    empty_container(session, c_url, concurrency)
+    session.delete(c_url)
+
+
+def benchmark(session, url, count, data, concurrency, recorder):
+    """
+    Uploads and deletes `count` objects one request each, then in bulk.
+    Returns (count, method, upload seconds, delete seconds) rows.
+    """
+    container = 'bulk-' + uuid.uuid4().hex
+    c_url = url + '/' + container
+    names = ['%08i' % i for i in range(count)]
+    paths = ['/%s/%s' % (container, name) for name in names]
+    body = data.read_range(0)
+
+    session.put(c_url).raise_for_status()
+    pool = ThreadPool(concurrency)
+    try:
+        start = time.time()
+        for response in pool.imap_unordered(
+                lambda name: session.put(c_url + '/' + name, data=body),
+                names):
+            response.raise_for_status()
+        uploaded = time.time()
+        pool.map(lambda path: session.delete(url + path), paths)
+        deleted = time.time()
+        rows = [(count, 'each', uploaded - start, deleted - uploaded)]
+
+        response = extract_archive(session, url,
+                                   ((name, data) for name in names),
+                                   container)
+        response.raise_for_status()
+        created = response.json().get('Number Files Created')
+        extracted = time.time()
+        removed = bulk_delete(session, url, paths)['Number Deleted']
+        bulk_deleted = time.time()
+        rows.append((count, 'bulk', extracted - deleted,
+                     bulk_deleted - extracted))
+    finally:
+        pool.close()
+        delete_container(session, c_url, concurrency)
+
+    recorder.add('put_each@%i' % count, rows[0][2])
+    recorder.add('delete_each@%i' % count, rows[0][3])
+    recorder.add('extract_archive@%i' % count, rows[1][2], created == count)
+    recorder.add('bulk_delete@%i' % count, rows[1][3], removed == count)
+    return rows
+
+
+def format_report(rows):
+    lines = ["%8s %-6s %10s %10s %10s %10s" % (
+        'objects', 'method', 'upload s', 'objects/s', 'delete s',
+        'objects/s')]
+    for count, method, upload, remove in rows:
+        lines.append("%8i %-6s %10.2f %10.1f %10.2f %10.1f" % (
+            count, method, upload, count / max(upload, 1e-9), remove,
+            count / max(remove, 1e-9)))
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare bulk uploads and deletes with one request per "
+                    "object.")
+    parser.add_argument('--objects', type=int, nargs='+')
+    parser.add_argument('--object-size', type=int, help="bytes")
+    parser.add_argument('--concurrency', type=int,
+                        help="parallel requests for one request per object")
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args(argv)
+
+    config = openstack_api_conformance.get_configuration()
+    settings = dict(DEFAULTS)
+    settings.update(config.bulk or {})
+    for key in ('objects', 'object_size', 'concurrency'):
+        if getattr(args, key):
+            settings[key] = getattr(args, key)
+
+    token_id, url = swift.authenticate(config['swift'])
+    session = requests.Session()
+    session.headers.update({'X-Auth-Token': token_id})
+    adapter = requests.adapters.HTTPAdapter(
+        pool_maxsize=int(settings['concurrency']))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    capabilities = swift.info(url)
+    missing = [name for name in ('bulk_upload', 'bulk_delete')
+               if name not in capabilities]
+    if missing:
+        print("not supported by the cluster: %s" % ", ".join(missing))
+        return 1
+
+    data = payload.Payload(int(settings['object_size']), 'bulk')
+    recorder = performance.Recorder()
+    rows = []
+    for count in settings['objects']:
+        rows.extend(benchmark(session, url, int(count), data,
+                              int(settings['concurrency']), recorder))
+
+    print(format_report(rows))
+
+    if not args.no_save:
+        recorder.finished = time.time()
+        results.save(recorder, config, kind='bulk')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,288 @@
+from __future__ import print_function
+
+import argparse
+import sys
+import threading
+import time
+import uuid
+from multiprocessing.pool import ThreadPool
+
+import requests
+
+import openstack_api_conformance
+from openstack_api_conformance import payload
+from openstack_api_conformance import performance
+from openstack_api_conformance import results
+from openstack_api_conformance import swift
+
+# Container stats consistency probe: writes objects at a fixed rate and polls
+# the container (HEAD for x-container-object-count and
+# x-container-bytes-used, GET for the listing) to measure how long it takes
+# before every write is reflected. Writes start at their scheduled time from
+# a pool of `concurrency` threads, so the rate doesn't depend on the PUT
+# latency as long as there are enough threads; the rate achieved is reported
+# next to the one configured. The count and bytes used can't tell which
+# objects they include, so writes are taken to show up there in the order
+# they completed; the listing is checked per object.
+#
+#     "consistency": {
+#         "rates": [1, 10, 50],
+#         "writes": 100,
+#         "object_size": 1024,
+#         "timeout": 60,
+#         "poll_interval": 0.05,
+#         "concurrency": 32
+#     }
+#
+#     python -m openstack_api_conformance.swift.consistency --rates 10 100
+
+DEFAULTS = {
+    'rates': [1, 10, 50],
+    'writes': 100,
+    'object_size': 1024,
+    'timeout': 60,
+    'poll_interval': 0.05,
+    'concurrency': 32,
+}
+
+METRICS = ('count', 'bytes', 'listing')
+
+
+class Probe(object):
+
+    def __init__(self, token_id, url, rate, writes, object_size=1024,
+                 timeout=60, poll_interval=0.05, concurrency=32):
+        self.token_id = token_id
+        self.c_url = url + '/cons-' + uuid.uuid4().hex
+        self.rate = rate
+        self.writes = writes
+        self.object_size = object_size
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.concurrency = concurrency
+
+        # completion time of every write, and per metric the first time it
+        # was seen reflected
+        self.written = [None] * writes
+        self.seen = dict((metric, [None] * writes) for metric in METRICS)
+        self.done = threading.Event()
+        # failed requests per writer and poller, and the writes per second
+        # actually started
+        self.errors = dict((name, 0) for name in ('write', 'stats',
+                                                  'listing'))
+        self.achieved = None
+        self.write_seconds = [None] * writes
+        self.lock = threading.Lock()
+
+    def session(self):
+        session = requests.Session()
+        session.headers.update({'X-Auth-Token': self.token_id})
+        return session
+
+    def name(self, i):
+        return 'obj-%06i' % i
+
+    def error(self, name):
+        with self.lock:
+            self.errors[name] += 1
+
+    def write(self):
+        session = self.session()
+        data = payload.Payload(self.object_size, self.c_url)
+        started = [None] * self.writes
+        start = time.time()
+
+        def put(i):
+            delay = start + i / float(self.rate) - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            started[i] = time.time()
+            try:
+                session.put(self.c_url + '/' + self.name(i),
+                            data=data.open()).raise_for_status()
+            except requests.RequestException:
+                self.error('write')
+                return
+            self.written[i] = time.time()
+            self.write_seconds[i] = self.written[i] - started[i]
+
+        pool = ThreadPool(min(self.concurrency, self.writes))
+        try:
+            # one write per task, so none waits behind another in a chunk
+            pool.map(put, range(self.writes), chunksize=1)
+        finally:
+            pool.close()
+
+        if self.writes > 1:
+            self.achieved = (self.writes - 1) / max(
+                started[-1] - started[0], 1e-9)
+        else:
+            self.achieved = self.rate
+
+    def _mark(self, metric, upto, now):
+        """Marks the first `upto` writes to complete as seen."""
+        seen = self.seen[metric]
+        completed = sorted((written, i) for i, written in
+                           enumerate(self.written) if written is not None)
+        for _, i in completed[:upto]:
+            if seen[i] is None:
+                seen[i] = now
+
+    def poll_stats(self):
+        session = self.session()
+        while not self.done.is_set():
+            try:
+                response = session.head(self.c_url)
+                response.raise_for_status()
+            except requests.RequestException:
+                self.error('stats')
+                time.sleep(self.poll_interval)
+                continue
+            now = time.time()
+            self._mark('count', int(
+                response.headers.get('x-container-object-count', 0)), now)
+            self._mark('bytes', int(
+                response.headers.get('x-container-bytes-used', 0)) //
+                self.object_size, now)
+            time.sleep(self.poll_interval)
+
+    def poll_listing(self):
+        session = self.session()
+        while not self.done.is_set():
+            try:
+                response = session.get(self.c_url,
+                                       headers={'accept': 'application/json'})
+                response.raise_for_status()
+                listed = set(obj['name'] for obj in response.json())
+            except (requests.RequestException, ValueError):
+                self.error('listing')
+                time.sleep(self.poll_interval)
+                continue
+            now = time.time()
+            seen = self.seen['listing']
+            for i in range(self.writes):
+                if seen[i] is None and self.written[i] is not None and \
+                        self.name(i) in listed:
+                    seen[i] = now
+            time.sleep(self.poll_interval)
+
+    def complete(self):
+        # failed writes are never seen
+        return all(seen[i] is not None
+                   for seen in self.seen.values()
+                   for i in range(self.writes) if self.written[i] is not None)
+
+    def run(self):
+        """
+        Returns {metric: [delay per successful write, None if never seen]}.
+        """
+        session = self.session()
+        session.put(self.c_url).raise_for_status()
+
+        pollers = [threading.Thread(target=self.poll_stats),
+                   threading.Thread(target=self.poll_listing)]
+        for poller in pollers:
+            poller.daemon = True
+            poller.start()
+
+        try:
+            self.write()
+            deadline = time.time() + self.timeout
+            while not self.complete() and time.time() < deadline:
+                time.sleep(self.poll_interval)
+        finally:
+            self.done.set()
+            for poller in pollers:
+                poller.join()
+            self.cleanup()
+
+        return dict(
+            (metric, [seen - written if seen is not None else None
+                      for written, seen in zip(self.written, seen_at)
+                      if written is not None])
+            for metric, seen_at in self.seen.items())
+
+    def cleanup(self):
+        session = self.session()
+        pool = ThreadPool(16)
+        try:
+            pool.map(lambda i: session.delete(self.c_url + '/' + self.name(i)),
+                     range(self.writes))
+        finally:
+            pool.close()
+        session.delete(self.c_url)
+
+
+def format_report(report):
+    """report: (configured rate, achieved rate, delays, errors) per probe."""
+    lines = ["%8s %8s %-8s %6s %6s %6s %9s %9s %9s %9s" % (
+        'writes/s', 'achieved', 'metric', 'seen', 'lost', 'errors', 'p50 ms',
+        'p90 ms', 'p99 ms', 'max ms')]
+    for rate, achieved, delays, errors in report:
+        for metric in METRICS:
+            seen = [d for d in delays[metric] if d is not None]
+            row = [performance.percentile(seen, p) for p in (50, 90, 99, 100)]
+            # count and bytes both come from the HEAD
+            poll_errors = errors['listing' if metric == 'listing' else
+                                 'stats']
+            lines.append("%8g %8.1f %-8s %6i %6i %6i" % (
+                rate, achieved, metric, len(seen),
+                len(delays[metric]) - len(seen), poll_errors) +
+                "".join(" %9.1f" % (v * 1000) if v is not None else
+                        " %9s" % '-' for v in row))
+        if errors['write']:
+            lines.append("%8g %8.1f %i writes failed" % (
+                rate, achieved, errors['write']))
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure container stats and listing update lag.")
+    parser.add_argument('--rates', type=float, nargs='+',
+                        help="write rates (objects per second)")
+    parser.add_argument('--writes', type=int)
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args(argv)
+
+    config = openstack_api_conformance.get_configuration()
+    settings = dict(DEFAULTS)
+    settings.update(config.consistency or {})
+    if args.rates:
+        settings['rates'] = args.rates
+    if args.writes:
+        settings['writes'] = args.writes
+
+    token_id, url = swift.authenticate(config['swift'])
+    recorder = performance.Recorder()
+    report = []
+    for rate in settings['rates']:
+        probe = Probe(token_id, url, rate, int(settings['writes']),
+                      int(settings['object_size']),
+                      float(settings['timeout']),
+                      float(settings['poll_interval']),
+                      int(settings['concurrency']))
+        delays = probe.run()
+        report.append((rate, probe.achieved, delays, probe.errors))
+
+        for seconds in probe.write_seconds:
+            recorder.add('container_write@%g/s' % rate, seconds or 0.0,
+                         seconds is not None)
+
+        for metric, values in delays.items():
+            for delay in values:
+                recorder.add('container_%s_lag@%g/s' % (metric, rate),
+                             delay or 0.0, delay is not None)
+
+    print(format_report(report))
+
+    if not args.no_save:
+        recorder.finished = time.time()
+        results.save(recorder, config, kind='consistency')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,280 @@
+from __future__ import print_function
+
+import argparse
+import random
+import sys
+import threading
+import time
+import uuid
+from multiprocessing.pool import ThreadPool
+
+import requests
+
+import openstack_api_conformance
+from openstack_api_conformance import performance
+from openstack_api_conformance import results
+from openstack_api_conformance import swift
+from openstack_api_conformance.swift import bulk
+
+# Object expiry probe: creates objects with X-Delete-After spread uniformly
+# over `after` seconds and measures how late, relative to the X-Delete-At
+# swift set, each one becomes inaccessible to GET, disappears from the
+# container listing and stops counting in x-container-object-count. GETs are
+# refused by the object servers as soon as X-Delete-At passes; listings and
+# counts wait for the object expirer. As listings and counts are updated
+# asynchronously, an object only counts as gone from them once it is due and
+# after they showed it. Polls that fail, by error status or connection error,
+# are counted per metric and retried.
+#
+#     "expiry": {
+#         "objects": 1000,
+#         "after": [10, 120],
+#         "timeout": 900,
+#         "poll_interval": 1,
+#         "concurrency": 16
+#     }
+#
+#     python -m openstack_api_conformance.swift.expiry --objects 5000
+
+DEFAULTS = {
+    'objects': 1000,
+    'after': [10, 120],
+    'timeout': 900,
+    'poll_interval': 1,
+    'concurrency': 16,
+}
+
+METRICS = ('get', 'listing', 'count')
+
+
+class Probe(object):
+
+    def __init__(self, token_id, url, objects, after=(10, 120), timeout=900,
+                 poll_interval=1, concurrency=16, seed=None):
+        self.token_id = token_id
+        self.c_url = url + '/exp-' + uuid.uuid4().hex
+        self.objects = objects
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.concurrency = concurrency
+
+        rng = random.Random(seed)
+        self.after = [int(rng.uniform(*after)) for _ in range(objects)]
+
+        # the X-Delete-At of every object, and per metric the first time it
+        # was seen gone
+        self.due = [None] * objects
+        self.seen = dict((metric, [None] * objects) for metric in METRICS)
+        self.done = threading.Event()
+        # failed polls per metric
+        self.errors = dict((metric, 0) for metric in METRICS)
+        self.lock = threading.Lock()
+
+    def session(self):
+        session = requests.Session()
+        session.headers.update({'X-Auth-Token': self.token_id})
+        return session
+
+    def name(self, i):
+        return 'obj-%06i' % i
+
+    def create(self):
+        session = self.session()
+
+        def put(i):
+            o_url = self.c_url + '/' + self.name(i)
+            start = time.time()
+            session.put(o_url, data='x', headers={
+                'X-Delete-After': str(self.after[i])}).raise_for_status()
+            response = session.head(o_url)
+            # the proxy's X-Delete-At, or the client's idea of it
+            self.due[i] = int(response.headers.get('x-delete-at') or
+                              start + self.after[i])
+
+        pool = ThreadPool(self.concurrency)
+        try:
+            pool.map(put, range(self.objects))
+        finally:
+            pool.close()
+
+    def error(self, metric):
+        with self.lock:
+            self.errors[metric] += 1
+
+    def _mark(self, metric, gone, now):
+        seen = self.seen[metric]
+        for i in gone:
+            if seen[i] is None:
+                seen[i] = now
+
+    def poll_get(self):
+        session = self.session()
+
+        def get(i):
+            try:
+                return i, session.get(
+                    self.c_url + '/' + self.name(i)).status_code
+            except requests.RequestException:
+                return i, None
+
+        pool = ThreadPool(self.concurrency)
+        try:
+            while not self.done.is_set():
+                now = time.time()
+                pending = [i for i in range(self.objects)
+                           if self.seen['get'][i] is None and
+                           self.due[i] is not None and self.due[i] <= now]
+                for i, status in pool.imap_unordered(get, pending):
+                    if status == 404:
+                        self._mark('get', [i], time.time())
+                    elif status != 200:
+                        self.error('get')
+                time.sleep(self.poll_interval)
+        finally:
+            pool.close()
+
+    def poll_listing(self):
+        session = self.session()
+        # the objects the listing showed, so one not listed yet isn't gone
+        shown = set()
+        while not self.done.is_set():
+            listed = set()
+            marker = ''
+            try:
+                while True:
+                    response = session.get(
+                        self.c_url, params={'marker': marker},
+                        headers={'accept': 'application/json'})
+                    response.raise_for_status()
+                    if not response.json():
+                        break
+                    listed.update(obj['name'] for obj in response.json())
+                    marker = response.json()[-1]['name']
+            except (requests.RequestException, ValueError):
+                self.error('listing')
+                time.sleep(self.poll_interval)
+                continue
+            now = time.time()
+            shown.update(i for i in range(self.objects)
+                         if self.name(i) in listed)
+            self._mark('listing', [
+                i for i in shown
+                if self.due[i] <= now and self.name(i) not in listed], now)
+            time.sleep(self.poll_interval)
+
+    def poll_stats(self):
+        # the count can't tell which objects went, so the earliest due are
+        # taken to have gone first, as many as the count dropped below the
+        # highest it reached
+        order = sorted(range(self.objects), key=lambda i: self.due[i])
+        peak = 0
+        session = self.session()
+        while not self.done.is_set():
+            try:
+                response = session.head(self.c_url)
+                response.raise_for_status()
+            except requests.RequestException:
+                self.error('count')
+                time.sleep(self.poll_interval)
+                continue
+            now = time.time()
+            count = int(response.headers.get('x-container-object-count', 0))
+            peak = max(peak, count)
+            self._mark('count', [i for i in order if self.due[i] <= now]
+                       [:peak - count], now)
+            time.sleep(self.poll_interval)
+
+    def complete(self):
+        return all(None not in seen for seen in self.seen.values())
+
+    def run(self):
+        """Returns {metric: [lateness per object, None if never gone]}."""
+        session = self.session()
+        session.put(self.c_url).raise_for_status()
+
+        try:
+            self.create()
+
+            pollers = [threading.Thread(target=self.poll_get),
+                       threading.Thread(target=self.poll_listing),
+                       threading.Thread(target=self.poll_stats)]
+            for poller in pollers:
+                poller.daemon = True
+                poller.start()
+
+            deadline = max(self.due) + self.timeout
+            while not self.complete() and time.time() < deadline:
+                time.sleep(self.poll_interval)
+            self.done.set()
+            for poller in pollers:
+                poller.join()
+        finally:
+            self.done.set()
+            bulk.delete_container(session, self.c_url)
+
+        return dict(
+            (metric, [gone - due if gone is not None else None
+                      for due, gone in zip(self.due, seen_at)])
+            for metric, seen_at in self.seen.items())
+
+
+def format_report(lateness, errors):
+    lines = ["%-8s %6s %6s %6s %6s %9s %9s %9s %9s %9s" % (
+        'metric', 'gone', 'stayed', 'early', 'errors', 'min s', 'p50 s',
+        'p90 s', 'p99 s', 'max s')]
+    for metric in METRICS:
+        gone = [value for value in lateness[metric] if value is not None]
+        row = [performance.percentile(gone, p) for p in (0, 50, 90, 99, 100)]
+        lines.append("%-8s %6i %6i %6i %6i" % (
+            metric, len(gone), len(lateness[metric]) - len(gone),
+            len([value for value in gone if value < 0]), errors[metric]) +
+            "".join(" %9.1f" % value if value is not None else
+                    " %9s" % '-' for value in row))
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure how late expiring objects disappear.")
+    parser.add_argument('--objects', type=int)
+    parser.add_argument('--after', type=int, nargs=2,
+                        metavar=('MIN', 'MAX'),
+                        help="range of X-Delete-After seconds")
+    parser.add_argument('--timeout', type=float,
+                        help="seconds to wait after the last X-Delete-At")
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args(argv)
+
+    config = openstack_api_conformance.get_configuration()
+    settings = dict(DEFAULTS)
+    settings.update(config.expiry or {})
+    for key in ('objects', 'after', 'timeout'):
+        if getattr(args, key):
+            settings[key] = getattr(args, key)
+
+    token_id, url = swift.authenticate(config['swift'])
+    probe = Probe(token_id, url, int(settings['objects']), settings['after'],
+                  float(settings['timeout']), float(settings['poll_interval']),
+                  int(settings['concurrency']))
+    lateness = probe.run()
+
+    print(format_report(lateness, probe.errors))
+
+    if not args.no_save:
+        recorder = performance.Recorder()
+        for metric, values in lateness.items():
+            for value in values:
+                recorder.add('expiry_%s_lateness' % metric,
+                             max(value or 0.0, 0.0), value is not None)
+        for metric, count in probe.errors.items():
+            for _ in range(count):
+                recorder.add('expiry_%s_poll' % metric, 0.0, False)
+        recorder.finished = time.time()
+        results.save(recorder, config, kind='expiry')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+import atexit
+import threading
+import uuid
+from multiprocessing.pool import ThreadPool
+
+import requests
+
+from openstack_api_conformance import swift
+from openstack_api_conformance.swift import bulk
+
+# Containers shared by the tests of a run. Tests acquire() a container by name
+# prefix and release() it in tearDown; the next test to acquire it gets it
+# back emptied, with its metadata, ACLs and versioning removed, which costs a
+# listing, the deletes and a POST instead of a PUT and DELETE of a container.
+# Containers are created when first needed, or concurrently ahead of time
+# with provision(), and all deleted when the run exits. Every acquire()
+# refreshes the container's swift.HEARTBEAT, and one the sweeper removed
+# while it was free is replaced. The pool also caches the account's TempURL
+# key.
+#
+#     @classmethod
+#     def setUpClass(cls):
+#         cls.pool = fixtures.pool(config)
+#         # the tests of a class run one at a time
+#         cls.pool.provision('tmpu-', 1)
+#
+#     def setUp(self):
+#         self.c_name = self.pool.acquire('tmpu-')
+#         self.c_url = self.pool.url + '/' + self.c_name
+#
+#     def tearDown(self):
+#         self.pool.release(self.c_name)
+
+# container headers a test may have set, removed by sending them empty
+RESET_HEADERS = ('x-container-read', 'x-container-write')
+
+_pools = {}
+_lock = threading.Lock()
+
+
+def pool(config, concurrency=8):
+    """The ContainerPool of the account of the swift config."""
+    key = (config.auth_url, config.username, config.tenantId)
+    with _lock:
+        if key not in _pools:
+            _pools[key] = ContainerPool(config, concurrency)
+        return _pools[key]
+
+
+class ContainerPool(object):
+
+    def __init__(self, config, concurrency=8):
+        self.config = config
+        self.concurrency = concurrency
+        self.token_id, self.url = swift.authenticate(config)
+        self.session = requests.Session()
+        self.session.headers.update({'X-Auth-Token': self.token_id})
+
+        # prefix by container, and the containers free for use per prefix
+        self.prefixes = {}
+        self.free = {}
+        self.lock = threading.Lock()
+        self._tempurl_key = None
+        atexit.register(self.close)
+
+    def c_url(self, name):
+        return self.url + '/' + name
+
+    def create(self, prefix, headers=None):
+        name = prefix + uuid.uuid4().hex[:8]
+        self.session.put(self.c_url(name),
+                         headers=swift.heartbeat(headers)).raise_for_status()
+        with self.lock:
+            self.prefixes[name] = prefix
+        return name
+
+    def provision(self, prefix, count):
+        """Creates containers concurrently until `count` are free."""
+        with self.lock:
+            missing = count - len(self.free.get(prefix, ()))
+        if missing <= 0:
+            return
+
+        workers = ThreadPool(min(missing, self.concurrency))
+        try:
+            names = workers.map(lambda _: self.create(prefix),
+                                range(missing))
+        finally:
+            workers.close()
+        with self.lock:
+            self.free.setdefault(prefix, []).extend(names)
+
+    def reset(self, name, headers=None):
+        """Empties the container and replaces its metadata by headers."""
+        c_url = self.c_url(name)
+        bulk.empty_container(self.session, c_url, self.concurrency)
+
+        response = self.session.head(c_url)
+        response.raise_for_status()
+        reset = dict(
+            (header, '') for header in response.headers
+            if header.lower().startswith('x-container-meta-') or
+            header.lower() in RESET_HEADERS)
+        if 'x-versions-location' in response.headers:
+            reset['X-Remove-Versions-Location'] = 'x'
+
+        lowered = set(header.lower() for header in headers or {})
+        reset = dict((header, value) for header, value in reset.items()
+                     if header.lower() not in lowered)
+        reset.update(headers or {})
+        if reset:
+            self.session.post(c_url, headers=reset).raise_for_status()
+
+    def acquire(self, prefix, headers=None):
+        """
+        The name of an empty container starting with prefix, for the caller
+        alone until released, with headers as its only metadata.
+        """
+        with self.lock:
+            free = self.free.get(prefix)
+            name = free.pop() if free else None
+
+        if name is not None:
+            try:
+                self.reset(name, swift.heartbeat(headers))
+                return name
+            except requests.HTTPError as e:
+                if e.response.status_code != 404:
+                    raise
+                # swept while free
+                with self.lock:
+                    del self.prefixes[name]
+        return self.create(prefix, headers)
+
+    def release(self, name):
+        """Returns a container to the pool, as the caller left it."""
+        with self.lock:
+            self.free.setdefault(self.prefixes[name], []).append(name)
+
+    def tempurl_key(self):
+        """The account's TempURL key, set to a new one if there is none."""
+        if self._tempurl_key is None:
+            response = self.session.head(self.url)
+            response.raise_for_status()
+            key = response.headers.get('X-Account-Meta-Temp-URL-Key')
+            if not key:
+                key = str(uuid.uuid4())
+                self.session.post(self.url, headers={
+                    'X-Account-Meta-Temp-URL-Key': key}).raise_for_status()
+            self._tempurl_key = key
+        return self._tempurl_key
+
+    def close(self):
+        """Deletes every container of the pool."""
+        with self.lock:
+            names = list(self.prefixes)
+            self.prefixes.clear()
+            self.free.clear()
+        if not names:
+            return
+
+        workers = ThreadPool(min(len(names), self.concurrency))
+        try:
+            workers.map(lambda name: bulk.delete_container(
+                self.session, self.c_url(name)), names)
+        finally:
+            workers.close()
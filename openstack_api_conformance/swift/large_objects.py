@@ -0,0 +1,246 @@
+from __future__ import print_function
+
+import argparse
+import hashlib
+import json
+import sys
+import time
+import uuid
+from multiprocessing.pool import ThreadPool
+
+import requests
+
+import openstack_api_conformance
+from openstack_api_conformance import payload
+from openstack_api_conformance import performance
+from openstack_api_conformance import results
+from openstack_api_conformance import swift
+from openstack_api_conformance.swift import bulk
+
+# Static and Dynamic Large Objects: segments are uploaded in parallel, then
+# the manifest is PUT and the object downloaded again, streamed as one GET or
+# as parallel ranges, and compared byte for byte with the payload. The
+# benchmark runs every combination of segment size and concurrency to show
+# the trade-off between the two.
+#
+#     "large_objects": {
+#         "size": 268435456,
+#         "segment_sizes": [1048576, 16777216, 104857600],
+#         "concurrency": [1, 4, 16],
+#         "types": ["slo"]
+#     }
+#
+# Combinations needing more segments than the max_manifest_segments the
+# cluster publishes on /info (1000 if it doesn't) are skipped.
+#
+#     python -m openstack_api_conformance.swift.large_objects \
+#         --segment-sizes 4194304 --concurrency 8 32
+
+DEFAULTS = {
+    'size': 256 * 1024 * 1024,
+    'segment_sizes': [1048576, 16777216, 104857600],
+    'concurrency': [1, 4, 16],
+    'types': ['slo'],
+}
+
+# Swift's default, for clusters not publishing their limit
+MAX_MANIFEST_SEGMENTS = 1000
+
+
+def segment_ranges(size, segment_size):
+    return [(start, min(start + segment_size, size))
+            for start in range(0, max(size, 1), segment_size)]
+
+
+def container_path(c_url):
+    return '/' + c_url.rsplit('/', 1)[1]
+
+
+def upload_segments(session, c_url, prefix, data, segment_size,
+                    concurrency=1):
+    """
+    PUTs data as segments prefix + '00000000', ... into the container at
+    c_url, `concurrency` at a time. Returns the SLO manifest; raises
+    ValueError when swift returns a different ETag than the payload's.
+    """
+    def put(args):
+        i, (start, end) = args
+        name = '%s%08i' % (prefix, i)
+        response = session.put(c_url + '/' + name,
+                               data=data.open(start, end))
+        response.raise_for_status()
+        etag = data.md5(start, end)
+        if response.headers.get('etag', '').strip('"') != etag:
+            raise ValueError("segment %s: etag %s, expected %s" % (
+                name, response.headers.get('etag'), etag))
+        return {
+            'path': container_path(c_url) + '/' + name,
+            'etag': etag,
+            'size_bytes': end - start,
+        }
+
+    pool = ThreadPool(concurrency)
+    try:
+        return pool.map(put, enumerate(segment_ranges(len(data),
+                                                      segment_size)))
+    finally:
+        pool.close()
+
+
+def manifest_etag(manifest):
+    """The ETag of a large object: the MD5 of its segments' ETags."""
+    return hashlib.md5(''.join(
+        segment['etag'] for segment in manifest).encode('ascii')).hexdigest()
+
+
+def put_slo(session, o_url, manifest):
+    return session.put(o_url + '?multipart-manifest=put',
+                       data=json.dumps(manifest))
+
+
+def put_dlo(session, o_url, c_url, prefix):
+    return session.put(o_url, data='', headers={
+        'X-Object-Manifest': container_path(c_url)[1:] + '/' + prefix})
+
+
+def download(session, o_url, data, concurrency=1):
+    """
+    GETs o_url as one streamed request, or as `concurrency` parallel ranges,
+    comparing every byte with data. Returns the offset of the first byte that
+    differs or is missing, None if the whole object matches.
+    """
+    def get(args):
+        start, end = args
+        headers = {}
+        if concurrency > 1:
+            headers['Range'] = 'bytes=%i-%i' % (start, end - 1)
+        response = session.get(o_url, headers=headers, stream=True)
+        if response.status_code not in (200, 206):
+            return start
+
+        offset = start
+        for chunk in response.iter_content(payload.BLOCK):
+            mismatch = data.mismatch(chunk, offset)
+            if mismatch is not None:
+                response.close()
+                return mismatch
+            offset += len(chunk)
+        return offset if offset != end else None
+
+    if concurrency <= 1:
+        return get((0, len(data)))
+
+    part = -(-len(data) // concurrency)
+    pool = ThreadPool(concurrency)
+    try:
+        mismatches = [mismatch for mismatch in pool.map(
+            get, segment_ranges(len(data), part)) if mismatch is not None]
+    finally:
+        pool.close()
+    return min(mismatches) if mismatches else None
+
+
+def benchmark(session, url, data, kind, segment_size, concurrency,
+              recorder):
+    """Uploads, downloads and deletes one large object; returns a row."""
+    c_url = url + '/slo-' + uuid.uuid4().hex
+    o_url = c_url + '/object'
+    label = '%s@%ix%i' % (kind, segment_size, concurrency)
+    session.put(c_url).raise_for_status()
+
+    try:
+        start = time.time()
+        manifest = upload_segments(session, c_url, 'segments/', data,
+                                   segment_size, concurrency)
+        uploaded = time.time()
+        if kind == 'slo':
+            response = put_slo(session, o_url, manifest)
+        else:
+            response = put_dlo(session, o_url, c_url, 'segments/')
+        manifested = time.time()
+        recorder.add(label + '_upload', uploaded - start)
+        recorder.add(label + '_manifest', manifested - uploaded, response.ok)
+
+        mismatch = download(session, o_url, data, concurrency)
+        downloaded = time.time()
+        recorder.add(label + '_download', downloaded - manifested,
+                     mismatch is None)
+    finally:
+        bulk.delete_container(session, c_url)
+
+    return (kind, segment_size, concurrency, len(manifest),
+            uploaded - start, manifested - uploaded,
+            downloaded - manifested, mismatch)
+
+
+def format_report(size, rows):
+    lines = ["%-4s %10s %5s %8s %10s %9s %10s  %s" % (
+        'type', 'segment', 'conc', 'segments', 'up MiB/s', 'manif ms',
+        'down MiB/s', 'verified')]
+    mib = size / 1048576.0
+    for (kind, segment_size, concurrency, segments, upload, manifest,
+         download_time, mismatch) in rows:
+        lines.append("%-4s %10i %5i %8i %10.1f %9.1f %10.1f  %s" % (
+            kind, segment_size, concurrency, segments,
+            mib / max(upload, 1e-9), manifest * 1000,
+            mib / max(download_time, 1e-9),
+            'ok' if mismatch is None else 'differs at %i' % mismatch))
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure large object throughput by segment size and "
+                    "concurrency.")
+    parser.add_argument('--size', type=int, help="bytes")
+    parser.add_argument('--segment-sizes', type=int, nargs='+')
+    parser.add_argument('--concurrency', type=int, nargs='+')
+    parser.add_argument('--types', nargs='+', choices=('slo', 'dlo'))
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args(argv)
+
+    config = openstack_api_conformance.get_configuration()
+    settings = dict(DEFAULTS)
+    settings.update(config.large_objects or {})
+    for key in ('size', 'segment_sizes', 'concurrency', 'types'):
+        if getattr(args, key):
+            settings[key] = getattr(args, key)
+
+    token_id, url = swift.authenticate(config['swift'])
+    session = requests.Session()
+    session.headers.update({'X-Auth-Token': token_id})
+    # one connection per segment in flight
+    adapter = requests.adapters.HTTPAdapter(
+        pool_maxsize=max(int(c) for c in settings['concurrency']))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    max_segments = int(swift.info(url).get('slo', {}).get(
+        'max_manifest_segments', MAX_MANIFEST_SEGMENTS))
+
+    data = payload.Payload(int(settings['size']), 'large_objects')
+    recorder = performance.Recorder()
+    rows = []
+    for kind in settings['types']:
+        for segment_size in settings['segment_sizes']:
+            if len(segment_ranges(len(data), segment_size)) > max_segments:
+                print("skipping %i byte segments: over %i segments" % (
+                    segment_size, max_segments))
+                continue
+            for concurrency in settings['concurrency']:
+                rows.append(benchmark(session, url, data, kind,
+                                      int(segment_size), int(concurrency),
+                                      recorder))
+
+    print(format_report(len(data), rows))
+
+    if not args.no_save:
+        recorder.finished = time.time()
+        results.save(recorder, config, kind='large-objects')
+
+    return 0 if all(row[-1] is None for row in rows) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,256 @@
+from __future__ import print_function
+
+import argparse
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+
+import requests
+
+import openstack_api_conformance
+from openstack_api_conformance import payload
+from openstack_api_conformance import performance
+from openstack_api_conformance import results
+from openstack_api_conformance import swift
+from openstack_api_conformance.swift import bulk
+
+# Ranged reads: building Range headers, reading multipart/byteranges bodies,
+# and a random-access read benchmark. Every thread reads `read_size` bytes at
+# random offsets of a set of large payload objects, `ranges` ranges per
+# request, for `duration` seconds at each concurrency, and compares every
+# byte with the payload; reported are reads (ranges) per second and the
+# request latency.
+#
+#     "ranges": {
+#         "objects": 4,
+#         "object_size": 268435456,
+#         "read_size": 4096,
+#         "ranges": 1,
+#         "concurrency": [1, 16, 64],
+#         "duration": 20
+#     }
+#
+#     python -m openstack_api_conformance.swift.ranges --concurrency 128 \
+#         --read-size 65536
+
+DEFAULTS = {
+    'objects': 4,
+    'object_size': 256 * 1024 * 1024,
+    'read_size': 4096,
+    'ranges': 1,
+    'concurrency': [1, 16, 64],
+    'duration': 20,
+}
+
+CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+
+
+def range_header(ranges):
+    """
+    The Range header for (first, last) byte pairs, inclusive as in HTTP;
+    (None, n) is the last n bytes, (first, None) everything from first.
+    """
+    return 'bytes=' + ','.join(
+        '%s-%s' % ('' if first is None else first,
+                   '' if last is None else last) for first, last in ranges)
+
+
+def content_range(value):
+    """(first, last, length) of a Content-Range; length None for "*"."""
+    match = CONTENT_RANGE.match(value or '')
+    if not match:
+        raise ValueError("invalid content-range %r" % value)
+    first, last, length = match.groups()
+    return int(first), int(last), None if length == '*' else int(length)
+
+
+def byteranges(response):
+    """
+    The parts of a multipart/byteranges response, as (first, last, data)
+    per part in the order sent.
+    """
+    boundary = re.search(r'boundary="?([^";]+)"?',
+                         response.headers['content-type']).group(1)
+    delimiter = b'--' + boundary.encode('ascii')
+
+    parts = []
+    for part in response.content.split(delimiter)[1:]:
+        if part.startswith(b'--'):
+            break
+        head, _, data = part.partition(b'\r\n\r\n')
+        headers = dict(
+            line.decode('latin-1').split(':', 1)
+            for line in head.strip().split(b'\r\n') if b':' in line)
+        headers = dict((k.strip().lower(), v.strip())
+                       for k, v in headers.items())
+        first, last, _ = content_range(headers.get('content-range'))
+        # the part ends at the CRLF before the next delimiter
+        parts.append((first, last, data[:-2]))
+    return parts
+
+
+class Reader(threading.Thread):
+    """Reads random ranges until the deadline, recording every request."""
+
+    def __init__(self, token_id, objects, settings, deadline, recorder,
+                 operation, seed):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.objects = objects
+        self.read_size = int(settings['read_size'])
+        self.ranges = int(settings['ranges'])
+        self.deadline = deadline
+        self.recorder = recorder
+        self.operation = operation
+        self.rng = random.Random(seed)
+        self.session = requests.Session()
+        self.session.headers.update({'X-Auth-Token': token_id})
+        self.reads = 0
+
+    def pick(self, data):
+        """Distinct, ascending, non-adjacent ranges, so none are merged."""
+        slots = len(data) // (2 * self.read_size)
+        if self.ranges == 1:
+            starts = [self.rng.randrange(slots)]
+        else:
+            starts = sorted(self.rng.sample(range(slots), self.ranges))
+        return [(2 * self.read_size * slot,
+                 2 * self.read_size * slot + self.read_size - 1)
+                for slot in starts]
+
+    def verify(self, response, data, ranges):
+        if response.status_code != 206:
+            return False
+        if len(ranges) == 1:
+            parts = [ranges[0] + (response.content,)]
+        else:
+            parts = byteranges(response)
+        return [(first, last) for first, last, _ in parts] == ranges and \
+            all(data.mismatch(part, first) is None
+                for first, _, part in parts)
+
+    def run(self):
+        while time.time() < self.deadline:
+            o_url, data = self.rng.choice(self.objects)
+            ranges = self.pick(data)
+            start = time.time()
+            try:
+                response = self.session.get(
+                    o_url, headers={'Range': range_header(ranges)})
+                ok = self.verify(response, data, ranges)
+            except (requests.RequestException, ValueError):
+                ok = False
+            self.recorder.add(self.operation, time.time() - start, ok)
+            if ok:
+                self.reads += len(ranges)
+
+
+class Benchmark(object):
+
+    def __init__(self, token_id, url, settings):
+        self.token_id = token_id
+        self.url = url
+        self.settings = settings
+        self.c_url = url + '/rng-' + uuid.uuid4().hex
+        self.session = requests.Session()
+        self.session.headers.update({'X-Auth-Token': token_id})
+        self.objects = [
+            (self.c_url + '/%i' % i,
+             payload.Payload(int(settings['object_size']), 'ranges-%i' % i))
+            for i in range(int(settings['objects']))]
+        self.recorder = performance.Recorder()
+
+    def setUp(self):
+        self.session.put(self.c_url).raise_for_status()
+        for o_url, data in self.objects:
+            self.session.put(o_url, data=data.open()).raise_for_status()
+
+    def tearDown(self):
+        bulk.delete_container(self.session, self.c_url)
+
+    def run(self, concurrency):
+        """Returns the reads per second at this concurrency."""
+        operation = 'range_get@c%i' % concurrency
+        duration = float(self.settings['duration'])
+        start = time.time()
+        readers = [Reader(self.token_id, self.objects, self.settings,
+                          start + duration, self.recorder, operation,
+                          concurrency * 1000 + i)
+                   for i in range(concurrency)]
+        for reader in readers:
+            reader.start()
+        for reader in readers:
+            reader.join()
+
+        self.recorder.durations[operation] = time.time() - start
+        return sum(reader.reads for reader in readers) / \
+            self.recorder.durations[operation]
+
+
+def format_report(recorder, rows, read_size):
+    summary = recorder.summary()
+    lines = ["%5s %9s %9s %7s %9s %9s %9s" % (
+        'conc', 'reads/s', 'MiB/s', 'errors', 'p50 ms', 'p90 ms', 'p99 ms')]
+
+    def ms(value):
+        return "%9.1f" % (value * 1000) if value is not None else "%9s" % '-'
+
+    for concurrency, iops in rows:
+        row = summary['range_get@c%i' % concurrency]
+        lines.append("%5i %9.1f %9.1f %7i %s %s %s" % (
+            concurrency, iops, iops * read_size / 1048576.0, row['errors'],
+            ms(row['p50']), ms(row['p90']), ms(row['p99'])))
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure random-access ranged read IOPS and latency.")
+    parser.add_argument('--objects', type=int)
+    parser.add_argument('--object-size', type=int, help="bytes")
+    parser.add_argument('--read-size', type=int, help="bytes per range")
+    parser.add_argument('--ranges', type=int, help="ranges per request")
+    parser.add_argument('--concurrency', type=int, nargs='+')
+    parser.add_argument('--duration', type=float,
+                        help="seconds per concurrency")
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args(argv)
+
+    config = openstack_api_conformance.get_configuration()
+    settings = dict(DEFAULTS)
+    settings.update(config.ranges or {})
+    for key in ('objects', 'object_size', 'read_size', 'ranges',
+                'concurrency', 'duration'):
+        if getattr(args, key):
+            settings[key] = getattr(args, key)
+
+    if int(settings['object_size']) < \
+            2 * int(settings['read_size']) * int(settings['ranges']):
+        parser.error("object_size too small for %s ranges of %s bytes" % (
+            settings['ranges'], settings['read_size']))
+
+    token_id, url = swift.authenticate(config['swift'])
+    benchmark = Benchmark(token_id, url, settings)
+    benchmark.setUp()
+    try:
+        rows = [(int(concurrency), benchmark.run(int(concurrency)))
+                for concurrency in settings['concurrency']]
+    finally:
+        benchmark.tearDown()
+
+    print(format_report(benchmark.recorder, rows,
+                        int(settings['read_size'])))
+
+    if not args.no_save:
+        benchmark.recorder.finished = time.time()
+        results.save(benchmark.recorder, config, kind='ranges')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import numbers
+
+from openstack_api_conformance import schema
+from openstack_api_conformance.schema import Headers, Object, Recent, Response
+
+# Swift responses per release, see schema.py. The release is the "release"
+# of the swift config, falling back to the keystone one.
+
+HTTP_DATE = '%a, %d %b %Y %H:%M:%S GMT'
+
+# grizzly and older use a plain uuid, havana added the timestamp suffix
+TRANS_IDS = {
+    'folsom': r"^tx[0-9a-f]{32}$",
+    'grizzly': r"^tx[0-9a-f]{32}$",
+    'havana': r"^tx[0-9a-f]{21}-[0-9a-f]{10}$",
+    'icehouse': r"^tx[0-9a-f]{21}-[0-9a-f]{10}$",
+}
+# without a known release, either form
+DEFAULT_TRANS_ID = r"^tx[0-9a-f]{20,32}(-[0-9a-f]{10})?$"
+
+TIMESTAMP = r"^\d+\.\d+$"
+COUNT = r"^\d+$"
+ETAG = r'^"?[0-9a-f]{32}"?$'
+
+_validators = {}
+
+
+def definitions(release):
+    common = {
+        'x-trans-id': TRANS_IDS.get(release, DEFAULT_TRANS_ID),
+        'date': Recent(HTTP_DATE, 10),
+    }
+
+    account = dict(common, **{
+        'date': Recent(HTTP_DATE, 2),
+        'x-timestamp': TIMESTAMP,
+        'x-account-bytes-used': COUNT,
+        'x-account-container-count': COUNT,
+        'x-account-object-count': COUNT,
+    })
+    container = dict(common, **{
+        'x-timestamp': TIMESTAMP,
+        'x-container-bytes-used': COUNT,
+        'x-container-object-count': COUNT,
+    })
+    obj = dict(common, **{
+        'x-timestamp': TIMESTAMP,
+        'etag': ETAG,
+        'last-modified': None,
+        'content-length': COUNT,
+    })
+
+    account_listing = [{
+        'name': None,
+        'count': numbers.Integral,
+        'bytes': numbers.Integral,
+    }]
+    container_listing = [Object({
+        'name': None,
+        'hash': r"^[0-9a-f]{32}$",
+        'bytes': numbers.Integral,
+        'content_type': None,
+        'last_modified': r"^\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d(\.\d+)?$",
+    }, extra=True)]
+
+    return {
+        'common_headers': Headers(common),
+        'account_headers': Headers(account),
+        'container_headers': Headers(container),
+        'object_headers': Headers(obj),
+        'account_listing': account_listing,
+        'container_listing': container_listing,
+
+        # responses of the load generator operations, by operation name
+        'account_get': Response((200, 204), Headers(account)),
+        'container_get': Response((200,), Headers(container),
+                                  container_listing),
+        'container_head': Response((204,), Headers(container)),
+        'object_put': Response((201,), Headers(dict(common, etag=ETAG))),
+        'object_get': Response((200,), Headers(obj)),
+        'object_delete': Response((204, 404), Headers(common)),
+        'tempurl_get': Response((200,), Headers(obj)),
+        'formpost': Response((303,), Headers(common)),
+        'cors_preflight': Response((200,), Headers(dict(common, **{
+            'access-control-allow-origin': None,
+            'access-control-allow-methods': None,
+        }))),
+        'staticweb_index': Response((200,), Headers(common)),
+        'error': Response(None, Headers(common)),
+    }
+
+
+def validators(release):
+    """Compiled definitions(release), once per release."""
+    if release not in _validators:
+        _validators[release] = schema.compile_profile(definitions(release))
+    return _validators[release]
+
+
+def for_config(config):
+    """The validators for the release of a whole .testconfig."""
+    return validators((config.swift or {}).get('release') or
+                      (config.keystone or {}).get('release'))
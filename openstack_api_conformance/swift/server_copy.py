@@ -0,0 +1,195 @@
+from __future__ import print_function
+
+import argparse
+import sys
+import time
+import uuid
+
+import requests
+
+import openstack_api_conformance
+from openstack_api_conformance import payload
+from openstack_api_conformance import performance
+from openstack_api_conformance import results
+from openstack_api_conformance import swift
+from openstack_api_conformance.swift import bulk
+
+# Server-side copy: COPY with a Destination, PUT with X-Copy-From and the S3
+# PUT with x-amz-copy-source, against downloading the object and uploading it
+# again from the client. The benchmark copies objects of increasing size
+# within a container, across containers and through S3, and reports the
+# latency of the copy request, which is all proxy-side work, and the
+# resulting throughput, to show where server-side copy stops paying off.
+#
+#     "server_copy": {
+#         "sizes": [1024, 1048576, 16777216, 134217728],
+#         "repeat": 3
+#     }
+#
+# The S3 copy runs when s3_access is configured for swift.
+#
+#     python -m openstack_api_conformance.swift.server_copy \
+#         --sizes 1048576 1073741824
+
+DEFAULTS = {
+    'sizes': [1024, 1048576, 16777216, 134217728],
+    'repeat': 3,
+}
+
+METHODS = ('copy', 'copy_from', 's3', 'reupload')
+
+
+def copy(session, o_url, destination, headers=None):
+    """COPY o_url to destination, "/container/object"."""
+    headers = dict(headers or {}, Destination=destination)
+    return session.request('COPY', o_url, headers=headers)
+
+
+def copy_from(session, o_url, source, headers=None):
+    """PUT o_url as a copy of source, "/container/object"."""
+    headers = dict(headers or {}, **{'X-Copy-From': source})
+    return session.put(o_url, data='', headers=headers)
+
+
+def s3_copy(config, source, destination):
+    """PUT destination as an S3 copy of source, both "/bucket/key"."""
+    url = config['s3_base'] + destination
+    headers = {'x-amz-copy-source': source}
+    swift.sign_headers('PUT', '/' + url.split('/', 3)[-1], headers,
+                       config=config)
+    return requests.put(url, headers=headers)
+
+
+def reupload(session, source_url, o_url):
+    """Downloads source_url and streams it back up as o_url."""
+    response = session.get(source_url, stream=True)
+    response.raise_for_status()
+    return session.put(o_url, data=response.iter_content(payload.BLOCK))
+
+
+class Benchmark(object):
+    """Copies a source object per size with every method."""
+
+    def __init__(self, session, url, config):
+        self.session = session
+        self.url = url
+        self.config = config
+        self.containers = ['cp-' + uuid.uuid4().hex for _ in range(2)]
+        self.recorder = performance.Recorder()
+
+    def setUp(self):
+        for container in self.containers:
+            self.session.put(self.url + '/' + container).raise_for_status()
+
+    def tearDown(self):
+        for container in self.containers:
+            bulk.delete_container(self.session, self.url + '/' + container)
+
+    def methods(self):
+        return [method for method in METHODS
+                if method != 's3' or self.config.get('s3_access')]
+
+    def copy(self, method, source, destination):
+        if method == 'copy':
+            return copy(self.session, self.url + source, destination)
+        if method == 'copy_from':
+            return copy_from(self.session, self.url + destination, source)
+        if method == 's3':
+            return s3_copy(self.config, source, destination)
+        return reupload(self.session, self.url + source,
+                        self.url + destination)
+
+    def run(self, size, repeat):
+        data = payload.Payload(size, 'copy')
+        source = '/%s/source-%i' % (self.containers[0], size)
+        self.session.put(self.url + source,
+                         data=data.open()).raise_for_status()
+
+        for method in self.methods():
+            # COPY stays within the container, the others cross over
+            container = self.containers[0 if method == 'copy' else 1]
+            for i in range(repeat):
+                destination = '/%s/%s-%i-%i' % (container, method, size, i)
+                start = time.time()
+                response = self.copy(method, source, destination)
+                seconds = time.time() - start
+
+                head = self.session.head(self.url + destination)
+                self.recorder.add(
+                    '%s@%i' % (method, size), seconds,
+                    response.ok and
+                    head.headers.get('etag', '').strip('"') == data.md5())
+                self.session.delete(self.url + destination)
+
+        self.session.delete(self.url + source)
+
+
+def format_report(recorder, sizes, methods):
+    summary = recorder.summary()
+    lines = ["%12s" % 'size' + "".join(
+        " %12s %9s" % (method + ' ms', 'MiB/s') for method in methods) +
+        " %9s" % 'speedup']
+    for size in sizes:
+        line = "%12i" % size
+        p50s = {}
+        for method in methods:
+            row = summary.get('%s@%i' % (method, size))
+            if not row or row['p50'] is None:
+                line += " %12s %9s" % ('-', '-')
+                continue
+            p50s[method] = row['p50']
+            line += " %12.1f %9.1f" % (row['p50'] * 1000,
+                                       size / 1048576.0 / row['p50'])
+
+        # the best server-side copy over download and upload
+        server_side = [p50s[m] for m in methods
+                       if m != 'reupload' and m in p50s]
+        if server_side and 'reupload' in p50s:
+            line += " %8.2fx" % (p50s['reupload'] / min(server_side))
+        else:
+            line += " %9s" % '-'
+        lines.append(line)
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare server-side copy with downloading and "
+                    "uploading again.")
+    parser.add_argument('--sizes', type=int, nargs='+', help="bytes")
+    parser.add_argument('--repeat', type=int)
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args(argv)
+
+    config = openstack_api_conformance.get_configuration()
+    settings = dict(DEFAULTS)
+    settings.update(config.server_copy or {})
+    for key in ('sizes', 'repeat'):
+        if getattr(args, key):
+            settings[key] = getattr(args, key)
+
+    token_id, url = swift.authenticate(config['swift'])
+    session = requests.Session()
+    session.headers.update({'X-Auth-Token': token_id})
+
+    benchmark = Benchmark(session, url, config['swift'])
+    benchmark.setUp()
+    try:
+        for size in settings['sizes']:
+            benchmark.run(int(size), int(settings['repeat']))
+    finally:
+        benchmark.tearDown()
+
+    print(format_report(benchmark.recorder, settings['sizes'],
+                        benchmark.methods()))
+
+    if not args.no_save:
+        benchmark.recorder.finished = time.time()
+        results.save(benchmark.recorder, config, kind='server-copy')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,350 @@
+from __future__ import print_function
+
+import argparse
+import sys
+import threading
+import time
+import uuid
+
+import requests
+
+try:
+    from urlparse import urlparse
+except ImportError:
+    from urllib.parse import urlparse
+
+import openstack_api_conformance
+from openstack_api_conformance import performance
+from openstack_api_conformance import results
+from openstack_api_conformance import swift
+
+# Proxy cache staleness: changes container or account metadata the tests
+# depend on (ACLs, CORS, TempURL keys, StaticWeb) and probes the behaviour
+# that depends on it from several connections, optionally on several proxies,
+# measuring how long the old behaviour is still served.
+#
+#     "staleness": {
+#         "kinds": ["acl_grant", "acl_revoke", "cors", "tempurl_key",
+#                   "staticweb"],
+#         "iterations": 5,
+#         "endpoints": ["https://proxy1:8080", "https://proxy2:8080"],
+#         "connections": 4,
+#         "warmup": 2,
+#         "confirm": 20,
+#         "timeout": 60,
+#         "poll_interval": 0.01
+#     }
+#
+# Endpoints replace scheme, host and port of the storage URL; by default only
+# the storage URL from the catalog is probed.
+#
+#     python -m openstack_api_conformance.swift.staleness --kinds cors
+
+DEFAULTS = {
+    'kinds': ['acl_grant', 'acl_revoke', 'cors', 'tempurl_key', 'staticweb'],
+    'iterations': 5,
+    'endpoints': [],
+    'connections': 4,
+    'warmup': 2,
+    'confirm': 20,
+    'timeout': 60,
+    'poll_interval': 0.01,
+}
+
+KINDS = {}
+
+CORS_ORIGIN = 'http://www.foo.com'
+OTHER_ORIGIN = 'http://www.bar.com'
+
+
+def kind(name):
+    def register(cls):
+        KINDS[name] = cls
+        return cls
+    return register
+
+
+def rebase(url, endpoint):
+    """Points url at another proxy, keeping the path and query."""
+    if not endpoint:
+        return url
+
+    parsed = urlparse(url)
+    return endpoint.rstrip('/') + url[len(parsed.scheme + '://' +
+                                          parsed.netloc):]
+
+
+class Change(object):
+    """
+    A metadata change. setUp establishes the old behaviour; subclasses add
+    apply(), making the change, and probe(http, endpoint), True once the new
+    behaviour is served through the session http.
+    """
+
+    def __init__(self, session, url):
+        self.session = session
+        self.url = url
+        self.c_url = url + '/stale-' + uuid.uuid4().hex
+        self.o_url = self.c_url + '/index.html'
+
+    def setUp(self):
+        self.session.put(self.c_url).raise_for_status()
+        self.session.put(self.o_url, data="<!-- meh -->",
+                         headers={"content-type": "text/html"}
+                         ).raise_for_status()
+
+    def tearDown(self):
+        self.session.delete(self.o_url)
+        self.session.delete(self.c_url)
+
+
+@kind('acl_grant')
+class AclGrant(Change):
+
+    def apply(self):
+        self.session.post(self.c_url, headers={
+            'X-Container-Read': '.r:*'}).raise_for_status()
+
+    def probe(self, http, endpoint):
+        return http.get(rebase(self.o_url, endpoint)).status_code == 200
+
+
+@kind('acl_revoke')
+class AclRevoke(Change):
+
+    def setUp(self):
+        super(AclRevoke, self).setUp()
+        self.session.post(self.c_url, headers={
+            'X-Container-Read': '.r:*'}).raise_for_status()
+
+    def apply(self):
+        self.session.post(self.c_url, headers={
+            'X-Remove-Container-Read': 'x'}).raise_for_status()
+
+    def probe(self, http, endpoint):
+        return http.get(rebase(self.o_url, endpoint)).status_code == 401
+
+
+@kind('cors')
+class Cors(Change):
+
+    def setUp(self):
+        super(Cors, self).setUp()
+        self.session.post(self.c_url, headers={
+            'X-Container-Meta-Access-Control-Allow-Origin': CORS_ORIGIN,
+        }).raise_for_status()
+
+    def apply(self):
+        self.session.post(self.c_url, headers={
+            'X-Container-Meta-Access-Control-Allow-Origin': OTHER_ORIGIN,
+        }).raise_for_status()
+
+    def probe(self, http, endpoint):
+        return http.options(rebase(self.o_url, endpoint), headers={
+            'Origin': OTHER_ORIGIN,
+            'Access-Control-Request-Method': 'GET',
+        }).status_code == 200
+
+
+@kind('tempurl_key')
+class TempurlKey(Change):
+    # uses the second account key, so TempURLs signed with the first key
+    # elsewhere keep working; a second key already set is restored after
+
+    def setUp(self):
+        super(TempurlKey, self).setUp()
+        self.key = str(uuid.uuid4())
+        response = self.session.head(self.url)
+        response.raise_for_status()
+        self.previous = response.headers.get('X-Account-Meta-Temp-URL-Key-2')
+
+    def apply(self):
+        self.session.post(self.url + '/', headers={
+            'X-Account-Meta-Temp-URL-Key-2': self.key}).raise_for_status()
+
+    def probe(self, http, endpoint):
+        url = swift.tempurl(self.o_url, self.o_url[len(self.url):], self.key,
+                            int(time.time() + 60))
+        return http.get(rebase(url, endpoint)).status_code == 200
+
+    def tearDown(self):
+        if self.previous:
+            self.session.post(self.url + '/', headers={
+                'X-Account-Meta-Temp-URL-Key-2': self.previous})
+        else:
+            self.session.post(self.url + '/', headers={
+                'X-Remove-Account-Meta-Temp-URL-Key-2': 'x'})
+        super(TempurlKey, self).tearDown()
+
+
+@kind('staticweb')
+class StaticWeb(Change):
+
+    def setUp(self):
+        super(StaticWeb, self).setUp()
+        self.session.post(self.c_url, headers={
+            'X-Container-Read': '.r:*'}).raise_for_status()
+
+    def apply(self):
+        self.session.post(self.c_url, headers={
+            'X-Container-Meta-Web-Index': 'index.html'}).raise_for_status()
+
+    def probe(self, http, endpoint):
+        return http.get(rebase(self.c_url + '/', endpoint)).text == \
+            "<!-- meh -->"
+
+
+class Measurement(object):
+    """Probes one change from every connection to every endpoint."""
+
+    def __init__(self, change, endpoints, connections=4, warmup=2,
+                 confirm=20, timeout=60, poll_interval=0.01):
+        self.change = change
+        self.endpoints = endpoints or [None]
+        self.connections = connections
+        self.warmup = warmup
+        self.confirm = confirm
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+        self.applied = None
+        self.last_stale = dict((endpoint, None) for endpoint in self.endpoints)
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+
+    def prober(self, endpoint, fresh_counts, index):
+        http = requests.Session()
+        while not self.stop.is_set():
+            start = time.time()
+            try:
+                fresh = self.change.probe(http, endpoint)
+            except requests.RequestException:
+                fresh = False
+
+            # only probes sent after the change completed count
+            if self.applied is not None and start >= self.applied:
+                if fresh:
+                    fresh_counts[index] += 1
+                else:
+                    fresh_counts[index] = 0
+                    with self.lock:
+                        self.last_stale[endpoint] = max(
+                            self.last_stale[endpoint] or 0, start)
+
+            time.sleep(self.poll_interval)
+
+    def run(self):
+        """Returns {endpoint: seconds the old behaviour was served, or None
+        if it still was at the timeout}."""
+        self.change.setUp()
+        fresh_counts = [0] * (len(self.endpoints) * self.connections)
+        threads = []
+        for e, endpoint in enumerate(self.endpoints):
+            for c in range(self.connections):
+                thread = threading.Thread(
+                    target=self.prober,
+                    args=(endpoint, fresh_counts, e * self.connections + c))
+                thread.daemon = True
+                threads.append(thread)
+
+        try:
+            for thread in threads:
+                thread.start()
+
+            # let the proxies cache the old behaviour
+            time.sleep(self.warmup)
+            self.change.apply()
+            self.applied = time.time()
+
+            deadline = self.applied + self.timeout
+            while min(fresh_counts) < self.confirm and \
+                    time.time() < deadline:
+                time.sleep(self.poll_interval)
+            converged = min(fresh_counts) >= self.confirm
+        finally:
+            self.stop.set()
+            for thread in threads:
+                thread.join()
+            self.change.tearDown()
+
+        staleness = {}
+        for e, endpoint in enumerate(self.endpoints):
+            counts = fresh_counts[e * self.connections:
+                                  (e + 1) * self.connections]
+            if not converged and min(counts) < self.confirm:
+                staleness[endpoint] = None
+            else:
+                last = self.last_stale[endpoint]
+                staleness[endpoint] = last - self.applied if last else 0.0
+
+        return staleness
+
+
+def format_report(report):
+    lines = ["%-12s %-32s %5s %5s %9s %9s %9s" % (
+        'change', 'endpoint', 'runs', 'stuck', 'p50 ms', 'p90 ms', 'max ms')]
+    for name, endpoint, values in report:
+        seen = [v for v in values if v is not None]
+        row = [performance.percentile(seen, p) for p in (50, 90, 100)]
+        lines.append("%-12s %-32s %5i %5i" % (
+            name, (endpoint or 'catalog')[-32:], len(values),
+            len(values) - len(seen)) +
+            "".join(" %9.1f" % (v * 1000) if v is not None else " %9s" % '-'
+                    for v in row))
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure how long proxies serve stale metadata.")
+    parser.add_argument('--kinds', nargs='+', choices=sorted(KINDS))
+    parser.add_argument('--iterations', type=int)
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args(argv)
+
+    config = openstack_api_conformance.get_configuration()
+    settings = dict(DEFAULTS)
+    settings.update(config.staleness or {})
+    if args.kinds:
+        settings['kinds'] = args.kinds
+    if args.iterations:
+        settings['iterations'] = args.iterations
+
+    token_id, url = swift.authenticate(config['swift'])
+    session = requests.Session()
+    session.headers.update({'X-Auth-Token': token_id})
+
+    recorder = performance.Recorder()
+    report = []
+    for name in settings['kinds']:
+        per_endpoint = {}
+        for _ in range(int(settings['iterations'])):
+            staleness = Measurement(
+                KINDS[name](session, url),
+                settings['endpoints'],
+                int(settings['connections']),
+                float(settings['warmup']),
+                int(settings['confirm']),
+                float(settings['timeout']),
+                float(settings['poll_interval'])).run()
+
+            for endpoint, value in staleness.items():
+                per_endpoint.setdefault(endpoint, []).append(value)
+                recorder.add('stale_%s' % name, value or 0.0,
+                             value is not None)
+
+        for endpoint in sorted(per_endpoint, key=str):
+            report.append((name, endpoint, per_endpoint[endpoint]))
+
+    print(format_report(report))
+
+    if not args.no_save:
+        recorder.finished = time.time()
+        results.save(recorder, config, kind='staleness')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
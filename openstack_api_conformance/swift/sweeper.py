@@ -0,0 +1,207 @@
+from __future__ import print_function
+
+import argparse
+import re
+import sys
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+
+import requests
+
+import openstack_api_conformance
+from openstack_api_conformance import swift
+from openstack_api_conformance.swift import bulk
+
+# Orphan sweeper: containers the tests and tools leave behind when a run is
+# interrupted or a teardown fails, found by paging through the account
+# listing per name prefix. Only the prefix followed by the hex or uuid the
+# suite appends matches, plus a few fixed fixture names. Matching containers
+# neither created nor marked in use for `min_age` seconds are emptied with
+# bulk deletes, or concurrent DELETEs without the bulk middleware, and
+# deleted; all requests together are kept under `rate` per second. Runs mark
+# the containers they use with swift.HEARTBEAT, refreshed while they are in
+# use, so the pool's, the load fixture and /foo of a run in progress are left
+# alone however long ago they were created.
+#
+#     "sweeper": {
+#         "prefixes": ["chup-", "alta-", "tmpu-", ...],
+#         "names": ["foo"],
+#         "min_age": 3600,
+#         "concurrency": 8,
+#         "rate": 20
+#     }
+#
+#     python -m openstack_api_conformance.swift.sweeper --dry-run
+
+DEFAULTS = {
+    'prefixes': ['acl-', 'alta-', 'bulk-', 'chup-', 'cons-', 'cors-', 'cp-',
+                 'ct-', 'exp-', 'fix-', 'fp-', 'lm-', 'load-', 'perf-',
+                 'rng-', 'slo-', 'stale-', 'sw-', 'sw3-', 'swp-', 'tmpu-'],
+    'names': ['foo'],
+    'min_age': 3600,
+    'concurrency': 8,
+    'rate': 20,
+}
+
+
+class RateLimitedSession(requests.Session):
+    """A session sending at most `rate` requests per second, all threads."""
+
+    def __init__(self, rate):
+        requests.Session.__init__(self)
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next = time.time()
+        self.lock = threading.Lock()
+
+    def request(self, *args, **kwargs):
+        with self.lock:
+            now = time.time()
+            wait = self.next - now
+            self.next = max(self.next, now) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+        return requests.Session.request(self, *args, **kwargs)
+
+
+def matcher(prefixes, names=()):
+    """A function telling whether a container name is one of the suite's."""
+    pattern = re.compile(r"^(%s)[0-9a-f-]{8,36}$" % "|".join(
+        re.escape(prefix) for prefix in prefixes))
+    names = set(names)
+    return lambda name: name in names or bool(pattern.match(name))
+
+
+def listing(session, url, prefix=''):
+    """Yields the account's containers starting with prefix, page by page."""
+    marker = ''
+    while True:
+        response = session.get(url, params={'prefix': prefix,
+                                            'marker': marker},
+                               headers={'accept': 'application/json'})
+        response.raise_for_status()
+        if response.status_code == 204 or not response.json():
+            return
+        for container in response.json():
+            yield container
+        marker = response.json()[-1]['name']
+
+
+def candidates(session, url, prefixes, names=()):
+    """The containers of the account matching prefixes or names."""
+    matches = matcher(prefixes, names)
+    found = {}
+    for prefix in sorted(set(prefixes) | set(names)):
+        for container in listing(session, url, prefix):
+            if matches(container['name']):
+                found[container['name']] = container
+    return [found[name] for name in sorted(found)]
+
+
+def age(session, c_url, now=None):
+    """
+    Seconds since the container was created or its heartbeat last refreshed,
+    None if it is gone.
+    """
+    response = session.head(c_url)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    alive = 0.0
+    for header in ('x-timestamp', swift.HEARTBEAT):
+        try:
+            alive = max(alive, float(response.headers.get(header) or 0))
+        except ValueError:
+            pass
+    return (now or time.time()) - alive
+
+
+def sweep(session, url, containers, min_age=3600, dry_run=False,
+          concurrency=8):
+    """
+    Empties and deletes the containers older than min_age. Returns a
+    (container, status) per container, status being 'deleted', 'dry-run',
+    'too new', 'gone' or the HTTP status of the failed container DELETE.
+    """
+    def remove(container):
+        c_url = url + '/' + container['name']
+        seconds = age(session, c_url)
+        if seconds is None:
+            return container, 'gone'
+        if seconds < min_age:
+            return container, 'too new'
+        if dry_run:
+            return container, 'dry-run'
+
+        bulk.empty_container(session, c_url, concurrency)
+        response = session.delete(c_url)
+        if response.status_code in (204, 404):
+            return container, 'deleted'
+        return container, str(response.status_code)
+
+    if not containers:
+        return []
+
+    pool = ThreadPool(min(len(containers), concurrency))
+    try:
+        return pool.map(remove, containers)
+    finally:
+        pool.close()
+
+
+def format_report(swept, dry_run=False):
+    lines = ["%-40s %10s %14s %s" % ('container', 'objects', 'bytes',
+                                      'status')]
+    for container, status in swept:
+        lines.append("%-40s %10i %14i %s" % (
+            container['name'], container.get('count', 0),
+            container.get('bytes', 0), status))
+
+    removed = [container for container, status in swept
+               if status in ('deleted', 'dry-run')]
+    lines.append("%i of %i containers %s, %i objects, %i bytes" % (
+        len(removed), len(swept),
+        'to delete' if dry_run else 'deleted',
+        sum(container.get('count', 0) for container in removed),
+        sum(container.get('bytes', 0) for container in removed)))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Delete containers left behind by interrupted runs.")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="only list what would be deleted")
+    parser.add_argument('--prefixes', nargs='+')
+    parser.add_argument('--min-age', type=float,
+                        help="seconds since a container was created or "
+                        "last in use")
+    parser.add_argument('--concurrency', type=int)
+    parser.add_argument('--rate', type=float, help="requests per second")
+    args = parser.parse_args(argv)
+
+    config = openstack_api_conformance.get_configuration()
+    settings = dict(DEFAULTS)
+    settings.update(config.sweeper or {})
+    for key in ('prefixes', 'min_age', 'concurrency', 'rate'):
+        if getattr(args, key) is not None:
+            settings[key] = getattr(args, key)
+
+    token_id, url = swift.authenticate(config['swift'])
+    session = RateLimitedSession(float(settings['rate']))
+    session.headers.update({'X-Auth-Token': token_id})
+
+    swept = sweep(session, url,
+                  candidates(session, url, settings['prefixes'],
+                             settings['names']),
+                  float(settings['min_age']), args.dry_run,
+                  int(settings['concurrency']))
+    print(format_report(swept, args.dry_run))
+
+    failed = [status for _, status in swept
+              if status not in ('deleted', 'dry-run', 'too new', 'gone')]
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,9 @@
 import openstack_api_conformance
+from openstack_api_conformance import schema
+from openstack_api_conformance import swift
+from openstack_api_conformance.swift import schemas
 
-import calendar
-import json
 import requests
-import time
 import unittest2
 import xml.etree.ElementTree as ET
 
@@ -12,39 +12,22 @@ class Test(unittest2.TestCase):
 
     @classmethod
     def setUpClass(cls):
-        cls.config = openstack_api_conformance.get_configuration()['swift']
+        config = openstack_api_conformance.get_configuration()
+        cls.config = config['swift']
+        cls.validators = schemas.for_config(config)
         if not cls.config:
             cls.skipTest("Swift not configured")
 
-        response = requests.post(cls.config.auth_url + 'v2.0/tokens',
-                                 data=json.dumps({
-                                     'auth': {
-                                         'passwordCredentials': {
-                                             'username': cls.config['username'],
-                                             'password': cls.config['password'],
-                                         },
-                                         'tenantId': cls.config['tenantId'],
-                                     }
-                                 }),
-                                 headers={'content-type': 'application/json'}
-                                 )
-
-        token = response.json()
-
-        cls.tokenId = token['access']['token']['id']
-        object_stores = [
-            service['endpoints'][0]['publicURL']
-            for service in token['access']['serviceCatalog']
-            if service['type'] == 'object-store'
-        ]
-
-        cls.url = object_stores[0]
+        cls.tokenId, cls.url = swift.authenticate(cls.config)
         session = requests.Session()
         session.headers.update({'X-Auth-Token': cls.tokenId})
 
-        session.put(cls.url + "/foo").raise_for_status()
-        session.put(cls.url + "/foo/a", data="abcd").raise_for_status()
-        session.put(cls.url + "/foo/b", data="abcdabcd").raise_for_status()
+        session.put(cls.url + "/foo",
+                    headers=swift.heartbeat()).raise_for_status()
+        session.put(cls.url + "/foo/a", data="abcd",
+                    headers=swift.expiring(cls.config)).raise_for_status()
+        session.put(cls.url + "/foo/b", data="abcdabcd",
+                    headers=swift.expiring(cls.config)).raise_for_status()
 
         # PUT the container again to clear caches
         session.put(cls.url + "/foo").raise_for_status()
@@ -78,21 +61,8 @@ class Test(unittest2.TestCase):
             'X-Account-Meta-foo': 'bar',
         }, response.headers)
 
-        self.assertRegexpMatches(
-            response.headers['x-timestamp'],
-            r"^\d+\.\d+$")
-
-        self.assertRegexpMatches(
-            response.headers['x-trans-id'],
-            r"^tx[0-9a-f]{32}$")
-
-        response_date = time.strptime(
-            response.headers['date'],
-            '%a, %d %b %Y %H:%M:%S GMT')
-
-        response_time = calendar.timegm(response_date)
-
-        self.assertAlmostEqual(time.time(), response_time, delta=2)
+        schema.assert_valid(self, self.validators['account_headers'],
+                            response.headers)
 
         self.assertRegexpMatches(
             response.text,
@@ -107,39 +77,15 @@ class Test(unittest2.TestCase):
             'content-type': 'application/json; charset=utf-8',
         }, response.headers)
 
-        self.assertRegexpMatches(
-            response.headers['x-account-bytes-used'],
-            r"^\d+$")
-
-        self.assertRegexpMatches(
-            response.headers['x-account-container-count'],
-            r"^\d+$")
-
-        self.assertRegexpMatches(
-            response.headers['x-account-object-count'],
-            r"^\d+$")
-
-        self.assertRegexpMatches(
-            response.headers['x-timestamp'],
-            r"^\d+\.\d+$")
-
-        self.assertRegexpMatches(
-            response.headers['x-trans-id'],
-            r"^tx[0-9a-f]{32}$")
-
-        response_date = time.strptime(
-            response.headers['date'],
-            '%a, %d %b %Y %H:%M:%S GMT')
-
-        response_time = calendar.timegm(response_date)
-
-        self.assertAlmostEqual(time.time(), response_time, delta=2)
+        schema.assert_valid(self, self.validators['account_headers'],
+                            response.headers)
 
         act_bytes = int(response.headers['x-account-bytes-used'])
         act_containers = int(response.headers['x-account-container-count'])
         act_objects = int(response.headers['x-account-object-count'])
-        for container in response.json():
-            self.assertItemsEqual(container.keys(), ['name', 'count', 'bytes'])
+        listing = response.json()
+        schema.assert_valid(self, self.validators['account_listing'], listing)
+        for container in listing:
             act_bytes -= container['bytes']
             act_containers -= 1
             act_objects -= container['count']
@@ -0,0 +1,117 @@
+import openstack_api_conformance
+from openstack_api_conformance import capabilities
+from openstack_api_conformance import payload
+from openstack_api_conformance import swift
+from openstack_api_conformance.swift import bulk
+
+import requests
+import unittest2
+import uuid
+
+
+class Test(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.config = openstack_api_conformance.get_configuration()['swift']
+        if not cls.config:
+            cls.skipTest("Swift not configured")
+
+        cls.tokenId, cls.url = swift.authenticate(cls.config)
+
+    def setUp(self):
+        self.session = requests.Session()
+        self.session.headers.update({'X-Auth-Token': self.tokenId})
+        self.container = "bulk-" + uuid.uuid4().hex
+        self.c_url = self.url + "/" + self.container
+
+        self.data = payload.Payload(70000, self.id())
+        self.entries = [("a", b"foo"), ("b/c", b""), ("d", self.data)]
+
+    def tearDown(self):
+        bulk.delete_container(self.session, self.c_url)
+
+    def requireBulk(self, name):
+        capabilities.require(openstack_api_conformance.get_configuration(),
+                             name)
+
+    def listing(self):
+        response = self.session.get(self.c_url,
+                                    headers={'accept': 'application/json'})
+        response.raise_for_status()
+        return [obj['name'] for obj in response.json()]
+
+    def assertExtracted(self, response):
+        self.assertEqual(200, response.status_code)
+        result = response.json()
+        self.assertEqual(3, result['Number Files Created'])
+        self.assertEqual([], result['Errors'])
+
+        self.assertEqual(['a', 'b/c', 'd'], self.listing())
+        response = self.session.get(self.c_url + "/d")
+        self.assertEqual(self.data.md5(),
+                         response.headers['etag'].strip('"'))
+        self.assertIsNone(self.data.mismatch(response.content))
+
+    def testExtractArchive(self):
+        self.requireBulk('bulk_upload')
+        self.session.put(self.c_url).raise_for_status()
+
+        self.assertExtracted(bulk.extract_archive(
+            self.session, self.url, self.entries, self.container))
+
+    def testExtractArchiveGzip(self):
+        self.requireBulk('bulk_upload')
+        self.session.put(self.c_url).raise_for_status()
+
+        self.assertExtracted(bulk.extract_archive(
+            self.session, self.url, self.entries, self.container, 'gz'))
+
+    def testExtractArchiveCreatesContainer(self):
+        self.requireBulk('bulk_upload')
+
+        self.assertExtracted(bulk.extract_archive(
+            self.session, self.url,
+            [(self.container + "/" + name, data)
+             for name, data in self.entries]))
+
+    def testBulkDelete(self):
+        self.requireBulk('bulk_delete')
+        self.session.put(self.c_url).raise_for_status()
+        for name in ("a", "b", u"\u2603"):
+            self.session.put(self.c_url + "/" + name,
+                             data="foo").raise_for_status()
+
+        result = bulk.bulk_delete(
+            self.session, self.url,
+            ["/%s/%s" % (self.container, name)
+             for name in ("a", "b", u"\u2603", "missing")])
+        self.assertEqual(3, result['Number Deleted'])
+        self.assertEqual(1, result['Number Not Found'])
+        self.assertEqual([], result['Errors'])
+        self.assertEqual([], self.listing())
+
+    def testBulkDeleteBatches(self):
+        self.requireBulk('bulk_delete')
+        self.session.put(self.c_url).raise_for_status()
+        for name in ("a", "b", "c"):
+            self.session.put(self.c_url + "/" + name,
+                             data="foo").raise_for_status()
+
+        result = bulk.bulk_delete(
+            self.session, self.url,
+            ["/%s/%s" % (self.container, name) for name in ("a", "b", "c")] +
+            ["/" + self.container], batch=2)
+        self.assertEqual(4, result['Number Deleted'])
+        self.assertEqual(404, self.session.head(self.c_url).status_code)
+
+    def testBulkDeleteNonEmptyContainer(self):
+        self.requireBulk('bulk_delete')
+        self.session.put(self.c_url).raise_for_status()
+        self.session.put(self.c_url + "/a", data="foo").raise_for_status()
+
+        result = bulk.bulk_delete(self.session, self.url,
+                                  ["/" + self.container])
+        self.assertEqual(0, result['Number Deleted'])
+        self.assertEqual([["/" + self.container, "409 Conflict"]],
+                         result['Errors'])
@@ -1,6 +1,6 @@
 import openstack_api_conformance
+from openstack_api_conformance import swift
 
-import json
 import requests
 import unittest2
 import uuid
@@ -16,33 +16,9 @@ class Test(unittest2.TestCase):
         if not self.config:
             self.skipTest("Swift not configured")
 
-        response = requests.post(
-            self.config.auth_url + 'v2.0/tokens',
-            data=json.dumps({
-                'auth': {
-                    'passwordCredentials': {
-                        'username': self.config['username'],
-                        'password': self.config['password'],
-                    },
-                    'tenantId': self.config['tenantId'],
-                }
-            }),
-            headers={'content-type': 'application/json'}
-        )
-
-        token = response.json()
+        token_id, self.url = swift.authenticate(self.config)
         self.session = requests.Session()
-
-        self.session.headers.update(
-            {'X-Auth-Token': token['access']['token']['id']})
-
-        object_stores = [
-            service['endpoints'][0]['publicURL']
-            for service in token['access']['serviceCatalog']
-            if service['type'] == 'object-store'
-        ]
-
-        self.url = object_stores[0]
+        self.session.headers.update({'X-Auth-Token': token_id})
         self.c_url = self.url + "/chup-" + uuid.uuid4().hex
 
         # make sure container exists
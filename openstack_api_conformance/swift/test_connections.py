@@ -0,0 +1,55 @@
+import openstack_api_conformance
+from openstack_api_conformance import connections
+from openstack_api_conformance import swift
+
+import unittest2
+import uuid
+
+
+class Test(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        configuration = openstack_api_conformance.get_configuration()
+        cls.config = configuration['swift']
+        cls.settings = connections.get_connections_config(configuration)
+
+    def setUp(self):
+        if not self.config:
+            self.skipTest("Swift not configured")
+
+        token_id, self.url = swift.authenticate(self.config)
+        self.headers = {'X-Auth-Token': token_id}
+
+    def testHttp11(self):
+        connection = connections.Connection(self.url)
+        try:
+            response, _ = connection.request('HEAD', self.url, self.headers)
+        finally:
+            connection.close()
+
+        self.assertEqual(11, response.version)
+        self.assertFalse(connection.closed)
+
+    def testKeepAlive(self):
+        requests = int(self.settings['requests'])
+        self.assertEqual(requests, connections.keep_alive(
+            self.url, self.headers, requests, 'HEAD'))
+
+    def testNotFoundKeepsConnection(self):
+        status, closed = connections.error_closes(
+            self.url, self.url + "/cnx-" + uuid.uuid4().hex, self.headers)
+
+        self.assertEqual(404, status)
+        self.assertFalse(closed)
+
+    def testUnauthorizedKeepsConnection(self):
+        status, closed = connections.error_closes(
+            self.url, self.url, {'X-Auth-Token': uuid.uuid4().hex})
+
+        self.assertEqual(401, status)
+        self.assertFalse(closed)
+
+    def testIdle(self):
+        self.assertTrue(connections.idle_survives(
+            self.url, float(self.settings['idle']), self.headers, 'HEAD'))
@@ -1,6 +1,7 @@
 import openstack_api_conformance
+from openstack_api_conformance import swift
+from openstack_api_conformance.swift import bulk
 
-import json
 import requests
 import unittest2
 
@@ -13,30 +14,7 @@ class Test(unittest2.TestCase):
         if not cls.config:
             cls.skipTest("Swift not configured")
 
-        response = requests.post(
-            cls.config.auth_url + 'v2.0/tokens',
-            data=json.dumps({
-                'auth': {
-                    'passwordCredentials': {
-                        'username': cls.config['username'],
-                        'password': cls.config['password'],
-                    },
-                    'tenantId': cls.config['tenantId'],
-                }
-            }),
-            headers={'content-type': 'application/json'}
-        )
-
-        token = response.json()
-
-        cls.tokenId = token['access']['token']['id']
-        object_stores = [
-            service['endpoints'][0]['publicURL']
-            for service in token['access']['serviceCatalog']
-            if service['type'] == 'object-store'
-        ]
-
-        cls.url = object_stores[0]
+        cls.tokenId, cls.url = swift.authenticate(cls.config)
         cls.headers = {'X-Auth-Token': cls.tokenId}
 
     def setUp(self):
@@ -45,11 +23,10 @@ class Test(unittest2.TestCase):
         self.to_delete = []
 
     def tearDown(self):
-        for item in self.to_delete:
-            self.session.delete(item)
+        bulk.delete(self.session, self.url, self.to_delete)
 
     def check_name(self, name, ok=True):
-        self.to_delete.append(self.url + "/" + name)
+        self.to_delete.append("/" + name)
 
         if not ok:
             with self.assertRaises(Exception):
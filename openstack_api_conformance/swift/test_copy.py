@@ -0,0 +1,102 @@
+import openstack_api_conformance
+from openstack_api_conformance import swift
+from openstack_api_conformance.swift import bulk
+from openstack_api_conformance.swift import server_copy
+
+import requests
+import unittest2
+import uuid
+
+
+class Test(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.config = openstack_api_conformance.get_configuration()['swift']
+        if not cls.config:
+            cls.skipTest("Swift not configured")
+
+        cls.tokenId, cls.url = swift.authenticate(cls.config)
+
+    def setUp(self):
+        self.session = requests.Session()
+        self.session.headers.update({'X-Auth-Token': self.tokenId})
+
+        self.container = "cp-" + uuid.uuid4().hex
+        self.other = "cp-" + uuid.uuid4().hex
+        for container in (self.container, self.other):
+            self.session.put(self.url + "/" + container).raise_for_status()
+
+        self.source = "/%s/a" % self.container
+        self.session.put(self.url + self.source, data="abcd", headers={
+            'content-type': 'text/x-foo',
+            'x-object-meta-foo': 'bar',
+        }).raise_for_status()
+
+    def tearDown(self):
+        for container in (self.container, self.other):
+            bulk.delete_container(self.session, self.url + "/" + container)
+
+    def assertCopied(self, destination):
+        response = self.session.get(self.url + destination)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(b"abcd", response.content)
+        self.assertEqual('e2fc714c4727ee9395f324cd2e7f331f',
+                         response.headers['etag'])
+        return response
+
+    def testCopy(self):
+        destination = "/%s/b" % self.container
+        response = server_copy.copy(self.session, self.url + self.source,
+                                    destination)
+        self.assertEqual(201, response.status_code)
+        self.assertEqual(self.source[1:], response.headers['x-copied-from'])
+
+        response = self.assertCopied(destination)
+        self.assertEqual('text/x-foo', response.headers['content-type'])
+        self.assertEqual('bar', response.headers['x-object-meta-foo'])
+
+    def testCopyAcrossContainers(self):
+        destination = "/%s/b" % self.other
+        response = server_copy.copy(self.session, self.url + self.source,
+                                    destination)
+        self.assertEqual(201, response.status_code)
+        self.assertCopied(destination)
+
+    def testCopyAddsMetadata(self):
+        destination = "/%s/b" % self.container
+        server_copy.copy(self.session, self.url + self.source, destination,
+                         {'x-object-meta-baz': 'qux'}).raise_for_status()
+
+        response = self.assertCopied(destination)
+        self.assertEqual('bar', response.headers['x-object-meta-foo'])
+        self.assertEqual('qux', response.headers['x-object-meta-baz'])
+
+    def testCopyFrom(self):
+        destination = "/%s/b" % self.other
+        response = server_copy.copy_from(
+            self.session, self.url + destination, self.source)
+        self.assertEqual(201, response.status_code)
+        self.assertEqual(self.source[1:], response.headers['x-copied-from'])
+
+        response = self.assertCopied(destination)
+        self.assertEqual('bar', response.headers['x-object-meta-foo'])
+
+    def testCopyFromContentType(self):
+        destination = "/%s/b" % self.container
+        server_copy.copy_from(
+            self.session, self.url + destination, self.source,
+            {'content-type': 'text/x-bar'}).raise_for_status()
+
+        response = self.assertCopied(destination)
+        self.assertEqual('text/x-bar', response.headers['content-type'])
+
+    def testCopyFromMissing(self):
+        response = server_copy.copy_from(
+            self.session, self.url + "/%s/b" % self.container,
+            "/%s/missing" % self.container)
+        self.assertEqual(404, response.status_code)
+
+    def testCopyWithoutDestination(self):
+        response = self.session.request('COPY', self.url + self.source)
+        self.assertEqual(412, response.status_code)
@@ -1,6 +1,7 @@
 import openstack_api_conformance
+from openstack_api_conformance import swift
+from openstack_api_conformance.swift import fixtures
 
-import json
 import requests
 import unittest
 
@@ -13,50 +14,25 @@ class Test(unittest.TestCase):
         if not cls.config:
             cls.skipTest("Swift not configured")
 
-        response = requests.post(
-            cls.config.auth_url + 'v2.0/tokens',
-            data=json.dumps({
-                'auth': {
-                    'passwordCredentials': {
-                        'username': cls.config['username'],
-                        'password': cls.config['password'],
-                    },
-                    'tenantId': cls.config['tenantId'],
-                }
-            }),
-            headers={'content-type': 'application/json'}
-        )
-        response.raise_for_status()
-
-        token = response.json()
-
-        cls.tokenId = token['access']['token']['id']
-        object_stores = [
-            service['endpoints'][0]['publicURL']
-            for service in token['access']['serviceCatalog']
-            if service['type'] == 'object-store'
-        ]
-
-        cls.url = object_stores[0]
+        cls.pool = fixtures.pool(cls.config)
+        cls.pool.provision('cors-', 1)
+        cls.tokenId, cls.url = cls.pool.token_id, cls.pool.url
         cls.headers = {'X-Auth-Token': cls.tokenId}
 
-        requests.put(cls.url + "/foo", headers=cls.headers)\
+    def setUp(self):
+        self.c_name = self.pool.acquire('cors-')
+        self.c_url = self.url + '/' + self.c_name
+        requests.put(self.c_url + "/a", data="abcd",
+                     headers=swift.expiring(self.config, self.headers))\
             .raise_for_status()
-        requests.put(cls.url + "/foo/a", data="abcd", headers=cls.headers)\
-            .raise_for_status()
-
-        # PUT the container again to clear caches
-        requests.put(cls.url + "/foo", headers=cls.headers).raise_for_status()
 
-    @classmethod
-    def tearDownClass(cls):
-        requests.delete(cls.url + "/foo/a", headers=cls.headers)
-        requests.delete(cls.url + "/foo", headers=cls.headers)
+    def tearDown(self):
+        self.pool.release(self.c_name)
 
     def testGet(self):
         # set the Cors header
         requests.post(
-            self.url + "/foo",
+            self.c_url,
             headers={
                 'X-Auth-Token': self.tokenId,
                 'X-Container-Meta-Access-Control-Allow-Origin': 'http://www.foo.com',
@@ -64,7 +40,7 @@ class Test(unittest.TestCase):
 
         # check if the cors header was stored
         response = requests.get(
-            self.url + "/foo",
+            self.c_url,
             headers={
                 'X-Auth-Token': self.tokenId,
             })
@@ -77,7 +53,7 @@ class Test(unittest.TestCase):
 
         # set the Cors header
         response = requests.options(
-            self.url + "/foo/a",
+            self.c_url + "/a",
             headers={
                 'X-Auth-Token': self.tokenId,
                 'Origin': 'http://www.foo.com',
@@ -88,7 +64,7 @@ class Test(unittest.TestCase):
 
         # set the Cors header
         response = requests.options(
-            self.url + "/foo/a",
+            self.c_url + "/a",
             headers={
                 'X-Auth-Token': self.tokenId,
                 'Origin': 'http://www.bar.com',
@@ -99,7 +75,7 @@ class Test(unittest.TestCase):
     def testGetWildcard(self):
         # set the Cors header
         requests.post(
-            self.url + "/foo",
+            self.c_url,
             headers={
                 'X-Auth-Token': self.tokenId,
                 'X-Container-Meta-Access-Control-Allow-Origin': '*',
@@ -107,7 +83,7 @@ class Test(unittest.TestCase):
 
         # check if the cors header was stored
         response = requests.get(
-            self.url + "/foo",
+            self.c_url,
             headers={
                 'X-Auth-Token': self.tokenId,
             })
@@ -120,7 +96,7 @@ class Test(unittest.TestCase):
 
         # set the Cors header
         response = requests.options(
-            self.url + "/foo/a",
+            self.c_url + "/a",
             headers={
                 'X-Auth-Token': self.tokenId,
                 'Origin': 'http://www.foo.com',
@@ -132,7 +108,7 @@ class Test(unittest.TestCase):
     def testGetMulti(self):
         # set the Cors header
         requests.post(
-            self.url + "/foo",
+            self.c_url,
             headers={
                 'X-Auth-Token': self.tokenId,
                 'X-Container-Meta-Access-Control-Allow-Origin': 'http://www.foo.com http://www.bar.com',
@@ -140,7 +116,7 @@ class Test(unittest.TestCase):
 
         # set the Cors header
         response = requests.options(
-            self.url + "/foo/a",
+            self.c_url + "/a",
             headers={
                 'X-Auth-Token': self.tokenId,
                 'Origin': 'http://www.foo.com',
@@ -151,7 +127,7 @@ class Test(unittest.TestCase):
 
         # set the Cors header
         response = requests.options(
-            self.url + "/foo/a",
+            self.c_url + "/a",
             headers={
                 'X-Auth-Token': self.tokenId,
                 'Origin': 'http://www.bar.com',
@@ -161,7 +137,7 @@ class Test(unittest.TestCase):
 
         # set the Cors header
         response = requests.options(
-            self.url + "/foo/a",
+            self.c_url + "/a",
             headers={
                 'X-Auth-Token': self.tokenId,
                 'Origin': 'http://www.baz.com',
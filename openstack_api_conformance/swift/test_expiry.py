@@ -0,0 +1,68 @@
+import openstack_api_conformance
+from openstack_api_conformance import swift
+
+import requests
+import time
+import unittest2
+import uuid
+
+
+class Test(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.config = openstack_api_conformance.get_configuration()['swift']
+        if not cls.config:
+            cls.skipTest("Swift not configured")
+
+        cls.tokenId, cls.url = swift.authenticate(cls.config)
+
+    def setUp(self):
+        self.session = requests.Session()
+        self.session.headers.update({'X-Auth-Token': self.tokenId})
+        self.c_url = self.url + "/exp-" + uuid.uuid4().hex
+        self.o_url = self.c_url + "/a"
+        self.session.put(self.c_url).raise_for_status()
+
+    def tearDown(self):
+        self.session.delete(self.o_url)
+        self.session.delete(self.c_url)
+
+    def testDeleteAfter(self):
+        start = time.time()
+        self.session.put(self.o_url, data="foo", headers={
+            'X-Delete-After': '2'}).raise_for_status()
+
+        response = self.session.head(self.o_url)
+        self.assertEqual(200, response.status_code)
+        self.assertAlmostEqual(start + 2,
+                               int(response.headers['x-delete-at']),
+                               delta=2)
+
+        time.sleep(max(
+            0, int(response.headers['x-delete-at']) + 1 - time.time()))
+        response = self.session.get(self.o_url)
+        self.assertEqual(404, response.status_code)
+
+    def testDeleteAt(self):
+        delete_at = int(time.time() + 3600)
+        self.session.put(self.o_url, data="foo", headers={
+            'X-Delete-At': str(delete_at)}).raise_for_status()
+
+        response = self.session.head(self.o_url)
+        self.assertEqual(str(delete_at), response.headers['x-delete-at'])
+
+    def testDeleteAtInThePast(self):
+        response = self.session.put(self.o_url, data="foo", headers={
+            'X-Delete-At': str(int(time.time() - 60))})
+        self.assertEqual(400, response.status_code)
+
+    def testRemoveDeleteAt(self):
+        self.session.put(self.o_url, data="foo", headers={
+            'X-Delete-After': '3600'}).raise_for_status()
+
+        self.session.post(self.o_url, headers={
+            'X-Remove-Delete-At': '1'}).raise_for_status()
+        response = self.session.head(self.o_url)
+        self.assertEqual(200, response.status_code)
+        self.assertNotIn('x-delete-at', response.headers)
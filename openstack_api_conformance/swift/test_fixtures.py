@@ -0,0 +1,69 @@
+import openstack_api_conformance
+from openstack_api_conformance import swift
+from openstack_api_conformance.swift import fixtures
+
+import requests
+import unittest2
+
+
+class Test(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.config = openstack_api_conformance.get_configuration()['swift']
+        if not cls.config:
+            cls.skipTest("Swift not configured")
+
+        cls.pool = fixtures.pool(cls.config)
+        cls.pool.provision('fix-', 1)
+        cls.tokenId, cls.url = cls.pool.token_id, cls.pool.url
+
+    def setUp(self):
+        self.session = requests.Session()
+        self.session.headers.update({'X-Auth-Token': self.tokenId})
+        self.c_name = self.pool.acquire('fix-')
+        self.c_url = self.url + '/' + self.c_name
+
+    def tearDown(self):
+        self.pool.release(self.c_name)
+
+    def leaveBehind(self):
+        """Sets what a previous holder may leave, then releases."""
+        self.session.post(self.c_url, headers={
+            'X-Container-Meta-Foo': 'bar',
+            'X-Container-Read': '.r:*',
+            'X-Container-Write': self.config.username,
+            'X-Versions-Location': self.c_name + '-versions',
+        }).raise_for_status()
+        self.session.put(self.c_url + '/a', data="foo").raise_for_status()
+        self.pool.release(self.c_name)
+
+    def testReset(self):
+        self.leaveBehind()
+        name, self.c_name = self.c_name, self.pool.acquire('fix-')
+        self.assertEqual(name, self.c_name)
+
+        response = self.session.head(self.c_url)
+        self.assertEqual(204, response.status_code)
+        self.assertEqual('0', response.headers['x-container-object-count'])
+        # no metadata but the heartbeat acquire() refreshed
+        self.assertIn(swift.HEARTBEAT, response.headers)
+        for header in response.headers:
+            if header.lower() != swift.HEARTBEAT.lower():
+                self.assertFalse(
+                    header.lower().startswith('x-container-meta-'), header)
+        self.assertNotIn('x-container-read', response.headers)
+        self.assertNotIn('x-container-write', response.headers)
+        self.assertNotIn('x-versions-location', response.headers)
+
+    def testResetWithHeaders(self):
+        self.leaveBehind()
+        self.c_name = self.pool.acquire('fix-', {
+            'X-Container-Meta-Foo': 'baz',
+            'X-Container-Read': '.r:*'})
+
+        response = self.session.head(self.c_url)
+        self.assertEqual('baz', response.headers['x-container-meta-foo'])
+        self.assertEqual('.r:*', response.headers['x-container-read'])
+        self.assertNotIn('x-container-write', response.headers)
+        self.assertNotIn('x-versions-location', response.headers)
@@ -1,14 +1,14 @@
 import openstack_api_conformance
+from openstack_api_conformance import capabilities
+from openstack_api_conformance import swift
+from openstack_api_conformance.swift import fixtures
 
-from hashlib import sha1
 from time import time
-import hmac
-import json
 import requests
 import unittest2
-import uuid
 
 
+@capabilities.requires('formpost')
 class Test(unittest2.TestCase):
 
     @classmethod
@@ -17,52 +17,21 @@ class Test(unittest2.TestCase):
         if not cls.config:
             cls.skipTest("Swift not configured")
 
-        response = requests.post(
-            cls.config.auth_url + 'v2.0/tokens',
-            data=json.dumps({
-                'auth': {
-                    'passwordCredentials': {
-                        'username': cls.config['username'],
-                        'password': cls.config['password'],
-                    },
-                    'tenantId': cls.config['tenantId'],
-                }
-            }),
-            headers={'content-type': 'application/json'}
-        )
-
-        token = response.json()
-
-        cls.tokenId = token['access']['token']['id']
-        object_stores = [
-            service['endpoints'][0]['publicURL']
-            for service in token['access']['serviceCatalog']
-            if service['type'] == 'object-store'
-        ]
-
-        cls.url = object_stores[0]
+        cls.pool = fixtures.pool(cls.config)
+        cls.pool.provision('fp-', 1)
+        cls.tokenId, cls.url = cls.pool.token_id, cls.pool.url
+        cls.key = cls.pool.tempurl_key()
 
     def setUp(self):
         self.session = requests.Session()
         self.session.headers.update({'X-Auth-Token': self.tokenId})
 
-        response = self.session.get(self.url + '/')
-        self.key = response.headers.get('X-Account-Meta-Temp-URL-Key')
-        if not self.key:
-            self.key = str(uuid.uuid4())
-            self.session.post(self.url + '/',
-                              headers={
-                                  'X-Account-Meta-Temp-URL-Key': self.key})
-
-        self.c_name = 'fp-' + str(uuid.uuid4())[:8]
+        self.c_name = self.pool.acquire('fp-')
         self.c_url = self.url + '/' + self.c_name
         self.o_url = self.c_url + '/ob'
 
-        self.session.put(self.c_url).raise_for_status()
-
     def tearDown(self):
-        self.session.delete(self.o_url)
-        self.session.delete(self.c_url)
+        self.pool.release(self.c_name)
 
     def testPost(self):
         path = "/v1/AUTH_%s/%s" % (self.config.tenantId, self.c_name)
@@ -71,18 +40,8 @@ class Test(unittest2.TestCase):
         max_file_count = 10
         expires = int(time() + 600)
 
-        hmac_body = '%s\n%s\n%s\n%s\n%s' % (path, redirect,
-                                            max_file_size, max_file_count,
-                                            expires)
-        signature = hmac.new(self.key, hmac_body, sha1).hexdigest()
-
-        data = {
-            "redirect": redirect,
-            "max_file_size": str(max_file_size),
-            "max_file_count": str(max_file_count),
-            "expires": str(expires),
-            "signature": signature,
-        }
+        data = swift.formpost_fields(self.key, path, redirect,
+                                     max_file_size, max_file_count, expires)
 
         response = requests.post(self.c_url,
                                  files={"file": ("test.xml", "<xml />")},
@@ -105,18 +64,8 @@ class Test(unittest2.TestCase):
         max_file_count = 10
         expires = int(time() + 600)
 
-        hmac_body = '%s\n%s\n%s\n%s\n%s' % (path, redirect,
-                                            max_file_size, max_file_count,
-                                            expires)
-        signature = hmac.new(self.key, hmac_body, sha1).hexdigest()
-
-        data = {
-            "redirect": redirect,
-            "max_file_size": str(max_file_size),
-            "max_file_count": str(max_file_count),
-            "expires": str(expires),
-            "signature": signature,
-        }
+        data = swift.formpost_fields(self.key, path, redirect,
+                                     max_file_size, max_file_count, expires)
 
         response = requests.post(self.c_url,
                                  files={"file": ("test.xml", "<xml />")},
@@ -139,18 +88,8 @@ class Test(unittest2.TestCase):
         max_file_count = 10
         expires = int(time() - 600)
 
-        hmac_body = '%s\n%s\n%s\n%s\n%s' % (path, redirect,
-                                            max_file_size, max_file_count,
-                                            expires)
-        signature = hmac.new(self.key, hmac_body, sha1).hexdigest()
-
-        data = {
-            "redirect": redirect,
-            "max_file_size": str(max_file_size),
-            "max_file_count": str(max_file_count),
-            "expires": str(expires),
-            "signature": signature,
-        }
+        data = swift.formpost_fields(self.key, path, redirect,
+                                     max_file_size, max_file_count, expires)
 
         response = requests.post(self.c_url,
                                  files={"file": ("test.xml", "<xml />")},
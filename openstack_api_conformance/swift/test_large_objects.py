@@ -0,0 +1,141 @@
+import openstack_api_conformance
+from openstack_api_conformance import capabilities
+from openstack_api_conformance import payload
+from openstack_api_conformance import swift
+from openstack_api_conformance.swift import bulk
+from openstack_api_conformance.swift import large_objects
+
+import hashlib
+import requests
+import unittest2
+import uuid
+
+# the minimum segment size of older releases
+SEGMENT = 1024 * 1024
+
+
+@capabilities.requires('slo', limits={'slo.max_manifest_segments': 3})
+class Test(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.config = openstack_api_conformance.get_configuration()['swift']
+        if not cls.config:
+            cls.skipTest("Swift not configured")
+
+        cls.tokenId, cls.url = swift.authenticate(cls.config)
+
+    def setUp(self):
+        self.session = requests.Session()
+        self.session.headers.update({'X-Auth-Token': self.tokenId})
+        self.c_url = self.url + "/slo-" + uuid.uuid4().hex
+        self.o_url = self.c_url + "/object"
+        self.session.put(self.c_url).raise_for_status()
+
+        # two full segments and a short last one
+        self.data = payload.Payload(2 * SEGMENT + 1234, self.id())
+
+    def tearDown(self):
+        bulk.delete_container(self.session, self.c_url)
+
+    def upload(self, concurrency=4):
+        return large_objects.upload_segments(
+            self.session, self.c_url, 'segments/', self.data, SEGMENT,
+            concurrency)
+
+    def assertDownload(self):
+        response = self.session.get(self.o_url)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(len(self.data), len(response.content))
+        self.assertEqual(self.data.md5(),
+                         hashlib.md5(response.content).hexdigest())
+
+    def testStaticLargeObject(self):
+        manifest = self.upload()
+        self.assertEqual(3, len(manifest))
+
+        response = large_objects.put_slo(self.session, self.o_url, manifest)
+        self.assertEqual(201, response.status_code)
+
+        response = self.session.head(self.o_url)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('True', response.headers['x-static-large-object'])
+        self.assertEqual(str(len(self.data)),
+                         response.headers['content-length'])
+        self.assertEqual(large_objects.manifest_etag(manifest),
+                         response.headers['etag'].strip('"'))
+
+        self.assertDownload()
+
+    def testManifestGet(self):
+        manifest = self.upload()
+        large_objects.put_slo(
+            self.session, self.o_url, manifest).raise_for_status()
+
+        response = self.session.get(self.o_url + '?multipart-manifest=get')
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(
+            [(s['path'], s['etag'], s['size_bytes']) for s in manifest],
+            [(s['name'], s['hash'], s['bytes']) for s in response.json()])
+
+    def testManifestSegmentMismatch(self):
+        manifest = self.upload()
+        manifest[1] = dict(manifest[1], etag=hashlib.md5(b'').hexdigest())
+
+        response = large_objects.put_slo(self.session, self.o_url, manifest)
+        self.assertEqual(400, response.status_code)
+
+        response = self.session.head(self.o_url)
+        self.assertEqual(404, response.status_code)
+
+    def testManifestMissingSegment(self):
+        manifest = self.upload()
+        manifest.append(dict(manifest[0], path=manifest[0]['path'] + 'x'))
+
+        response = large_objects.put_slo(self.session, self.o_url,
+                                         manifest)
+        self.assertEqual(400, response.status_code)
+
+    def testRangedDownload(self):
+        large_objects.put_slo(
+            self.session, self.o_url, self.upload()).raise_for_status()
+
+        # ranges crossing segment boundaries
+        self.assertIsNone(large_objects.download(
+            self.session, self.o_url, self.data, concurrency=4))
+
+        response = self.session.get(self.o_url, headers={
+            'Range': 'bytes=%i-%i' % (SEGMENT - 10, SEGMENT + 9)})
+        self.assertEqual(206, response.status_code)
+        self.assertEqual(self.data.read_range(SEGMENT - 10, SEGMENT + 10),
+                         response.content)
+
+    def testDynamicLargeObject(self):
+        capabilities.require(openstack_api_conformance.get_configuration(),
+                             'dlo')
+        manifest = self.upload(concurrency=1)
+
+        response = large_objects.put_dlo(self.session, self.o_url,
+                                         self.c_url, 'segments/')
+        self.assertEqual(201, response.status_code)
+
+        response = self.session.head(self.o_url)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(str(len(self.data)),
+                         response.headers['content-length'])
+        self.assertEqual(large_objects.manifest_etag(manifest),
+                         response.headers['etag'].strip('"'))
+
+        self.assertDownload()
+
+    def testDeleteManifestKeepsSegments(self):
+        manifest = self.upload()
+        large_objects.put_slo(
+            self.session, self.o_url, manifest).raise_for_status()
+
+        self.session.delete(self.o_url).raise_for_status()
+        response = self.session.get(self.c_url,
+                                    headers={'accept': 'application/json'})
+        self.assertEqual(
+            sorted(s['path'].split('/', 2)[2] for s in manifest),
+            sorted(obj['name'] for obj in response.json()))
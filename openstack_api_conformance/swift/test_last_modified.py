@@ -1,7 +1,8 @@
 import openstack_api_conformance
+from openstack_api_conformance import swift
+from openstack_api_conformance.swift import bulk
 
 import calendar
-import json
 import requests
 import time
 import unittest2
@@ -16,30 +17,7 @@ class Test(unittest2.TestCase):
         if not cls.config:
             cls.skipTest("Swift not configured")
 
-        response = requests.post(
-            cls.config.auth_url + 'v2.0/tokens',
-            data=json.dumps({
-                'auth': {
-                    'passwordCredentials': {
-                        'username': cls.config['username'],
-                        'password': cls.config['password'],
-                    },
-                    'tenantId': cls.config['tenantId'],
-                }
-            }),
-            headers={'content-type': 'application/json'}
-        )
-
-        token = response.json()
-
-        cls.tokenId = token['access']['token']['id']
-        object_stores = [
-            service['endpoints'][0]['publicURL']
-            for service in token['access']['serviceCatalog']
-            if service['type'] == 'object-store'
-        ]
-
-        cls.url = object_stores[0]
+        cls.tokenId, cls.url = swift.authenticate(cls.config)
 
     def setUp(self):
         self.session = requests.Session()
@@ -48,13 +26,8 @@ class Test(unittest2.TestCase):
         self.session.put(self.c_url)
 
     def tearDown(self):
-        # remove the object and the container.
-        r = self.session.get(
-            self.c_url, headers={'accept': 'application/json'})
-        for obj in r.json():
-            self.session.delete(self.c_url + "/" + obj['name'])
-
-        self.session.delete(self.c_url)
+        # remove the objects and the container.
+        bulk.delete_container(self.session, self.c_url)
 
     def testAutomatic(self):
         self.session.put(self.c_url + "/a", data="foo").raise_for_status()
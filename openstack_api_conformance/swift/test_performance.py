@@ -0,0 +1,99 @@
+import openstack_api_conformance
+from openstack_api_conformance import swift
+from openstack_api_conformance import performance
+from openstack_api_conformance import results
+
+from multiprocessing.pool import ThreadPool
+import requests
+import unittest2
+import uuid
+
+
+class Test(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        configuration = openstack_api_conformance.get_configuration()
+        cls.config = configuration['swift']
+        if not cls.config:
+            return
+
+        cls.samples = int(
+            performance.get_performance_config(configuration).get('samples')
+            or 20)
+        results.save_on_exit()
+
+        cls.tokenId, cls.url = swift.authenticate(cls.config)
+        cls.c_url = cls.url + "/perf-" + uuid.uuid4().hex
+        cls.objects = []
+
+        session = requests.Session()
+        session.headers.update({'X-Auth-Token': cls.tokenId})
+        session.put(cls.c_url).raise_for_status()
+
+        # the listing budget is measured against a container holding the
+        # configured number of objects.
+        budget = performance.get_budget('container_get') or {}
+        cls.objects = ['%08i' % i for i in range(int(budget.get('objects')
+                                                     or 0))]
+
+        headers = swift.expiring(cls.config)
+        pool = ThreadPool(16)
+        try:
+            for response in pool.imap_unordered(
+                    lambda name: session.put(cls.c_url + "/" + name,
+                                             data=name, headers=headers),
+                    cls.objects):
+                response.raise_for_status()
+        finally:
+            pool.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        if not cls.config:
+            return
+
+        session = requests.Session()
+        session.headers.update({'X-Auth-Token': cls.tokenId})
+
+        pool = ThreadPool(16)
+        try:
+            pool.map(lambda name: session.delete(cls.c_url + "/" + name),
+                     cls.objects + ['perf'])
+        finally:
+            pool.close()
+
+        session.delete(cls.c_url)
+
+    def setUp(self):
+        if not self.config:
+            self.skipTest("Swift not configured")
+
+        self.session = requests.Session()
+        self.session.headers.update({'X-Auth-Token': self.tokenId})
+
+    def measure(self, operation, method, url, **kwargs):
+        if not performance.get_budget(operation):
+            self.skipTest("no budget for %s" % operation)
+
+        samples = []
+        for _ in range(self.samples):
+            with performance.RECORDER.measure(operation):
+                self.session.request(method, url, **kwargs)\
+                    .raise_for_status()
+            samples.append(performance.RECORDER.samples[operation][-1])
+
+        performance.assert_within_budget(self, operation, samples)
+
+    def testContainerGet(self):
+        self.measure('container_get', 'GET', self.c_url,
+                     headers={'accept': 'application/json'})
+
+    def testObjectPut(self):
+        self.measure('object_put', 'PUT', self.c_url + "/perf",
+                     data="abcd")
+
+    def testObjectGet(self):
+        self.session.put(self.c_url + "/perf", data="abcd")\
+            .raise_for_status()
+        self.measure('object_get', 'GET', self.c_url + "/perf")
@@ -0,0 +1,97 @@
+import openstack_api_conformance
+from openstack_api_conformance import payload
+from openstack_api_conformance import swift
+from openstack_api_conformance.swift import ranges
+
+import requests
+import unittest2
+import uuid
+
+SIZE = 10000
+
+
+class Test(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.config = openstack_api_conformance.get_configuration()['swift']
+        if not cls.config:
+            cls.skipTest("Swift not configured")
+
+        cls.tokenId, cls.url = swift.authenticate(cls.config)
+
+    def setUp(self):
+        self.session = requests.Session()
+        self.session.headers.update({'X-Auth-Token': self.tokenId})
+        self.c_url = self.url + "/rng-" + uuid.uuid4().hex
+        self.o_url = self.c_url + "/a"
+
+        self.data = payload.Payload(SIZE, self.id())
+        self.session.put(self.c_url).raise_for_status()
+        self.session.put(self.o_url,
+                         data=self.data.open()).raise_for_status()
+
+    def tearDown(self):
+        self.session.delete(self.o_url)
+        self.session.delete(self.c_url)
+
+    def get(self, *byte_ranges):
+        return self.session.get(self.o_url, headers={
+            'Range': ranges.range_header(byte_ranges)})
+
+    def assertRange(self, response, first, last):
+        self.assertEqual(206, response.status_code)
+        self.assertEqual((first, last, SIZE),
+                         ranges.content_range(
+                             response.headers['content-range']))
+        self.assertEqual(str(last - first + 1),
+                         response.headers['content-length'])
+        self.assertEqual(self.data.read_range(first, last + 1),
+                         response.content)
+
+    def testSingleRange(self):
+        self.assertRange(self.get((100, 199)), 100, 199)
+
+    def testFirstByte(self):
+        self.assertRange(self.get((0, 0)), 0, 0)
+
+    def testSuffixRange(self):
+        self.assertRange(self.get((None, 500)), SIZE - 500, SIZE - 1)
+
+    def testOpenEndedRange(self):
+        self.assertRange(self.get((9500, None)), 9500, SIZE - 1)
+
+    def testRangePastEnd(self):
+        self.assertRange(self.get((9900, 20000)), 9900, SIZE - 1)
+
+    def testSuffixLargerThanObject(self):
+        self.assertRange(self.get((None, 20000)), 0, SIZE - 1)
+
+    def testUnsatisfiable(self):
+        response = self.get((20000, 30000))
+        self.assertEqual(416, response.status_code)
+
+    def testInvalidRangeIgnored(self):
+        response = self.session.get(self.o_url,
+                                    headers={'Range': 'bytes=abc'})
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(self.data.read_range(0), response.content)
+
+    def testMultiRange(self):
+        response = self.get((0, 9), (100, 109), (None, 10))
+        self.assertEqual(206, response.status_code)
+        self.assertTrue(response.headers['content-type'].startswith(
+            'multipart/byteranges'))
+
+        parts = ranges.byteranges(response)
+        self.assertEqual([(0, 9), (100, 109), (SIZE - 10, SIZE - 1)],
+                         [(first, last) for first, last, _ in parts])
+        for first, last, data in parts:
+            self.assertEqual(self.data.read_range(first, last + 1), data)
+
+    def testMultiRangePartlyUnsatisfiable(self):
+        response = self.get((0, 9), (20000, 30000))
+        self.assertEqual(206, response.status_code)
+        self.assertEqual((0, 9, SIZE), ranges.content_range(
+            response.headers['content-range']))
+        self.assertEqual(self.data.read_range(0, 10), response.content)
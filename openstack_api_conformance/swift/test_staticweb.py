@@ -1,11 +1,12 @@
 import openstack_api_conformance
+from openstack_api_conformance import capabilities
+from openstack_api_conformance.swift import fixtures
 import unittest2
 
 import requests
-import json
-import uuid
 
 
+@capabilities.requires('staticweb')
 class Test(unittest2.TestCase):
 
     @classmethod
@@ -14,46 +15,20 @@ class Test(unittest2.TestCase):
         if not cls.config:
             cls.skipTest("Swift not configured")
 
-        response = requests.post(
-            cls.config.auth_url + 'v2.0/tokens',
-            data=json.dumps({
-                'auth': {
-                    'passwordCredentials': {
-                        'username': cls.config['username'],
-                        'password': cls.config['password'],
-                    },
-                    'tenantId': cls.config['tenantId'],
-                }
-            }),
-            headers={'content-type': 'application/json'}
-        )
-
-        token = response.json()
-
-        cls.tokenId = token['access']['token']['id']
-        object_stores = [
-            service['endpoints'][0]['publicURL']
-            for service in token['access']['serviceCatalog']
-            if service['type'] == 'object-store'
-        ]
-
-        cls.url = object_stores[0]
+        cls.pool = fixtures.pool(cls.config)
+        cls.pool.provision('sw-', 1)
+        cls.tokenId, cls.url = cls.pool.token_id, cls.pool.url
         cls.headers = {'X-Auth-Token': cls.tokenId}
 
     def setUp(self):
         self.session = requests.Session()
         self.session.headers.update({'X-Auth-Token': self.tokenId})
-        self.c_url = self.url + '/sw-' + str(uuid.uuid4())[:8]
+        self.c_name = self.pool.acquire('sw-')
+        self.c_url = self.url + '/' + self.c_name
         self.o_url = self.c_url + '/index.html'
 
-        self.cleanup_urls = []
-
     def tearDown(self):
-        for url in self.cleanup_urls:
-            self.session.delete(url)
-
-        self.session.delete(self.o_url)
-        self.session.delete(self.c_url)
+        self.pool.release(self.c_name)
 
     def testWebIndex(self):
         self.session.put(
@@ -70,7 +45,6 @@ class Test(unittest2.TestCase):
         ).raise_for_status()
 
         nested_index = self.c_url + "/test/index.html"
-        self.cleanup_urls.append(nested_index)
         self.session.put(
             nested_index,
             data="<!-- mah -->",
@@ -166,7 +140,6 @@ class Test(unittest2.TestCase):
         ).raise_for_status()
 
         nested_index = self.c_url + "/test/nested.html"
-        self.cleanup_urls.append(nested_index)
         self.session.put(
             nested_index,
             data="<!-- mah -->",
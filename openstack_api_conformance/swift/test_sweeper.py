@@ -0,0 +1,112 @@
+import openstack_api_conformance
+from openstack_api_conformance import swift
+from openstack_api_conformance.swift import bulk
+from openstack_api_conformance.swift import sweeper
+
+import requests
+import unittest2
+import uuid
+
+
+class Head(object):
+    """A session answering every HEAD with the same headers."""
+
+    def __init__(self, headers):
+        self.headers = headers
+        self.status_code = 204
+
+    def head(self, url):
+        return self
+
+    def raise_for_status(self):
+        pass
+
+
+class Offline(unittest2.TestCase):
+    """Name matching and ages; needs no cluster."""
+
+    def testMatcher(self):
+        matches = sweeper.matcher(["tmpu-", "slo-"], ["foo"])
+        self.assertTrue(matches("tmpu-0123abcd"))
+        self.assertTrue(matches("slo-" + uuid.uuid4().hex))
+        self.assertTrue(matches("foo"))
+        self.assertFalse(matches("foobar"))
+        self.assertFalse(matches("tmpu-backup"))
+        self.assertFalse(matches("slo-0123"))
+
+    def testAge(self):
+        session = Head({'x-timestamp': '1000.00000'})
+        self.assertEqual(500, sweeper.age(session, '', now=1500))
+
+    def testAgeHeartbeat(self):
+        session = Head({'x-timestamp': '1000.00000',
+                        swift.HEARTBEAT: '1400.00000'})
+        self.assertEqual(100, sweeper.age(session, '', now=1500))
+
+        session = Head({'x-timestamp': '1000.00000', swift.HEARTBEAT: 'x'})
+        self.assertEqual(500, sweeper.age(session, '', now=1500))
+
+
+class Test(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.config = openstack_api_conformance.get_configuration()['swift']
+
+    def setUp(self):
+        if not self.config:
+            self.skipTest("Swift not configured")
+
+        token_id, self.url = swift.authenticate(self.config)
+        self.session = requests.Session()
+        self.session.headers.update({'X-Auth-Token': token_id})
+
+        # a prefix of its own, so the sweeps leave other runs alone
+        self.prefix = "swp-" + uuid.uuid4().hex[:8] + "-"
+        self.names = [self.prefix + uuid.uuid4().hex[:8] for _ in range(2)]
+        self.other = self.prefix + "keep"
+        for name in self.names + [self.other]:
+            self.session.put(self.url + "/" + name).raise_for_status()
+            self.session.put(self.url + "/" + name + "/a",
+                             data="foo").raise_for_status()
+
+    def tearDown(self):
+        for name in self.names + [self.other]:
+            bulk.delete_container(self.session, self.url + "/" + name)
+
+    def exists(self, name):
+        return self.session.head(self.url + "/" + name).status_code == 204
+
+    def testCandidates(self):
+        found = sweeper.candidates(self.session, self.url, [self.prefix])
+        self.assertEqual(sorted(self.names),
+                         [container['name'] for container in found])
+        self.assertEqual([1, 1], [container['count'] for container in found])
+
+    def testDryRun(self):
+        found = sweeper.candidates(self.session, self.url, [self.prefix])
+        swept = sweeper.sweep(self.session, self.url, found, min_age=0,
+                              dry_run=True)
+
+        self.assertEqual(['dry-run'] * 2, [status for _, status in swept])
+        for name in self.names:
+            self.assertTrue(self.exists(name))
+
+    def testTooNew(self):
+        found = sweeper.candidates(self.session, self.url, [self.prefix])
+        swept = sweeper.sweep(self.session, self.url, found, min_age=3600)
+
+        self.assertEqual(['too new'] * 2, [status for _, status in swept])
+        for name in self.names:
+            self.assertTrue(self.exists(name))
+
+    def testSweep(self):
+        session = sweeper.RateLimitedSession(50)
+        session.headers.update(self.session.headers)
+        found = sweeper.candidates(session, self.url, [self.prefix])
+        swept = sweeper.sweep(session, self.url, found, min_age=0)
+
+        self.assertEqual(['deleted'] * 2, [status for _, status in swept])
+        for name in self.names:
+            self.assertFalse(self.exists(name))
+        self.assertTrue(self.exists(self.other))
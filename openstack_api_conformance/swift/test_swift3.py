@@ -1,73 +1,16 @@
 import openstack_api_conformance
+from openstack_api_conformance import capabilities
+from openstack_api_conformance import swift
+from openstack_api_conformance.swift import sign_headers
 import unittest2
 
-import base64
-import email.utils
-import json
-import hmac
 import requests
-import sha
 import time
 import urllib
 import uuid
 
 
-def canonical_string(method, path, headers, expires=None):
-    """
-    Generates the aws canonical string for the given parameters
-    """
-    interesting_headers = {}
-    for key in headers:
-        lk = key.lower()
-        if headers[key] != None and (lk in ['content-md5', 'content-type', 'date'] or
-                                     lk.startswith('x-amz-')):
-            interesting_headers[lk] = str(headers[key]).strip()
-
-    # these keys get empty strings if they don't exist
-    if 'content-type' not in interesting_headers:
-        interesting_headers['content-type'] = ''
-    if 'content-md5' not in interesting_headers:
-        interesting_headers['content-md5'] = ''
-
-    # if you're using expires for query string auth, then it trumps date
-    # (and provider.date_header)
-    if expires:
-        interesting_headers['date'] = str(expires)
-
-    sorted_header_keys = sorted(interesting_headers.keys())
-
-    buf = "%s\n" % method
-    for key in sorted_header_keys:
-        val = interesting_headers[key]
-        if key.startswith('x-amz-'):
-            buf += "%s:%s\n" % (key, val)
-        else:
-            buf += "%s\n" % val
-
-    # don't include anything after the first ? in the resource...
-    # unless it is one of the QSA of interest, defined above
-    t = path.split('?')
-    buf += t[0]
-
-    return buf
-
-
-def sign_headers(method, path, headers, expires=None):
-
-    if 'Date' not in headers and not expires:
-        headers['date'] = email.utils.formatdate(time.time())
-
-    string_to_sign = canonical_string(method, path, headers, expires)
-
-    config = openstack_api_conformance.get_configuration()['swift']
-
-    signature = base64.b64encode(hmac.new(
-        str(config['s3_secret']),
-        str(string_to_sign), sha).digest())
-
-    headers['Authorization'] = 'AWS %s:%s' % (config['s3_access'], signature)
-
-
+@capabilities.requires('swift3')
 class Test(unittest2.TestCase):
 
     @classmethod
@@ -76,32 +19,12 @@ class Test(unittest2.TestCase):
         if not cls.config:
             cls.skipTest("Swift not configured")
 
+        if not cls.config['s3_access'] and not cls.config['s3_secret']:
+            raise capabilities.Unsupported("S3 not configured")
+
         cls.url = cls.config['s3_base']
 
-        response = requests.post(
-            cls.config.auth_url + 'v2.0/tokens',
-            data=json.dumps({
-                'auth': {
-                    'passwordCredentials': {
-                        'username': cls.config['username'],
-                        'password': cls.config['password'],
-                    },
-                    'tenantId': cls.config['tenantId'],
-                }
-            }),
-            headers={'content-type': 'application/json'}
-        )
-
-        token = response.json()
-
-        object_stores = [
-            service['endpoints'][0]['publicURL']
-            for service in token['access']['serviceCatalog']
-            if service['type'] == 'object-store'
-        ]
-
-        cls.swift_url = object_stores[0]
-        cls.tokenId = token['access']['token']['id']
+        cls.tokenId, cls.swift_url = swift.authenticate(cls.config)
 
     def setUp(self):
         if not self.config:
@@ -158,7 +81,7 @@ class Test(unittest2.TestCase):
         headers = {}
         url = self.url + self.obj
         sign_headers('PUT', '/' + url.split('/', 3)[-1], headers)
-        requests.put(url, headers=headers).raise_for_status()
+        requests.put(url, headers=headers, data="abcd").raise_for_status()
 
         headers = {'X-AMZ-COPY-SOURCe': self.obj}
         url = self.url + self.obj + "-1"
@@ -171,6 +94,13 @@ class Test(unittest2.TestCase):
         result = requests.get(self.swift_url + self.obj + "-1",
                               headers={'x-auth-token': self.tokenId})
         result.raise_for_status()
+        self.assertEqual(result.content, "abcd")
+
+        # the copy is a new object
+        headers = {}
+        url = self.url + self.obj + "-1"
+        sign_headers('DELETE', '/' + url.split('/', 3)[-1], headers)
+        requests.delete(url, headers=headers)
 
     def testPutSigned(self):
         headers = {}
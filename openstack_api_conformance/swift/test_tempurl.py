@@ -1,14 +1,14 @@
 import openstack_api_conformance
+from openstack_api_conformance import capabilities
+from openstack_api_conformance import swift
+from openstack_api_conformance.swift import fixtures
 
-from hashlib import sha1
 from time import time
-import hmac
-import json
 import requests
 import unittest2
-import uuid
 
 
+@capabilities.requires('tempurl')
 class Test(unittest2.TestCase):
 
     @classmethod
@@ -17,52 +17,23 @@ class Test(unittest2.TestCase):
         if not cls.config:
             cls.skipTest("Swift not configured")
 
-        response = requests.post(
-            cls.config.auth_url + 'v2.0/tokens',
-            data=json.dumps({
-                'auth': {
-                    'passwordCredentials': {
-                        'username': cls.config['username'],
-                        'password': cls.config['password'],
-                    },
-                    'tenantId': cls.config['tenantId'],
-                }
-            }),
-            headers={'content-type': 'application/json'}
-        )
-
-        token = response.json()
-
-        cls.tokenId = token['access']['token']['id']
-        object_stores = [
-            service['endpoints'][0]['publicURL']
-            for service in token['access']['serviceCatalog']
-            if service['type'] == 'object-store'
-        ]
-
-        cls.url = object_stores[0]
+        cls.pool = fixtures.pool(cls.config)
+        cls.pool.provision('tmpu-', 1)
+        cls.tokenId, cls.url = cls.pool.token_id, cls.pool.url
+        cls.key = cls.pool.tempurl_key()
 
     def setUp(self):
         self.session = requests.Session()
         self.session.headers.update({'X-Auth-Token': self.tokenId})
 
-        response = self.session.get(self.url + '/')
-        self.key = response.headers.get('X-Account-Meta-Temp-URL-Key')
-        if not self.key:
-            self.key = str(uuid.uuid4())
-            self.session.post(
-                self.url + '/',
-                headers={'X-Account-Meta-Temp-URL-Key': self.key})
-
-        self.c_url = self.url + '/tmpu-' + str(uuid.uuid4())[:8]
+        self.c_name = self.pool.acquire('tmpu-')
+        self.c_url = self.url + '/' + self.c_name
         self.o_url = self.c_url + '/ob'
 
-        self.session.put(self.c_url).raise_for_status()
         self.session.put(self.o_url, data="test").raise_for_status()
 
     def tearDown(self):
-        self.session.delete(self.o_url)
-        self.session.delete(self.c_url)
+        self.pool.release(self.c_name)
 
     def testGetTraditional(self):
         if '/v1/AUTH_' in self.o_url:
@@ -77,12 +48,8 @@ class Test(unittest2.TestCase):
         base_url, object_path = url.split('/v1/', 1)
         object_path = '/v1/' + object_path
         expires = int(time() + 60)
-        hmac_body = 'GET\n%i\n%s' % (expires, object_path)
-
-        sig = hmac.new(self.key, hmac_body, sha1).hexdigest()
-
         requests.get(
-            "%s?temp_url_sig=%s&temp_url_expires=%i" % (url, sig, expires)
+            swift.tempurl(url, object_path, self.key, expires)
         ).raise_for_status()
 
     def testGetSimplified(self):
@@ -90,12 +57,8 @@ class Test(unittest2.TestCase):
         object_path = self.o_url[len(self.url):]
 
         expires = int(time() + 60)
-        hmac_body = 'GET\n%i\n%s' % (expires, object_path)
-
-        sig = hmac.new(self.key, hmac_body, sha1).hexdigest()
-
         requests.get(
-            "%s?temp_url_sig=%s&temp_url_expires=%i" % (url, sig, expires)
+            swift.tempurl(url, object_path, self.key, expires)
         ).raise_for_status()
 
     def testGetFarFuture(self):
@@ -103,12 +66,8 @@ class Test(unittest2.TestCase):
         object_path = self.o_url[len(self.url):]
 
         expires = int(time() + 86400 * 365)
-        hmac_body = 'GET\n%i\n%s' % (expires, object_path)
-
-        sig = hmac.new(self.key, hmac_body, sha1).hexdigest()
-
         requests.get(
-            "%s?temp_url_sig=%s&temp_url_expires=%i" % (url, sig, expires)
+            swift.tempurl(url, object_path, self.key, expires)
         ).raise_for_status()
 
     def testBrokenHash(self):
@@ -116,12 +75,8 @@ class Test(unittest2.TestCase):
         object_path = self.o_url[len(self.url):] + '?'
 
         expires = int(time() + 60)
-        hmac_body = 'GET\n%i\n%s' % (expires, object_path)
-
-        sig = hmac.new(self.key, hmac_body, sha1).hexdigest()
-
         response = requests.get(
-            "%s?temp_url_sig=%s&temp_url_expires=%i" % (url, sig, expires)
+            swift.tempurl(url, object_path, self.key, expires)
         )
 
         self.assertEqual(response.status_code, 401)
@@ -132,12 +87,8 @@ class Test(unittest2.TestCase):
         object_path = self.o_url[len(self.url):]
 
         expires = int(time() - 60)
-        hmac_body = 'GET\n%i\n%s' % (expires, object_path)
-
-        sig = hmac.new(self.key, hmac_body, sha1).hexdigest()
-
         response = requests.get(
-            "%s?temp_url_sig=%s&temp_url_expires=%i" % (url, sig, expires)
+            swift.tempurl(url, object_path, self.key, expires)
         )
 
         self.assertEqual(response.status_code, 401)
@@ -148,12 +99,8 @@ class Test(unittest2.TestCase):
         object_path = self.o_url[len(self.url):]
 
         expires = int(time() + 60)
-        hmac_body = 'GET\n%i\n%s' % (expires, object_path)
-
-        sig = hmac.new(self.key, hmac_body, sha1).hexdigest()
-
         requests.get(
-            "%s?temp_url_sig=%s&temp_url_expires=%i" % (url, sig, expires)
+            swift.tempurl(url, object_path, self.key, expires)
         ).raise_for_status()
 
         response = requests.get(url)
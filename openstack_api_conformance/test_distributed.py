@@ -0,0 +1,144 @@
+from openstack_api_conformance import distributed
+from openstack_api_conformance import performance
+from openstack_api_conformance import underload
+
+import json
+import socket
+import unittest2
+
+MODULES = [
+    'openstack_api_conformance.swift.test_sweeper',
+    'openstack_api_conformance.swift.test_connections',
+    'openstack_api_conformance.keystone.test_connections',
+]
+
+
+class Messages(unittest2.TestCase):
+    """The wire format; needs no cloud."""
+
+    def testSendReceive(self):
+        left, right = socket.socketpair()
+        rfile = right.makefile('rb')
+        try:
+            distributed.send(left, {'type': 'hello', 'host': 'a:1'})
+            distributed.send(left, {'type': 'done', 'failures': {}})
+            left.close()
+
+            self.assertEqual({'type': 'hello', 'host': 'a:1'},
+                             distributed.receive(rfile))
+            self.assertEqual({'type': 'done', 'failures': {}},
+                             distributed.receive(rfile))
+            self.assertIsNone(distributed.receive(rfile))
+        finally:
+            rfile.close()
+            right.close()
+
+    def testParseAddress(self):
+        self.assertEqual(('example.com', 7701),
+                         distributed.parse_address('example.com:7701'))
+        self.assertEqual(('', 7701), distributed.parse_address(':7701'))
+        self.assertEqual(('localhost', distributed.DEFAULT_PORT),
+                         distributed.parse_address(':', 'localhost'))
+
+
+class Merging(unittest2.TestCase):
+    """Recorders as workers send them, merged as the coordinator does."""
+
+    def recorder(self, samples, errors):
+        recorder = performance.Recorder()
+        for seconds in samples:
+            recorder.add('get', seconds)
+        for _ in range(errors):
+            recorder.add('get', 0.0, False)
+        recorder.add_mismatch('put', 'status')
+        recorder.validated['get'] += len(samples)
+        return recorder
+
+    def encoded(self, recorder):
+        # as it travels
+        return json.loads(json.dumps(distributed.encode_recorder(recorder)))
+
+    def testEncodeRecorder(self):
+        data = self.encoded(self.recorder([0.01, 0.02, 0.02], 1))
+
+        self.assertEqual(3, len(performance.Histogram.from_dict(
+            data['histograms']['get'])))
+        self.assertNotIn('put', data['histograms'])
+        self.assertEqual({'get': 1, 'put': 1}, data['errors'])
+        self.assertEqual({'put': {'status': 1}}, data['mismatches'])
+        self.assertEqual({'get': 3}, data['validated'])
+
+    def testMerged(self):
+        merged = distributed.Merged()
+        merged.add(self.encoded(self.recorder([0.01] * 90, 1)))
+        merged.add(self.encoded(self.recorder([0.1] * 10, 2)))
+
+        self.assertEqual(100, merged.total())
+        summary = merged.summary(10.0)
+        self.assertEqual(100, summary['get']['count'])
+        self.assertEqual(3, summary['get']['errors'])
+        self.assertAlmostEqual(10.0, summary['get']['throughput'])
+        self.assertAlmostEqual(0.01, summary['get']['p50'], delta=0.0001)
+        self.assertAlmostEqual(0.1, summary['get']['p99'], delta=0.001)
+        self.assertEqual(0, summary['put']['count'])
+        self.assertEqual(2, summary['put']['errors'])
+
+        recorder = merged.recorder(100.0, 110.0)
+        self.assertEqual(100, len(recorder.samples['get']))
+        self.assertEqual(3, recorder.errors['get'])
+        self.assertEqual({'status': 2}, dict(recorder.mismatches['put']))
+        self.assertEqual(100, recorder.validated['get'])
+        self.assertEqual(10.0, recorder.finished - recorder.started)
+
+
+class Sharding(unittest2.TestCase):
+
+    def testShard(self):
+        shards = distributed.shard(MODULES, 2)
+
+        self.assertEqual([[MODULES[0], MODULES[2]], [MODULES[1]]],
+                         [modules for modules, _ in shards])
+        every = [case.id() for case in distributed.iterate(
+            underload.load_tests(MODULES))]
+        self.assertEqual(sorted(every),
+                         sorted(shards[0][1] + shards[1][1]))
+        for modules, tests in shards:
+            for test in tests:
+                self.assertIn(test.rsplit('.', 2)[0], modules)
+
+    def testMoreWorkersThanModules(self):
+        shards = distributed.shard(MODULES[:1], 3)
+        self.assertEqual([[MODULES[0]], [], []],
+                         [modules for modules, _ in shards])
+
+
+class Loopback(unittest2.TestCase):
+    """A coordinator and two local workers over loopback."""
+
+    def setUp(self):
+        self.coordinator = distributed.Coordinator('localhost:0', 2,
+                                                   timeout=30)
+        self.local = distributed.start_local(2, self.coordinator.port)
+
+    def tearDown(self):
+        self.coordinator.close()
+        for process in self.local:
+            process.wait()
+
+    def testTests(self):
+        hosts = self.coordinator.accept()
+        self.assertEqual(2, len(hosts))
+
+        # one module, so the second worker runs an empty job
+        names = [Messages.__module__ + '.Messages',
+                 Messages.__module__ + '.Merging']
+        outcomes, failures, failed = distributed.coordinate_tests(
+            self.coordinator, names, hosts)
+
+        self.assertEqual([], failed)
+        self.assertEqual({}, failures)
+        self.assertEqual(
+            sorted(case.id() for case in distributed.iterate(
+                underload.load_tests(names))),
+            sorted(outcomes))
+        self.assertEqual({'pass'}, set(outcomes.values()))
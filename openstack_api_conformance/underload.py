@@ -0,0 +1,173 @@
+from __future__ import print_function
+
+import argparse
+import collections
+import os
+import sys
+import time
+
+import unittest2
+
+import openstack_api_conformance
+from openstack_api_conformance import loadgen
+
+# Conformance under load: runs the unchanged test suite (or some tests) at
+# increasing levels of background load and reports the failure rate of every
+# test per level.
+#
+#     "underload": {
+#         "levels": [0, 50, 100, 200],
+#         "repeat": 3,
+#         "warmup": 5
+#     }
+#
+# The background load is the "load" section; a level is the request rate in
+# open mode and the concurrency per process in closed mode. Level 0 runs
+# without background load.
+#
+#     python -m openstack_api_conformance.underload --levels 0 100 400 \
+#         openstack_api_conformance.swift.test_container
+
+DEFAULTS = {
+    'levels': [0, 50, 100],
+    'repeat': 1,
+    'warmup': 5,
+}
+
+
+class OutcomeResult(unittest2.TestResult):
+    """Collects the outcome of every test by id."""
+
+    def __init__(self, *args, **kwargs):
+        super(OutcomeResult, self).__init__(*args, **kwargs)
+        self.outcomes = {}
+
+    def addSuccess(self, test):
+        super(OutcomeResult, self).addSuccess(test)
+        self.outcomes[test.id()] = 'pass'
+
+    def addFailure(self, test, err):
+        super(OutcomeResult, self).addFailure(test, err)
+        self.outcomes[test.id()] = 'fail'
+
+    def addError(self, test, err):
+        super(OutcomeResult, self).addError(test, err)
+        # errors in setUpClass are reported against the class
+        self.outcomes[getattr(test, 'description', None) or test.id()] = \
+            'error'
+
+    def addSkip(self, test, reason):
+        super(OutcomeResult, self).addSkip(test, reason)
+        self.outcomes[test.id()] = 'skip'
+
+
+def load_tests(names):
+    loader = unittest2.TestLoader()
+    if names:
+        return loader.loadTestsFromNames(names)
+
+    package = os.path.dirname(os.path.abspath(__file__))
+    return loader.discover(package, top_level_dir=os.path.dirname(package))
+
+
+def run_level(names, repeat):
+    """Runs the tests `repeat` times, returns {test: [outcome, ...]}."""
+    outcomes = collections.defaultdict(list)
+    for _ in range(repeat):
+        result = OutcomeResult()
+        load_tests(names).run(result)
+        for test, outcome in result.outcomes.items():
+            outcomes[test].append(outcome)
+
+    return outcomes
+
+
+def run(levels, names, load, repeat=1, warmup=5, config=None):
+    """
+    Returns a list of (level, outcomes, background summary) per level, the
+    summary being None at level 0.
+    """
+    report = []
+    for level in levels:
+        if not level:
+            report.append((level, run_level(names, repeat), None))
+            continue
+
+        key = 'rate' if load['mode'] == 'open' else 'concurrency'
+        background = loadgen.Background(dict(load, **{key: level}), config)
+        with background:
+            time.sleep(warmup)
+            outcomes = run_level(names, repeat)
+
+        report.append((level, outcomes, background.recorder.summary()))
+
+    return report
+
+
+def failure_rate(outcomes):
+    counted = [o for o in outcomes if o != 'skip']
+    if not counted:
+        return None
+    return sum(1 for o in counted if o != 'pass') / float(len(counted))
+
+
+def format_report(report, show_all=False):
+    levels = [level for level, _, _ in report]
+    tests = sorted(set(test for _, outcomes, _ in report
+                       for test in outcomes))
+
+    lines = ["%-70s" % 'failure rate per offered load' +
+             "".join("%9g" % level for level in levels)]
+
+    for test in tests:
+        rates = [failure_rate(outcomes.get(test, ()))
+                 for _, outcomes, _ in report]
+        if not show_all and not any(rates):
+            continue
+        lines.append("%-70s" % test[-70:] + "".join(
+            "%9s" % ('-' if rate is None else '%.0f%%' % (rate * 100))
+            for rate in rates))
+
+    def total(summary, field):
+        return sum(row[field] for row in summary.values()) if summary else 0
+
+    lines.append("%-70s" % 'background req/s achieved' + "".join(
+        "%9.1f" % total(summary, 'throughput') for _, _, summary in report))
+    lines.append("%-70s" % 'background errors' + "".join(
+        "%9i" % total(summary, 'errors') for _, _, summary in report))
+    lines.append("%-70s" % 'background schema mismatches' + "".join(
+        "%9i" % total(summary, 'mismatches') for _, _, summary in report))
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run the conformance tests under background load.")
+    parser.add_argument('tests', nargs='*',
+                        help="test names, default: the whole suite")
+    parser.add_argument('--levels', type=float, nargs='+')
+    parser.add_argument('--repeat', type=int)
+    parser.add_argument('--all', action='store_true',
+                        help="also list tests that never failed")
+    args = parser.parse_args(argv)
+
+    config = openstack_api_conformance.get_configuration()
+    settings = dict(DEFAULTS)
+    settings.update(config.underload or {})
+    if args.levels:
+        settings['levels'] = args.levels
+    if args.repeat:
+        settings['repeat'] = args.repeat
+
+    load = loadgen.get_load_config(config)
+    report = run(settings['levels'], args.tests, load,
+                 int(settings['repeat']), float(settings['warmup']), config)
+    print(format_report(report, args.all))
+
+    return 1 if any(failure_rate(outcomes[test])
+                    for _, outcomes, _ in report for test in outcomes) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())